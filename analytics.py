@@ -0,0 +1,112 @@
+# Incrementally maintained corpus aggregates for the analytics dashboard
+# Ingest paths push rows in as they arrive; the dashboard reads a cached
+# snapshot instead of rescanning the corpus on every rerender.
+
+import threading
+from collections import Counter
+from typing import Dict, List
+
+RECENT_YEAR = 2023
+REBUILD_THRESHOLD = 10000
+
+
+class CorpusAnalytics:
+    """Year histogram, journal counts, recent coverage and unique journals"""
+
+    def __init__(self, recent_year: int = RECENT_YEAR):
+        self.recent_year = recent_year
+        self.year_counts = Counter()
+        self.journal_counts = Counter()
+        self.recent = 0
+        # paper key -> (year, journal) currently counted, so upserts don't double count
+        self._seen: Dict = {}
+        self._synced = 0
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(paper: Dict):
+        return paper.get('id') or paper.get('pmid')
+
+    @property
+    def total(self) -> int:
+        return len(self._seen)
+
+    def update(self, papers: List[Dict]):
+        """Count new papers and re-count changed ones"""
+        with self._lock:
+            for paper in papers:
+                key = self._key(paper)
+                entry = (paper.get('year'), paper.get('journal') or 'Unknown')
+                previous = self._seen.get(key)
+                if previous == entry:
+                    continue
+                if previous is not None:
+                    self._count(previous, -1)
+                self._seen[key] = entry
+                self._count(entry, 1)
+            self._snapshot = None
+
+    def sync(self, papers: List[Dict]):
+        """Count whatever an append-only corpus list gained since the last call"""
+        if not self._synced and len(papers) >= REBUILD_THRESHOLD:
+            # First sight of a large corpus: one vectorized pass beats row-by-row updates
+            import pandas as pd
+            self.rebuild(pd.DataFrame(papers))
+        elif len(papers) > self._synced:
+            self.update(papers[self._synced:])
+            self._synced = len(papers)
+
+    def _count(self, entry, delta: int):
+        year, journal = entry
+        if year:
+            self.year_counts[year] += delta
+            if year >= self.recent_year:
+                self.recent += delta
+            if not self.year_counts[year]:
+                del self.year_counts[year]
+        self.journal_counts[journal] += delta
+        if not self.journal_counts[journal]:
+            del self.journal_counts[journal]
+
+    def snapshot(self, top_n: int = 8) -> Dict:
+        """Dashboard aggregates; recomputed only after an update"""
+        with self._lock:
+            if self._snapshot is None or self._snapshot['top_n'] != top_n:
+                total = self.total
+                self._snapshot = {
+                    'top_n': top_n,
+                    'total_papers': total,
+                    'papers_by_year': dict(sorted(self.year_counts.items())),
+                    'top_journals': dict(self.journal_counts.most_common(top_n)),
+                    'recent_papers': self.recent,
+                    'recent_coverage': (self.recent / total * 100) if total else 0.0,
+                    'unique_journals': len(self.journal_counts)
+                }
+            return self._snapshot
+
+    def rebuild(self, df):
+        """Recompute every aggregate from a full corpus frame with vectorized pandas ops"""
+        import pandas as pd
+
+        years = df['year'] if 'year' in df else pd.Series([None] * len(df), dtype=object)
+        journals = df['journal'].fillna('Unknown') if 'journal' in df else pd.Series(['Unknown'] * len(df))
+        keys = df['id'] if 'id' in df else df['pmid']
+
+        valid_years = pd.to_numeric(years, errors='coerce').dropna()
+        valid_years = valid_years[valid_years != 0].astype(int)
+        with self._lock:
+            self.year_counts = Counter(valid_years.value_counts().to_dict())
+            self.recent = int((valid_years >= self.recent_year).sum())
+            self.journal_counts = Counter(journals.value_counts().to_dict())
+            self._seen = dict(zip(keys, zip(years.astype(object).where(years.notna(), None), journals)))
+            self._synced = len(df)
+            self._snapshot = None
+
+
+_shared = CorpusAnalytics()
+
+
+def shared_analytics() -> CorpusAnalytics:
+    """Process-wide instance fed by SupabaseStorage.add_papers and the dashboards"""
+    return _shared
@@ -1,7 +1,16 @@
 import streamlit as st
 import os
+from datetime import datetime
 from supabase import create_client
 
+from paper_stats import PaperStats
+from paper_search import PaperSearch
+from hybrid_search import HybridRetriever
+from search_filters import SearchFilters
+from tracing import render_debug_panel, shared_tracer
+
+tracer = shared_tracer()
+
 # Page config
 st.set_page_config(
     page_title="Research AI Assistant",
@@ -21,22 +30,45 @@ def init_supabase():
     
     return create_client(url, key)
 
-def search_papers(supabase, query, limit=5):
-    """Search papers by title/abstract"""
+@st.cache_resource
+def init_stats(_supabase):
+    """Corpus stats shared by every session (refreshed every 30s)"""
+    return PaperStats(_supabase, ttl_seconds=30)
+
+@st.cache_resource
+def init_retriever(_supabase):
+    """Hybrid full-text + vector retriever shared by every session"""
     try:
-        # Simple text search in title and abstract
-        result = supabase.table('papers').select('*').ilike('title', f'%{query}%').limit(limit).execute()
-        papers = result.data or []
-        
-        # If no title matches, try abstract
-        if not papers:
-            result = supabase.table('papers').select('*').ilike('abstract', f'%{query}%').limit(limit).execute()
-            papers = result.data or []
-        
-        return papers
+        # Loads the embedding model and connects to the vector store
+        from research_system import SupabaseStorage, create_vector_storage
+        vector_storage = create_vector_storage()
+        if vector_storage.backfill_required:
+            # Vectors from before the filter properties existed need re-indexing
+            SupabaseStorage(_supabase).reset_processed()
+        vector_search = vector_storage.search_papers
+    except Exception as e:
+        st.info(f"Vector search unavailable ({e}); using full-text search only")
+        vector_search = None
+    
+    def fetch_papers(ids):
+        return _supabase.table('papers').select('*').in_('id', ids).execute().data or []
+    
+    # Every session shares this retriever, so its pool is sized for concurrent searches
+    return HybridRetriever(PaperSearch(_supabase).search, vector_search, hydrate=fetch_papers,
+                           max_concurrent=int(os.getenv('SEARCH_CONCURRENCY', '8')))
+
+def search_papers(supabase, query, limit=5, filters=None):
+    """Hybrid search: full-text and vector results fused by rank, filtered in the database"""
+    try:
+        with tracer.span('answer.search') as span:
+            search = init_retriever(supabase).search(query, limit, filters=filters)
+            span.add(rows=len(search['results']))
+        # Drop vector hits whose rows are gone from the database
+        papers = [paper for paper in search['results'] if 'abstract' in paper]
+        return papers, search['timings']
     except Exception as e:
         st.error(f"Search error: {e}")
-        return []
+        return [], {}
 
 def generate_answer(papers, question):
     """Generate answer from found papers"""
@@ -69,9 +101,9 @@ def main():
         st.stop()
     
     # Check database connection
+    stats = init_stats(supabase)
     try:
-        result = supabase.table('papers').select('id').limit(1).execute()
-        paper_count = len(supabase.table('papers').select('id').execute().data or [])
+        paper_count = stats.get()['total_papers']
         st.success(f"✅ Connected! Database has {paper_count} papers")
     except Exception as e:
         st.error(f"❌ Database connection failed: {e}")
@@ -86,6 +118,23 @@ def main():
         height=100
     )
     
+    with st.expander("🎯 Filters"):
+        try:
+            corpus_stats = stats.get()
+        except Exception:
+            corpus_stats = {}
+        # Slider spans the corpus (and at least up to this year); its ends mean "no bound"
+        years = [int(year) for year in corpus_stats.get('papers_by_year', {})]
+        first_year = min(years + [1990])
+        last_year = max(years + [datetime.now().year])
+        year_min, year_max = st.slider("Publication year", first_year, last_year, (first_year, last_year))
+        journals = st.multiselect("Journals", list(corpus_stats.get('papers_by_journal', {})))
+    filters = SearchFilters.coerce({
+        'year_min': year_min if year_min > first_year else None,
+        'year_max': year_max if year_max < last_year else None,
+        'journals': journals
+    })
+    
     if st.button("🔍 Search Research Literature", type="primary"):
         if question.strip():
             with st.spinner("🧠 Searching research papers..."):
@@ -94,10 +143,11 @@ def main():
                 search_query = " ".join([term for term in search_terms if len(term) > 3])[:50]
                 
                 # Search papers
-                papers = search_papers(supabase, search_query)
+                papers, timings = search_papers(supabase, search_query, filters=filters)
                 
                 # Generate answer
-                answer = generate_answer(papers, question)
+                with tracer.span('answer.generate', rows=len(papers)):
+                    answer = generate_answer(papers, question)
                 
                 # Display results
                 st.markdown("---")
@@ -112,8 +162,10 @@ def main():
                             st.write(f"**Authors:** {paper['authors']}")
                             st.write(f"**Journal:** {paper['journal']} ({paper['year']})")
                             st.write(f"**PMID:** {paper.get('pmid', 'N/A')}")
-                            if paper['abstract']:
+                            if paper.get('abstract'):
                                 st.write(f"**Abstract:** {paper['abstract']}")
+                    
+                    st.caption(" · ".join(f"{leg.replace('_ms', '')}: {ms:.0f} ms" for leg, ms in timings.items()))
         else:
             st.warning("Please enter a research question!")
     
@@ -121,11 +173,8 @@ def main():
     with st.sidebar:
         st.header("📊 Database Stats")
         try:
-            total_papers = len(supabase.table('papers').select('id').execute().data or [])
-            recent_papers = len(supabase.table('papers').select('id').gte('year', 2020).execute().data or [])
-            
-            st.metric("Total Papers", total_papers)
-            st.metric("Recent Papers (2020+)", recent_papers)
+            st.metric("Total Papers", stats.get()['total_papers'])
+            st.metric("Recent Papers (2020+)", stats.recent(2020))
         except:
             st.write("Stats unavailable")
         
@@ -140,6 +189,8 @@ def main():
         for q in example_questions:
             if st.button(f"💭 {q}", key=f"example_{q[:20]}"):
                 st.session_state.question = q
+        
+        render_debug_panel(tracer)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,2 @@
+# Benchmarks for the research AI system
+# Run from the repo root, e.g. `python -m benchmarks.bench_embedding_batch`
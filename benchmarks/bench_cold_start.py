@@ -0,0 +1,117 @@
+# Cold-start cost of research_system: wall time, peak RSS and heavy modules loaded
+#
+#   python -m benchmarks.bench_cold_start
+#   python -m benchmarks.bench_cold_start --ref HEAD~1   # compare with an older revision
+#
+# Each scenario runs in a fresh interpreter. --ref checks the revision out
+# into a temporary git worktree and runs the same scenarios there.
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import subprocess
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ['torch', 'sentence_transformers', 'weaviate', 'supabase', 'pandas', 'aiohttp']
+
+# Scenario -> code run after the timer starts
+SCENARIOS = {
+    'import': "import research_system",
+    'setup guide (CLI)': "import research_system; research_system.main([])",
+    'vector store init': (
+        "import research_system\n"
+        "from benchmarks.fakes import FakeWeaviateClient\n"
+        "research_system.WeaviateVectorStorage(client=FakeWeaviateClient(), embedding_cache=False)"
+    ),
+    'first query encode': (
+        "import research_system\n"
+        "from benchmarks.fakes import FakeWeaviateClient\n"
+        "storage = research_system.WeaviateVectorStorage(client=FakeWeaviateClient(), embedding_cache=False)\n"
+        "storage.encode_texts(['CRISPR base editing'])"
+    ),
+}
+
+PROBE = """
+import io, sys, time, json, resource, contextlib
+start = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    exec(compile({code!r}, 'scenario', 'exec'))
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    'seconds': elapsed,
+    'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'heavy_modules': [m for m in {heavy!r} if m in sys.modules]
+}}))
+"""
+
+
+def run_scenario(code: str, cwd: str) -> dict:
+    probe = PROBE.format(code=code, heavy=HEAVY_MODULES)
+    out = subprocess.run([sys.executable, '-c', probe], cwd=cwd, capture_output=True, text=True,
+                         env=dict(os.environ, PYTHONPATH=cwd))
+    if out.returncode != 0:
+        return {'error': out.stderr.strip().splitlines()[-1] if out.stderr.strip() else 'failed'}
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def run_all(cwd: str, repeats: int) -> dict:
+    results = {}
+    for name, code in SCENARIOS.items():
+        runs = [run_scenario(code, cwd) for _ in range(repeats)]
+        ok = [r for r in runs if 'error' not in r]
+        if not ok:
+            results[name] = runs[0]
+            continue
+        results[name] = {
+            'seconds': min(r['seconds'] for r in ok),
+            'peak_rss_mb': min(r['peak_rss_mb'] for r in ok),
+            'heavy_modules': ok[0]['heavy_modules']
+        }
+    return results
+
+
+def print_results(label: str, results: dict):
+    print(f"\n{label}")
+    print(f"{'scenario':>20} {'seconds':>8} {'peak MB':>8}  heavy modules loaded")
+    for name, result in results.items():
+        if 'error' in result:
+            print(f"{name:>20} {'-':>8} {'-':>8}  error: {result['error']}")
+        else:
+            print(f"{name:>20} {result['seconds']:8.2f} {result['peak_rss_mb']:8.0f}  "
+                  f"{', '.join(result['heavy_modules']) or '-'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="research_system cold-start benchmark")
+    parser.add_argument('--repeats', type=int, default=3, help="best of N fresh interpreters")
+    parser.add_argument('--ref', help="also measure this git revision")
+    parser.add_argument('--json', help="write results to this file")
+    args = parser.parse_args()
+
+    results = {'working tree': run_all(REPO_ROOT, args.repeats)}
+    if args.ref:
+        with tempfile.TemporaryDirectory() as tmp:
+            worktree = os.path.join(tmp, 'ref')
+            subprocess.run(['git', 'worktree', 'add', '--detach', worktree, args.ref],
+                           cwd=REPO_ROOT, check=True, capture_output=True)
+            try:
+                # Scenarios use the current benchmark helpers
+                shutil.copytree(os.path.join(REPO_ROOT, 'benchmarks'), os.path.join(worktree, 'benchmarks'),
+                                dirs_exist_ok=True)
+                results[args.ref] = run_all(worktree, args.repeats)
+            finally:
+                subprocess.run(['git', 'worktree', 'remove', '--force', worktree], cwd=REPO_ROOT)
+
+    for label, result in results.items():
+        print_results(label, result)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'measured_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'results': results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# Ingest throughput of WeaviateVectorStorage.add_papers at different batch sizes
+#
+#   python -m benchmarks.bench_embedding_batch --papers 512 --batch-sizes 1 32 128
+import argparse
+import time
+
+from benchmarks.corpus import synthetic_papers
+from benchmarks.fakes import FakeWeaviateClient
+
+
+def run(num_papers: int, batch_sizes, chunk_size: int = 256):
+    from sentence_transformers import SentenceTransformer
+    from research_system import FreeCloudConfig, WeaviateVectorStorage
+
+    encoder = SentenceTransformer(FreeCloudConfig.EMBEDDING_MODEL)
+    papers = synthetic_papers(num_papers)
+
+    # Warm up the model so the first run doesn't pay for lazy initialisation
+    encoder.encode(["warm up"] * 4)
+
+    results = {}
+    for batch_size in batch_sizes:
+        client = FakeWeaviateClient()
+        # Disable the embedding cache so every run really encodes
+        storage = WeaviateVectorStorage(client=client, encoder=encoder, batch_size=batch_size,
+                                        embedding_cache=False)
+
+        start = time.perf_counter()
+        # Chunk the stream the way process_papers_for_ai feeds add_papers
+        for i in range(0, len(papers), chunk_size):
+            storage.add_papers(papers[i:i + chunk_size])
+        elapsed = time.perf_counter() - start
+
+        assert client.count(storage.class_name) == len(papers)
+        results[batch_size] = len(papers) / elapsed
+        print(f"batch_size={batch_size:>4}  {elapsed:8.2f}s  {results[batch_size]:8.1f} papers/sec")
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding batch size benchmark")
+    parser.add_argument('--papers', type=int, default=512)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 32, 128])
+    parser.add_argument('--chunk-size', type=int, default=256)
+    args = parser.parse_args()
+
+    print(f"🧪 Embedding {args.papers} synthetic papers against a fake vector store")
+    run(args.papers, args.batch_sizes, args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# Encoder backends: float32 PyTorch vs ONNX (float32 / int8 quantized) on CPU
+#
+#   python -m benchmarks.bench_encoder_backends --papers 256 --threads 4
+#   python -m benchmarks.bench_encoder_backends --check-only   # equivalence check, exits 1 on failure
+#
+# Before timing, each ONNX backend must reproduce the PyTorch embeddings:
+# every synthetic paper's cosine similarity to its float32 embedding has to
+# reach --min-cosine.
+import sys
+import time
+import argparse
+
+import numpy as np
+
+from benchmarks.corpus import synthetic_papers
+
+BACKENDS = ['torch', 'onnx', 'onnx-int8']
+QUERIES = ["CRISPR base editing efficiency", "protein folding stability", "mRNA vaccine delivery in vivo"]
+
+
+def doc_texts(num_papers: int):
+    from research_system import VectorStorage
+    return [VectorStorage.build_doc_text(paper) for paper in synthetic_papers(num_papers)]
+
+
+def encode(encoder, texts, batch_size: int) -> np.ndarray:
+    return np.asarray(encoder.encode(texts, batch_size=batch_size, convert_to_numpy=True,
+                                     normalize_embeddings=True, show_progress_bar=False), dtype=np.float32)
+
+
+def check_equivalence(reference: np.ndarray, candidate: np.ndarray, min_cosine: float):
+    """Row-wise cosine similarity to the float32 reference (inputs are normalized)"""
+    cosines = np.sum(reference * candidate, axis=1)
+    return bool(cosines.min() >= min_cosine), float(cosines.min()), float(cosines.mean())
+
+
+def run(num_papers: int, batch_size: int, threads: int, min_cosine: float, check_only: bool) -> bool:
+    from encoders import get_encoder
+    from research_system import FreeCloudConfig
+
+    texts = doc_texts(num_papers)
+    encoders = {}
+    for backend in BACKENDS:
+        start = time.perf_counter()
+        encoders[backend] = get_encoder(FreeCloudConfig.EMBEDDING_MODEL, backend, threads, FreeCloudConfig.ONNX_MODEL_DIR)
+        print(f"⚙️  {backend:>9} loaded in {time.perf_counter() - start:.1f}s")
+
+    reference = encode(encoders['torch'], texts, batch_size)
+    passed = True
+    print(f"\nEquivalence vs float32 PyTorch (min cosine >= {min_cosine})")
+    for backend in BACKENDS[1:]:
+        ok, worst, mean = check_equivalence(reference, encode(encoders[backend], texts, batch_size), min_cosine)
+        passed &= ok
+        print(f"{backend:>9}  min {worst:.4f}  mean {mean:.4f}  {'✅' if ok else '❌'}")
+    if check_only:
+        return passed
+
+    print(f"\n{'backend':>9} {'papers/sec':>11} {'query p50 ms':>13} {'query p95 ms':>13}")
+    for backend, encoder in encoders.items():
+        encode(encoder, texts[:batch_size], batch_size)  # warm up
+        start = time.perf_counter()
+        encode(encoder, texts, batch_size)
+        throughput = len(texts) / (time.perf_counter() - start)
+
+        latencies = []
+        for _ in range(10):
+            for query in QUERIES:
+                start = time.perf_counter()
+                encode(encoder, [query], 1)
+                latencies.append((time.perf_counter() - start) * 1000)
+        p50, p95 = np.percentile(latencies, [50, 95])
+        print(f"{backend:>9} {throughput:11.1f} {p50:13.1f} {p95:13.1f}")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Encoder backend benchmark and equivalence check")
+    parser.add_argument('--papers', type=int, default=256)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--threads', type=int, default=0, help="intra-op threads (0 = library default)")
+    parser.add_argument('--min-cosine', type=float, default=0.99)
+    parser.add_argument('--check-only', action='store_true')
+    args = parser.parse_args()
+
+    passed = run(args.papers, args.batch_size, args.threads, args.min_cosine, args.check_only)
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+# Paper text search against a local Postgres: ilike scans vs the tsvector/GIN RPC
+#
+#   python -m benchmarks.bench_fts --dsn postgresql://postgres@localhost/postgres --papers 1000000
+#
+# Everything is created in a throwaway schema (default: fts_bench) so the
+# migration SQL runs unmodified; pass --keep to reuse the table next time.
+# Needs psycopg2 (pip install psycopg2-binary), which the app itself doesn't use.
+import io
+import os
+import time
+import argparse
+
+import numpy as np
+import psycopg2
+
+from benchmarks.corpus import synthetic_papers
+
+MIGRATION = os.path.join(os.path.dirname(__file__), '..', 'migrations', '002_paper_search.sql')
+
+COLUMNS = ('id', 'pmid', 'doi', 'title', 'abstract', 'authors', 'journal', 'year', 'keywords', 'source', 'processed')
+
+QUERIES = ["CRISPR", "protein", "gene therapy", "off-target delivery", "base editing mouse", "stability"]
+
+SCHEMA_SQL = """
+CREATE TABLE papers (
+    id SERIAL PRIMARY KEY,
+    pmid VARCHAR(20) UNIQUE,
+    doi VARCHAR(200),
+    title TEXT,
+    abstract TEXT,
+    authors TEXT,
+    journal VARCHAR(500),
+    year INTEGER,
+    keywords TEXT,
+    source VARCHAR(50),
+    created_at TIMESTAMP DEFAULT NOW(),
+    processed BOOLEAN DEFAULT FALSE
+);
+"""
+
+
+def _copy_value(value) -> str:
+    if value is None:
+        return '\\N'
+    return str(value).replace('\\', '\\\\').replace('\t', ' ').replace('\n', ' ')
+
+
+def load_papers(cur, num_papers: int, chunk_size: int = 50000):
+    """COPY synthetic papers in chunks so memory stays flat"""
+    for start in range(0, num_papers, chunk_size):
+        size = min(chunk_size, num_papers - start)
+        buffer = io.StringIO()
+        for paper in synthetic_papers(size, seed=start):
+            paper['id'] += start
+            paper['pmid'] = str(30000000 + paper['id'])
+            buffer.write('\t'.join(_copy_value(paper[c]) for c in COLUMNS) + '\n')
+        buffer.seek(0)
+        cur.copy_expert(f"COPY papers ({', '.join(COLUMNS)}) FROM STDIN", buffer)
+        print(f"  loaded {start + size:,} rows", end='\r')
+    print()
+
+
+def ilike_search(cur, query: str, limit: int):
+    """The old app.py search: title ilike, then abstract ilike"""
+    cur.execute("SELECT * FROM papers WHERE title ILIKE %s LIMIT %s", (f'%{query}%', limit))
+    rows = cur.fetchall()
+    if not rows:
+        cur.execute("SELECT * FROM papers WHERE abstract ILIKE %s LIMIT %s", (f'%{query}%', limit))
+        rows = cur.fetchall()
+    return rows
+
+
+def ilike_ranked_search(cur, query: str, limit: int):
+    """What a ranked ilike search costs: every match has to be found before ordering"""
+    cur.execute(
+        "SELECT *, (title ILIKE %s)::int * 2 + (abstract ILIKE %s)::int AS score FROM papers "
+        "WHERE title ILIKE %s OR abstract ILIKE %s ORDER BY score DESC, id LIMIT %s",
+        (f'%{query}%',) * 4 + (limit,)
+    )
+    return cur.fetchall()
+
+
+def fts_search(cur, query: str, limit: int):
+    cur.execute("SELECT * FROM search_papers(%s, %s)", (query, limit))
+    return cur.fetchall()
+
+
+def measure(fn, cur, query: str, limit: int, repeats: int):
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        rows = fn(cur, query, limit)
+        latencies.append(time.perf_counter() - start)
+    latencies = np.asarray(latencies) * 1000
+    return float(np.percentile(latencies, 50)), float(np.percentile(latencies, 95)), len(rows)
+
+
+def run(dsn: str, num_papers: int, schema: str, limit: int, repeats: int, keep: bool):
+    conn = psycopg2.connect(dsn)
+    conn.autocommit = True
+    cur = conn.cursor()
+    cur.execute(f"CREATE SCHEMA IF NOT EXISTS {schema}")
+    cur.execute(f"SET search_path TO {schema}, public")
+
+    cur.execute("SELECT to_regclass('papers') IS NOT NULL")
+    if cur.fetchone()[0]:
+        cur.execute("SELECT count(*) FROM papers")
+        existing = cur.fetchone()[0]
+    else:
+        existing = None
+    if existing != num_papers:
+        print(f"🏗️  Building {num_papers:,}-row papers table in schema {schema}")
+        cur.execute("DROP TABLE IF EXISTS papers CASCADE")
+        cur.execute(SCHEMA_SQL)
+        start = time.perf_counter()
+        load_papers(cur, num_papers)
+        print(f"  load: {time.perf_counter() - start:.0f}s")
+
+    start = time.perf_counter()
+    with open(MIGRATION) as f:
+        # The grant targets Supabase roles that a local server may not have
+        sql = f.read().split('grant execute')[0]
+    cur.execute(sql)
+    cur.execute("ANALYZE papers")
+    print(f"🔧 Migration (tsvector column + GIN index): {time.perf_counter() - start:.0f}s")
+
+    print(f"{'query':>22} {'ilike p50':>10} {'ranked ilike p50':>17} {'fts p50':>8} {'fts p95':>8} {'fts hits':>9}")
+    totals = {'ilike': 0.0, 'ranked': 0.0, 'fts': 0.0}
+    for query in QUERIES:
+        ilike_p50, _, _ = measure(ilike_search, cur, query, limit, repeats)
+        ranked_p50, _, _ = measure(ilike_ranked_search, cur, query, limit, repeats)
+        fts_p50, fts_p95, hits = measure(fts_search, cur, query, limit, repeats)
+        totals['ilike'] += ilike_p50
+        totals['ranked'] += ranked_p50
+        totals['fts'] += fts_p50
+        print(f"{query:>22} {ilike_p50:10.1f} {ranked_p50:17.1f} {fts_p50:8.1f} {fts_p95:8.1f} {hits:9}")
+    print(f"total p50: ilike {totals['ilike']:.0f} ms, ranked ilike {totals['ranked']:.0f} ms, "
+          f"fts {totals['fts']:.0f} ms")
+
+    if not keep:
+        cur.execute(f"DROP SCHEMA {schema} CASCADE")
+    conn.close()
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Postgres full-text search benchmark")
+    parser.add_argument('--dsn', default=os.getenv('BENCH_PG_DSN', 'postgresql://postgres@localhost/postgres'))
+    parser.add_argument('--papers', type=int, default=1000000)
+    parser.add_argument('--schema', default='fts_bench')
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--keep', action='store_true', help="keep the table for the next run")
+    args = parser.parse_args()
+    run(args.dsn, args.papers, args.schema, args.limit, args.repeats, args.keep)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# Serial vs concurrent PubMed harvesting against a local E-utilities stub
+#
+#   python -m benchmarks.bench_pubmed_harvest --queries 6 --papers 400
+import argparse
+import time
+
+from benchmarks.pubmed_stub import PubMedStubServer
+from pubmed_harvester import AsyncPubMedHarvester
+
+
+def run(num_queries: int, papers_per_query: int, latency: float, rate: float, batch_size: int):
+    queries = [f"synthetic query {i}" for i in range(num_queries)]
+    results = {}
+
+    with PubMedStubServer(latency_seconds=latency) as stub:
+        for mode, concurrent in (('serial', False), ('concurrent', True)):
+            harvester = AsyncPubMedHarvester(
+                email='bench@example.org', base_url=stub.url,
+                efetch_batch_size=batch_size, requests_per_second=rate
+            )
+            start = time.perf_counter()
+            harvested = harvester.harvest_sync(queries, papers_per_query, concurrent=concurrent)
+            elapsed = time.perf_counter() - start
+
+            total = sum(len(papers) for papers in harvested.values())
+            assert total == num_queries * papers_per_query
+            results[mode] = elapsed
+            print(f"{mode:>10}: {elapsed:6.2f}s  {total / elapsed:8.1f} papers/sec  "
+                  f"{harvester.request_count} requests")
+
+    print(f"speedup: {results['serial'] / results['concurrent']:.1f}x")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PubMed harvest benchmark")
+    parser.add_argument('--queries', type=int, default=6)
+    parser.add_argument('--papers', type=int, default=400, help='papers per query')
+    parser.add_argument('--latency', type=float, default=0.2, help='simulated seconds per request')
+    parser.add_argument('--rate', type=float, default=10, help='requests/sec (10 = NCBI limit with an API key)')
+    parser.add_argument('--batch-size', type=int, default=100, help='PMIDs per efetch call')
+    args = parser.parse_args()
+
+    run(args.queries, args.papers, args.latency, args.rate, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# test.py search: full-table substring scan vs the inverted index
+#
+#   python -m benchmarks.bench_search_index --papers 100000
+import time
+import argparse
+
+from benchmarks.corpus import synthetic_papers
+from search_index import InvertedIndex
+
+QUERIES = ["CRISPR", "protein", "gene therapy", "bioengineering", "synthetic biology", "off-target delivery"]
+MODES = ["Smart Search", "Title Only", "Abstract Only"]
+
+
+def scan_search(query, papers, search_mode):
+    """The original advanced_search from test.py"""
+    results = []
+    query_lower = query.lower()
+    for paper in papers:
+        score = 0
+        title = paper.get('title', '').lower()
+        abstract = paper.get('abstract', '').lower()
+        if search_mode == "Title Only":
+            if query_lower in title:
+                score = 1.0
+        elif search_mode == "Abstract Only":
+            if query_lower in abstract:
+                score = 0.8
+        else:
+            if query_lower in title:
+                score += 1.0
+            if query_lower in abstract:
+                score += 0.5
+            if paper.get('year', 0) >= 2023:
+                score += 0.2
+        if score > 0:
+            paper['relevance_score'] = score
+            results.append(paper)
+    return sorted(results, key=lambda x: x['relevance_score'], reverse=True)
+
+
+def _render(results):
+    results.mean_year()
+    results.count_above(0.8)
+    results.top(10)
+    return results
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def run(num_papers: int):
+    papers = synthetic_papers(num_papers, abstract_sentences=6)
+    index, build_ms = timed(InvertedIndex, papers)
+    print(f"🏗️  Built index over {num_papers} papers in {build_ms / 1000:.1f}s (once per corpus)")
+    print(f"{'mode':>14} {'query':>20} {'scan ms':>9} {'index ms':>9} {'hits':>7}")
+
+    totals = {'scan': 0.0, 'index': 0.0}
+    for mode in MODES:
+        for query in QUERIES:
+            _, scan_ms = timed(scan_search, query, papers, mode)
+            # What test.py renders: count, summary stats and the top 10
+            hits, index_ms = timed(lambda: _render(index.search(query, mode)))
+            totals['scan'] += scan_ms
+            totals['index'] += index_ms
+            print(f"{mode:>14} {query:>20} {scan_ms:9.1f} {index_ms:9.1f} {len(hits):7}")
+
+    # The Search Analytics tab only needs counts
+    _, count_ms = timed(lambda: [index.count(q) for q in QUERIES[:5]])
+    print(f"Search Analytics tab (5 counts): {count_ms:.1f} ms with the index")
+    print(f"total: scan {totals['scan']:.0f} ms, index {totals['index']:.0f} ms "
+          f"({totals['scan'] / max(totals['index'], 1e-9):.1f}x)")
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inverted index benchmark")
+    parser.add_argument('--papers', type=int, default=100000)
+    args = parser.parse_args()
+    run(args.papers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# Recall@10 and latency of the local IVF index vs brute-force exact search,
+# and of float16 / int8 compact storage vs float32
+#
+#   python -m benchmarks.bench_vector_index --papers 100000 --nprobe 1 4 8 16 32
+#   python -m benchmarks.bench_vector_index --papers 100000 --dtypes float32 float16 int8 --nprobe 8
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+from benchmarks.vectors import clustered_vectors, query_vectors, recall_at_k, percentiles_ms
+from vector_index import IVFIndex
+
+
+def build_index(path: str, ids, vectors, dtype: str, chunk: int) -> IVFIndex:
+    index = IVFIndex(path, vectors.shape[1], dtype=dtype)
+    start = time.perf_counter()
+    # Incremental inserts, the way add_papers feeds the index
+    for i in range(0, len(ids), chunk):
+        index.add(ids[i:i + chunk], vectors[i:i + chunk])
+    index.save()
+    print(f"🏗️  [{dtype}] Indexed {len(ids)} x {vectors.shape[1]} vectors in {time.perf_counter() - start:.1f}s "
+          f"({len(index.centroids)} lists, {index.bytes_per_vector} bytes/paper on the search path)")
+    return index
+
+
+def run(num_papers: int, dim: int, num_queries: int, nprobes, dtypes=('float32',), k: int = 10, chunk: int = 1000):
+    vectors = clustered_vectors(num_papers, dim)
+    queries = query_vectors(vectors, num_queries)
+    ids = np.arange(1, num_papers + 1)
+
+    results = {}
+    exact = None
+    for dtype in dtypes:
+        with tempfile.TemporaryDirectory() as tmp:
+            index = build_index(tmp, ids, vectors, dtype, chunk)
+            # Ground truth is always float32 brute force
+            if exact is None:
+                exact = [index.exact_search(query, k)[0] for query in queries]
+
+            # Brute force over the (compact) search representation
+            searches = [('scan', lambda q: index._top_k(None, q, k)[0])]
+            searches += [(f"nprobe={nprobe}", lambda q, nprobe=nprobe: index.search(q, k, nprobe=nprobe)[0])
+                         for nprobe in nprobes]
+            for name, search in searches:
+                recalls, latencies = [], []
+                for query, truth in zip(queries, exact):
+                    start = time.perf_counter()
+                    found = search(query)
+                    latencies.append(time.perf_counter() - start)
+                    recalls.append(recall_at_k(found, truth))
+                p50, p99 = percentiles_ms(latencies)
+                recall = float(np.mean(recalls))
+                results[f"{dtype} {name}"] = {
+                    'recall': recall, 'p50_ms': p50, 'p99_ms': p99, 'bytes_per_paper': index.bytes_per_vector
+                }
+                print(f"{dtype:>8} {name:>10}: recall@{k} {recall:.3f}  p50 {p50:7.2f} ms  p99 {p99:7.2f} ms  "
+                      f"{index.bytes_per_vector:5d} B/paper")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local vector index benchmark")
+    parser.add_argument('--papers', type=int, default=100000)
+    parser.add_argument('--dim', type=int, default=768)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[1, 4, 8, 16, 32])
+    parser.add_argument('--dtypes', nargs='+', default=['float32'], choices=['float32', 'float16', 'int8'])
+    args = parser.parse_args()
+
+    run(args.papers, args.dim, args.queries, args.nprobe, args.dtypes)
+
+
+if __name__ == "__main__":
+    main()
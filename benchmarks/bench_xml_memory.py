@@ -0,0 +1,90 @@
+# Peak memory of parsing a large efetch file: whole-tree vs streaming parser
+#
+#   python -m benchmarks.bench_xml_memory --articles 5000 20000
+#
+# Each measurement runs in a fresh interpreter so peak RSS isn't shared.
+import os
+import sys
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+
+from benchmarks.corpus import synthetic_papers
+from benchmarks.pubmed_stub import article_xml
+
+
+def write_efetch_file(path: str, num_articles: int, chunk: int = 1000):
+    """Write a synthetic efetch response without holding it in memory"""
+    with open(path, 'w') as f:
+        f.write('<?xml version="1.0" ?><PubmedArticleSet>')
+        for start in range(0, num_articles, chunk):
+            for paper in synthetic_papers(min(chunk, num_articles - start), seed=start):
+                paper['pmid'] = str(40000000 + start + paper['id'])
+                f.write(article_xml(paper))
+        f.write('</PubmedArticleSet>')
+
+
+def measure(mode: str, path: str, chunk_size: int):
+    """Parse the file and feed chunked upserts into a sink that drops them"""
+    import xml.etree.ElementTree as ET
+    from pubmed_parser import iter_pubmed_articles, parse_article
+
+    def sink(chunk):
+        pass
+
+    start = time.perf_counter()
+    count = 0
+    if mode == 'tree':
+        # Old behaviour: parse everything, then upsert
+        papers = [parse_article(a) for a in ET.parse(path).getroot().iter('PubmedArticle')]
+        for i in range(0, len(papers), chunk_size):
+            sink(papers[i:i + chunk_size])
+        count = len(papers)
+    else:
+        pending = []
+        for paper in iter_pubmed_articles(path):
+            pending.append(paper)
+            count += 1
+            if len(pending) >= chunk_size:
+                sink(pending)
+                pending = []
+        sink(pending)
+    elapsed = time.perf_counter() - start
+
+    # ru_maxrss is KiB on Linux
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{count} {elapsed:.3f} {peak_mb:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PubMed XML parser memory benchmark")
+    parser.add_argument('--articles', type=int, nargs='+', default=[5000, 20000])
+    parser.add_argument('--chunk-size', type=int, default=500)
+    parser.add_argument('--measure', nargs=2, metavar=('MODE', 'FILE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(args.measure[0], args.measure[1], args.chunk_size)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for num_articles in args.articles:
+            path = os.path.join(tmp, f"efetch_{num_articles}.xml")
+            write_efetch_file(path, num_articles)
+            size_mb = os.path.getsize(path) / 1024 / 1024
+            print(f"📄 {num_articles} articles ({size_mb:.0f} MB)")
+
+            for mode in ('tree', 'stream'):
+                out = subprocess.run(
+                    [sys.executable, '-m', 'benchmarks.bench_xml_memory',
+                     '--chunk-size', str(args.chunk_size), '--measure', mode, path],
+                    check=True, capture_output=True, text=True
+                ).stdout.split()
+                count, elapsed, peak_mb = int(out[0]), float(out[1]), float(out[2])
+                print(f"   {mode:>6}: {count} papers  {elapsed:6.2f}s  peak RSS {peak_mb:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
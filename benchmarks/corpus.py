@@ -0,0 +1,66 @@
+# Synthetic research paper corpora for benchmarks
+import random
+import itertools
+from typing import Dict, List
+
+TOPICS = [
+    "CRISPR", "Cas9", "gene therapy", "protein engineering", "synthetic biology",
+    "bioengineering", "stem cells", "tissue engineering", "antibody design",
+    "mRNA vaccines", "base editing", "prime editing", "directed evolution",
+    "metabolic engineering", "organoids", "single-cell sequencing"
+]
+
+WORDS = [
+    "efficiency", "delivery", "expression", "off-target", "vector", "cell",
+    "in vivo", "in vitro", "mouse", "human", "model", "therapy", "clinical",
+    "variant", "screening", "library", "genome", "protein", "folding",
+    "binding", "affinity", "stability", "yield", "pathway", "regulation",
+    "knockout", "promoter", "plasmid", "assay", "response", "dose", "tumor"
+]
+
+JOURNALS = [
+    "Nature", "Science", "Cell", "Nature Biotechnology", "Nature Methods",
+    "Nucleic Acids Research", "PLOS ONE", "eLife", "Cell Reports",
+    "Molecular Therapy", "ACS Synthetic Biology", "Bioinformatics"
+]
+
+
+# Long tail of rarer terms so term frequencies look roughly Zipfian
+_SYLLABLES = ["ge", "no", "pro", "te", "in", "ase", "cy", "to", "ki", "ne", "lo", "mer", "tra", "ns", "gly", "co"]
+_rare_rng = random.Random(7)
+RARE_WORDS = sorted({"".join(_rare_rng.choice(_SYLLABLES) for _ in range(_rare_rng.randint(2, 4))) for _ in range(6000)})
+# Pre-drawn Zipf sample; picking from it is much cheaper than weighted choices()
+_RARE_POOL = _rare_rng.choices(
+    RARE_WORDS, cum_weights=list(itertools.accumulate(1 / rank for rank in range(1, len(RARE_WORDS) + 1))), k=1 << 18
+)
+
+
+def _sentence(rng: random.Random, length: int) -> str:
+    # Roughly a third common domain words, the rest from the long tail
+    words = [rng.choice(WORDS) for _ in range(length // 3)]
+    words += [_RARE_POOL[rng.getrandbits(18)] for _ in range(length - len(words))]
+    rng.shuffle(words)
+    if rng.random() < 0.3:
+        words.insert(rng.randrange(len(words)), rng.choice(TOPICS))
+    return " ".join(words).capitalize() + "."
+
+
+def synthetic_papers(n: int, seed: int = 42, abstract_sentences: int = 8) -> List[Dict]:
+    """Generate n paper rows shaped like the Supabase papers table"""
+    rng = random.Random(seed)
+    papers = []
+    for i in range(1, n + 1):
+        papers.append({
+            'id': i,
+            'pmid': str(30000000 + i),
+            'doi': f"10.1000/synthetic.{i}",
+            'title': _sentence(rng, 10)[:-1],
+            'abstract': " ".join(_sentence(rng, 18) for _ in range(abstract_sentences)),
+            'authors': ", ".join(f"Author{rng.randrange(5000)} {chr(65 + rng.randrange(26))}" for _ in range(4)),
+            'journal': rng.choice(JOURNALS),
+            'year': rng.randint(2015, 2024),
+            'keywords': ", ".join(rng.sample(TOPICS, 3)),
+            'source': 'pubmed',
+            'processed': False
+        })
+    return papers
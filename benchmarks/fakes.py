@@ -0,0 +1,100 @@
+# Local stand-ins for cloud services used by the benchmarks
+from typing import Dict
+
+
+class FakeWeaviateBatch:
+    """Mimics the weaviate v3 batch context manager"""
+
+    def __init__(self, client):
+        self.client = client
+        self.batch_size = None
+        self.pending = []
+
+    def configure(self, batch_size=None, **kwargs):
+        self.batch_size = batch_size
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+
+    def add_data_object(self, data_object: Dict, class_name: str, uuid=None, vector=None):
+        self.pending.append((class_name, uuid, data_object, vector))
+        if self.batch_size and len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def delete_objects(self, class_name: str, where: Dict, **kwargs) -> Dict:
+        self.flush()
+        objects = self.client.objects.get(class_name, {})
+        doomed = [key for key, (data_object, _) in objects.items() if _where_matches(where, data_object)]
+        for key in doomed:
+            del objects[key]
+        self.client.deletes += 1
+        return {'results': {'matches': len(doomed), 'successful': len(doomed), 'failed': 0}}
+
+    def flush(self):
+        for class_name, uuid, data_object, vector in self.pending:
+            objects = self.client.objects.setdefault(class_name, {})
+            key = uuid or len(objects)
+            objects[key] = (data_object, list(vector) if vector is not None else None)
+        self.client.flushes += 1 if self.pending else 0
+        self.pending = []
+
+
+def _where_matches(where: Dict, data_object: Dict) -> bool:
+    """Evaluate the And/Or/Equal/comparison subset of Weaviate where filters"""
+    operator = where['operator']
+    if operator in ('And', 'Or'):
+        results = (_where_matches(operand, data_object) for operand in where['operands'])
+        return all(results) if operator == 'And' else any(results)
+    value = data_object.get(where['path'][0])
+    arg = next(v for k, v in where.items() if k.startswith('value'))
+    if operator == 'Equal':
+        return value == arg
+    if operator == 'GreaterThan':
+        return value is not None and value > arg
+    if operator == 'GreaterThanEqual':
+        return value is not None and value >= arg
+    if operator == 'LessThanEqual':
+        return value is not None and value <= arg
+    raise ValueError(f"unsupported operator {operator}")
+
+
+class FakeWeaviateProperties:
+    def __init__(self, schema: 'FakeWeaviateSchema'):
+        self.schema = schema
+
+    def create(self, class_name: str, prop: Dict):
+        self.schema.classes[class_name].setdefault('properties', []).append(prop)
+
+
+class FakeWeaviateSchema:
+    def __init__(self):
+        self.classes = {}
+        self.property = FakeWeaviateProperties(self)
+
+    def exists(self, class_name: str) -> bool:
+        return class_name in self.classes
+
+    def get(self, class_name: str) -> Dict:
+        return self.classes[class_name]
+
+    def create_class(self, schema: Dict):
+        self.classes[schema['class']] = schema
+
+
+class FakeWeaviateClient:
+    """In-memory vector store exposing the subset of weaviate.Client we use"""
+
+    def __init__(self):
+        self.schema = FakeWeaviateSchema()
+        self.objects = {}
+        self.flushes = 0
+        self.deletes = 0
+        self.batch = FakeWeaviateBatch(self)
+
+    def count(self, class_name: str) -> int:
+        return len(self.objects.get(class_name, {}))
+
@@ -0,0 +1,309 @@
+# End-to-end benchmark suite against local stand-ins for Supabase and Weaviate
+#
+#   python -m benchmarks.harness --papers 1000 10000 100000 --output results.json
+#   python -m benchmarks.harness --papers 10000 --output new.json --baseline results.json
+#
+# Every scenario runs the real application code: SupabaseStorage over an
+# in-process PostgREST stub, FreeResearchAI with an in-memory vector store,
+# and test.py's CorpusLoader over the stub served on a local HTTP port.
+# Scenarios per corpus size:
+#   ingest     bulk upsert (with dedup) throughput
+#   index      StreamingIndexer draining the backlog, as `research_system.py index` does
+#   search     answer_research_question latency, per-stage breakdown
+#   dashboard  corpus load, search index, analytics and stats build time
+#   sync       catch-up sync, then an incremental sync after editing and
+#              deleting --change-rate of the corpus (should scale with changes)
+#   memory     peak RSS after each size (sizes run smallest first)
+# --encoder hash (default) embeds with feature hashing, so runs are fast and
+# reproducible; --encoder model uses the configured SciBERT backend.
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import resource
+import subprocess
+import tempfile
+
+import numpy as np
+
+from benchmarks.corpus import TOPICS, WORDS, synthetic_papers
+from benchmarks.postgrest_stub import FakeSupabaseClient, PaperTable, PostgRESTStubServer
+
+# Columns test.py loads for its dashboards
+DASHBOARD_COLUMNS = 'id,pmid,title,abstract,authors,journal,year,created_at'
+
+# Lower is better unless listed here
+HIGHER_IS_BETTER = ('papers_per_sec',)
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip()
+    except OSError:
+        return ''
+
+
+def percentiles(latencies) -> dict:
+    p50, p95, p99 = np.percentile(np.asarray(latencies) * 1000, [50, 95, 99])
+    return {'p50_ms': float(p50), 'p95_ms': float(p95), 'p99_ms': float(p99)}
+
+
+def make_queries(num_queries: int, seed: int = 3):
+    rng = random.Random(seed)
+    return [f"{rng.choice(TOPICS)} {rng.choice(WORDS)} {rng.choice(WORDS)}" for _ in range(num_queries)]
+
+
+def build_system(client, encoder: str, dim: int, work_dir: str):
+    from research_system import FreeCloudConfig, FreeResearchAI, SupabaseStorage
+    from benchmarks.memory_store import HashEncoder, InMemoryVectorStorage
+
+    # A fresh dedup index per run, so earlier runs can't flag these papers
+    FreeCloudConfig.DEDUP_DIR = os.path.join(work_dir, 'dedup')
+    vector_storage = InMemoryVectorStorage(encoder=HashEncoder(dim) if encoder == 'hash' else None)
+    return FreeResearchAI(paper_storage=SupabaseStorage(client=client), vector_storage=vector_storage)
+
+
+def bench_ingest(research_ai, papers, chunk_size: int) -> dict:
+    start = time.perf_counter()
+    stored = duplicates = 0
+    # Chunked the way collect_papers_from_pubmed feeds upsert_papers
+    for i in range(0, len(papers), chunk_size):
+        report = research_ai.paper_storage.upsert_papers(papers[i:i + chunk_size])
+        stored += report['succeeded']
+        duplicates += len(report['duplicates'])
+    upsert_seconds = time.perf_counter() - start
+
+    return {
+        'stored': stored,
+        'duplicates': duplicates,
+        'upsert_seconds': upsert_seconds,
+        'upsert_papers_per_sec': stored / upsert_seconds if upsert_seconds else 0.0
+    }
+
+
+def bench_index(research_ai, work_dir: str, page_size: int) -> dict:
+    from research_system import StreamingIndexer
+
+    # The CLI's pipelined fetch/encode/write path, not a hand-rolled loop
+    indexer = StreamingIndexer(research_ai, page_size=page_size,
+                               checkpoint_path=os.path.join(work_dir, 'indexer.json'))
+    start = time.perf_counter()
+    progress = indexer.run(resume=False)
+    seconds = time.perf_counter() - start
+    return {
+        'indexed': progress['indexed'],
+        'remaining': research_ai.paper_storage.count_unprocessed(),
+        'index_seconds': seconds,
+        'index_papers_per_sec': progress['indexed'] / seconds if seconds else 0.0
+    }
+
+
+def bench_search(research_ai, queries, max_papers: int) -> dict:
+    from tracing import shared_tracer
+
+    # Warm up: the first query builds the stub's full-text index
+    research_ai.answer_research_question(queries[0], max_papers)
+
+    tracer = shared_tracer()
+    enabled = tracer.enabled
+    tracer.enabled = True
+    tracer.reset()
+    latencies = []
+    try:
+        for query in queries:
+            # Cold path every time: no answer cache hits
+            research_ai.answer_cache.clear()
+            start = time.perf_counter()
+            research_ai.answer_research_question(query, max_papers)
+            latencies.append(time.perf_counter() - start)
+        stages = {stage: {k: stats[k] for k in ('count', 'p50_ms', 'p95_ms', 'rows', 'round_trips')}
+                  for stage, stats in tracer.snapshot().items() if stage.startswith('answer')}
+    finally:
+        tracer.enabled = enabled
+    return dict(percentiles(latencies), queries=len(queries), stages=stages)
+
+
+def bench_dashboard(table: PaperTable, client) -> dict:
+    from analytics import CorpusAnalytics
+    from corpus_loader import CorpusLoader
+    from paper_stats import PaperStats
+    from search_index import InvertedIndex
+
+    timings = {}
+    with PostgRESTStubServer(table) as server:
+        loader = CorpusLoader(server.url, 'benchmark-key', columns=DASHBOARD_COLUMNS)
+        start = time.perf_counter()
+        papers = loader.load_all()
+        timings['corpus_load_seconds'] = time.perf_counter() - start
+        timings['corpus_load_requests'] = server.requests
+
+    start = time.perf_counter()
+    index = InvertedIndex()
+    index.sync(papers)
+    timings['search_index_seconds'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    analytics = CorpusAnalytics()
+    analytics.sync(papers)
+    analytics.snapshot()
+    timings['analytics_seconds'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    PaperStats(client).get()
+    timings['stats_seconds'] = time.perf_counter() - start
+
+    timings['build_seconds'] = sum(v for k, v in timings.items() if k.endswith('_seconds'))
+    return timings
+
+
+def bench_sync(research_ai, client, work_dir: str, change_rate: float, batch_size: int, seed: int) -> dict:
+    from research_system import VectorSync
+
+    table = client.papers
+    sync = VectorSync(research_ai, batch_size=batch_size, checkpoint_path=os.path.join(work_dir, 'sync.json'))
+
+    # First run reads the change stream once and finds everything indexed
+    start = time.perf_counter()
+    catchup = sync.run()
+    catchup_seconds = time.perf_counter() - start
+
+    # Correct some abstracts and delete a few papers, as curators would
+    rng = random.Random(seed)
+    ids = sorted(table.rows)
+    num_changes = max(1, int(len(ids) * change_rate))
+    edited = rng.sample(ids, num_changes)
+    deleted = rng.sample(sorted(set(ids) - set(edited)), max(1, num_changes // 2))
+    for pid in edited:
+        abstract = table.rows[pid].get('abstract') or ''
+        client.table('papers').update({'abstract': abstract + ' (corrected)'}).eq('id', pid).execute()
+    client.table('papers').delete().in_('id', deleted).execute()
+
+    round_trips = table.round_trips + table.deletions.round_trips
+    start = time.perf_counter()
+    summary = sync.run()
+    seconds = time.perf_counter() - start
+    return {
+        'catchup_seconds': catchup_seconds,
+        'catchup_reindexed': catchup['reindexed'],
+        'changes': num_changes + len(deleted),
+        'reindexed': summary['reindexed'],
+        'deleted': summary['deleted'],
+        'sync_seconds': seconds,
+        'sync_round_trips': table.round_trips + table.deletions.round_trips - round_trips
+    }
+
+
+def run_size(num_papers: int, args) -> dict:
+    papers = synthetic_papers(num_papers, seed=args.seed)
+    for paper in papers:
+        # Rows arrive from the harvester without database-assigned fields
+        del paper['id']
+    table = PaperTable()
+    client = FakeSupabaseClient(table, latency_seconds=args.latency_ms / 1000)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        research_ai = build_system(client, args.encoder, args.dim, work_dir)
+        result = {'ingest': bench_ingest(research_ai, papers, args.chunk_size)}
+        result['index'] = bench_index(research_ai, work_dir, args.page_size)
+        del papers
+        result['search'] = bench_search(research_ai, make_queries(args.queries, args.seed), args.max_papers)
+        result['dashboard'] = bench_dashboard(table, client)
+        result['sync'] = bench_sync(research_ai, client, work_dir, args.change_rate, args.page_size, args.seed)
+    result['memory'] = {'peak_rss_mb': peak_rss_mb()}
+    return result
+
+
+def flatten(results: dict, prefix: str = '') -> dict:
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        elif isinstance(value, (int, float)):
+            flat[name] = value
+    return flat
+
+
+def compare(current: dict, baseline: dict, threshold: float):
+    """Print metrics that moved more than threshold (a fraction) vs the baseline run"""
+    now, before = flatten(current['results']), flatten(baseline['results'])
+    print(f"\nvs baseline {baseline['meta'].get('commit') or '?'} (changes over {threshold:.0%}):")
+    regressions = 0
+    for name in sorted(set(now) & set(before)):
+        if not before[name] or '.stages.' in name:
+            continue
+        change = (now[name] - before[name]) / abs(before[name])
+        if abs(change) < threshold or not name.split('.')[-1].endswith(('_ms', '_seconds', '_per_sec', '_mb')):
+            continue
+        worse = change < 0 if name.endswith(HIGHER_IS_BETTER) else change > 0
+        regressions += worse
+        print(f"{'❌' if worse else '✅'} {name}: {before[name]:.3f} -> {now[name]:.3f} ({change:+.1%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end benchmarks against local Supabase/Weaviate stand-ins")
+    parser.add_argument('--papers', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--max-papers', type=int, default=5)
+    parser.add_argument('--encoder', choices=['hash', 'model'], default='hash')
+    parser.add_argument('--dim', type=int, default=256, help="hash encoder dimension")
+    parser.add_argument('--chunk-size', type=int, default=500, help="papers per upsert")
+    parser.add_argument('--page-size', type=int, default=100, help="papers per indexing page")
+    parser.add_argument('--change-rate', type=float, default=0.01, help="fraction of papers edited before the sync run")
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="simulated round trip per request")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="write results as JSON")
+    parser.add_argument('--baseline', help="JSON from an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=0.1, help="relative change worth reporting")
+    args = parser.parse_args()
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'args': vars(args)
+        },
+        'results': {}
+    }
+    for num_papers in sorted(args.papers):
+        print(f"🧪 {num_papers} papers")
+        result = report['results'][str(num_papers)] = run_size(num_papers, args)
+        ingest, index, search = result['ingest'], result['index'], result['search']
+        dashboard, sync = result['dashboard'], result['sync']
+        print(f"   ingest    {ingest['upsert_papers_per_sec']:9.0f} papers/sec upserted ({ingest['duplicates']} duplicates)")
+        print(f"   index     {index['index_papers_per_sec']:9.0f} papers/sec indexed "
+              f"({index['indexed']} papers, {index['remaining']} left)")
+        print(f"   search    p50 {search['p50_ms']:.1f} ms  p95 {search['p95_ms']:.1f} ms  p99 {search['p99_ms']:.1f} ms")
+        print(f"   dashboard {dashboard['build_seconds']:.2f}s "
+              f"(load {dashboard['corpus_load_seconds']:.2f}s in {dashboard['corpus_load_requests']} requests)")
+        print(f"   sync      {sync['sync_seconds']:.2f}s for {sync['changes']} changes "
+              f"({sync['reindexed']} re-indexed, {sync['deleted']} deleted, {sync['sync_round_trips']} requests; "
+              f"catch-up {sync['catchup_seconds']:.2f}s)")
+        print(f"   memory    peak RSS {result['memory']['peak_rss_mb']:.0f} MB")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+# In-memory vector store and a model-free encoder for benchmarks
+# InMemoryVectorStorage stands in for Weaviate with exact (brute-force) search
+# over a growable float32 matrix; HashEncoder embeds text as hashed bags of
+# words, so ingest and search paths can be timed without loading SciBERT.
+import zlib
+import re
+from typing import Dict, List
+
+import numpy as np
+
+from research_system import VectorStorage
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+class HashEncoder:
+    """Deterministic feature-hashing encoder exposing the SentenceTransformer methods we use"""
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self._buckets = {}  # token -> (bucket, sign)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def _bucket(self, token: str):
+        bucket = self._buckets.get(token)
+        if bucket is None:
+            h = zlib.crc32(token.encode('utf-8'))
+            bucket = self._buckets[token] = (h % self.dim, 1.0 if h & 0x80000000 else -1.0)
+        return bucket
+
+    def encode(self, texts, batch_size: int = 32, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = False, show_progress_bar: bool = False, **kwargs) -> np.ndarray:
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        embeddings = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in TOKEN_RE.findall(text.lower()):
+                bucket, sign = self._bucket(token)
+                embeddings[row, bucket] += sign
+        if normalize_embeddings:
+            embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        return embeddings[0] if single else embeddings
+
+
+class _Matrix:
+    """Growable id -> (vector, properties) store with exact cosine search
+
+    Deleted ids leave dead rows that searches skip.
+    """
+
+    def __init__(self, dim: int):
+        self.vectors = np.zeros((1024, dim), dtype=np.float32)
+        self.live = np.zeros(1024, dtype=bool)
+        self.ids: List = []
+        self.rows: Dict = {}
+        self.properties: List[Dict] = []
+
+    def __len__(self):
+        return len(self.rows)
+
+    def put(self, ids, embeddings: np.ndarray, properties: List[Dict]):
+        for key, vector, props in zip(ids, embeddings, properties):
+            row = self.rows.get(key)
+            if row is None:
+                row = self.rows[key] = len(self.ids)
+                self.ids.append(key)
+                self.properties.append(props)
+                if row >= len(self.vectors):
+                    grown = np.zeros((len(self.vectors) * 2, self.vectors.shape[1]), dtype=np.float32)
+                    grown[:row] = self.vectors[:row]
+                    self.vectors = grown
+                    self.live = np.concatenate([self.live, np.zeros(len(self.live), dtype=bool)])
+            self.properties[row] = props
+            self.vectors[row] = vector
+            self.live[row] = True
+
+    def delete(self, keys):
+        for key in keys:
+            row = self.rows.pop(key, None)
+            if row is not None:
+                self.live[row] = False
+
+    def search(self, query: np.ndarray, limit: int, filters=None):
+        rows = np.flatnonzero(self.live[:len(self.ids)])
+        if filters:
+            rows = np.asarray([row for row in rows if filters.matches(self.properties[row])], dtype=np.int64)
+        if not len(rows):
+            return []
+        scores = self.vectors[rows] @ query
+        limit = min(limit, len(rows))
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top])]
+        return [(self.properties[rows[i]], float(1 - scores[i])) for i in top]
+
+
+class InMemoryVectorStorage(VectorStorage):
+    """Vector store held in process memory, searched exactly"""
+
+    backend_name = 'In-memory (benchmark)'
+
+    def __init__(self, encoder=None, batch_size: int = None, embedding_cache=False, chunker=None):
+        super().__init__(encoder, batch_size, embedding_cache, chunker)
+        self._papers = None
+        self._passages = None
+
+    @property
+    def papers(self) -> _Matrix:
+        if self._papers is None:
+            self._papers = _Matrix(self.embedding_dim)
+        return self._papers
+
+    @property
+    def passages(self) -> _Matrix:
+        if self._passages is None:
+            self._passages = _Matrix(self.embedding_dim)
+        return self._passages
+
+    def write_papers(self, papers: List[Dict], embeddings: np.ndarray):
+        self.papers.put([paper['id'] for paper in papers], embeddings,
+                        [self.paper_properties(paper) for paper in papers])
+
+    def write_passages(self, passages: List[Dict], embeddings: np.ndarray):
+        self.passages.put([(p['paper_id'], p['chunk_index']) for p in passages], embeddings, passages)
+
+    def delete_papers(self, paper_ids: List[int]):
+        self.papers.delete(paper_ids)
+
+    def delete_passages(self, paper_ids: List[int], from_chunk: Dict[int, int] = None):
+        keys = []
+        for pid in paper_ids:
+            chunk_index = (from_chunk or {}).get(pid, 0)
+            while (pid, chunk_index) in self.passages.rows:
+                keys.append((pid, chunk_index))
+                chunk_index += 1
+        self.passages.delete(keys)
+
+    def search_by_vector(self, query_embedding: np.ndarray, limit: int = 10, filters=None) -> List[Dict]:
+        return [self.format_hit(props, distance)
+                for props, distance in self.papers.search(query_embedding, limit, filters)]
+
+    def search_passages_by_vector(self, query_embedding: np.ndarray, limit: int = 10, filters=None) -> List[Dict]:
+        return [self.format_passage_hit(props, distance)
+                for props, distance in self.passages.search(query_embedding, limit, filters)]
@@ -0,0 +1,483 @@
+# Local stand-in for Supabase's PostgREST API
+# PaperTable keeps the papers table in memory. FakeSupabaseClient exposes the
+# subset of the supabase-py query builder the app uses (select/eq/gt/gte/in_/
+# ilike/order/limit, update, upsert, delete and the paper_stats / search_papers
+# RPCs), with the change tracking of migrations/004_change_tracking.sql;
+# PostgRESTStubServer serves the same table over HTTP with Range pagination
+# and Content-Range counts, for CorpusLoader in test.py.
+import re
+import json
+import time
+import bisect
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, List
+from urllib.parse import urlparse, parse_qs
+
+from search_index import InvertedIndex
+
+EPOCH = datetime(2024, 1, 1)
+
+# Edits to these columns give a row a new change_seq (see migration 004)
+CONTENT_COLUMNS = ('title', 'abstract', 'authors', 'keywords', 'journal', 'year', 'source', 'doi')
+
+
+def _coerce(value, arg):
+    # Filters arriving over HTTP are strings; compare them as the column's type
+    if isinstance(value, bool):
+        return value, str(arg).lower() == 'true' if isinstance(arg, str) else bool(arg)
+    if isinstance(value, (int, float)) and isinstance(arg, str):
+        return value, type(value)(arg)
+    return value, arg
+
+
+def matches(value, op: str, arg) -> bool:
+    if value is None:
+        return False
+    if op == 'in':
+        return any(matches(value, 'eq', a) for a in arg)
+    if op == 'ilike':
+        return _like_regex(arg).search(str(value)) is not None
+    value, arg = _coerce(value, arg)
+    if op == 'eq':
+        return value == arg
+    if op == 'gt':
+        return value > arg
+    if op == 'gte':
+        return value >= arg
+    if op == 'lt':
+        return value < arg
+    if op == 'lte':
+        return value <= arg
+    raise FakeAPIError(f"unsupported operator {op}", code='PGRST100')
+
+
+def _like_regex(pattern: str):
+    return re.compile('^' + '.*'.join(re.escape(part) for part in pattern.split('%')) + '$', re.IGNORECASE | re.DOTALL)
+
+
+class FakeAPIError(Exception):
+    """Mimics postgrest.APIError, which carries the PostgREST/Postgres error code"""
+
+    def __init__(self, message: str, code: str):
+        super().__init__(message)
+        self.code = code
+
+
+class FakeResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+def _timestamp(n: int) -> str:
+    return (EPOCH + timedelta(microseconds=n)).isoformat()
+
+
+class DeletionLog:
+    """In-memory paper_deletions table, appended to in seq order"""
+
+    def __init__(self):
+        self.rows: List[Dict] = []
+        self.seqs: List[int] = []
+        self.round_trips = 0
+
+    def append(self, paper_id: int):
+        seq = len(self.rows) + 1
+        self.rows.append({'seq': seq, 'paper_id': paper_id, 'deleted_at': _timestamp(seq)})
+        self.seqs.append(seq)
+
+    def select(self, filters: List, order=None, offset: int = 0, limit: int = None, count: bool = True):
+        rows = self.rows
+        for column, op, arg in filters:
+            if column == 'seq' and op in ('gt', 'gte'):
+                # seq is the primary key: start the scan past the watermark
+                start = (bisect.bisect_right if op == 'gt' else bisect.bisect_left)(self.seqs, int(arg))
+                rows = self.rows[start:]
+        rows = [row for row in rows if all(matches(row.get(c), op, arg) for c, op, arg in filters)]
+        if order and order != ('seq', False):
+            column, descending = order
+            rows.sort(key=lambda row: row.get(column), reverse=descending)
+        end = None if limit is None else offset + limit
+        return rows[offset:end], len(rows) if count else None
+
+
+class PaperTable:
+    """In-memory papers table: serial ids, unique pmid, created_at set on insert
+
+    Inserts and content edits take a new change_seq (clearing processed), and
+    deletes are logged to a DeletionLog, like migration 004's triggers;
+    change_tracking=False behaves like a database without that migration.
+    """
+
+    def __init__(self, papers: List[Dict] = None, change_tracking: bool = True):
+        self.change_tracking = change_tracking
+        self.rows: Dict[int, Dict] = {}  # insertion (= id) order
+        self.row_list: List[Dict] = []
+        self.by_pmid: Dict[str, int] = {}
+        self.next_id = 1
+        self.change_seq = 0
+        self.changes: List[tuple] = []  # (change_seq, id) in change order; superseded entries are skipped
+        self.deletions = DeletionLog()
+        self.round_trips = 0
+        self.lock = threading.Lock()
+        # Stands in for the GIN full-text index behind search_papers
+        self.text_index = InvertedIndex()
+        if papers:
+            self.upsert(papers)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def upsert(self, rows: List[Dict], on_conflict: str = 'pmid') -> List[Dict]:
+        stored = []
+        with self.lock:
+            for row in rows:
+                row = {k: v for k, v in row.items() if k not in ('id', 'created_at')}
+                existing = self.by_pmid.get(row.get(on_conflict)) if row.get(on_conflict) is not None else None
+                if existing is not None:
+                    # Updated in place, so the text index keeps pointing at the row
+                    self._update_row(self.rows[existing], row)
+                    stored.append(dict(self.rows[existing]))
+                    continue
+                row_id = self.next_id
+                self.next_id += 1
+                row.update(id=row_id, created_at=_timestamp(row_id))
+                row.setdefault('processed', False)
+                self._record_change(row)
+                self.rows[row_id] = row
+                self.row_list.append(row)
+                if row.get('pmid') is not None:
+                    self.by_pmid[row['pmid']] = row_id
+                stored.append(dict(row))
+        return stored
+
+    def _record_change(self, row: Dict):
+        if not self.change_tracking:
+            return
+        self.change_seq += 1
+        row.update(change_seq=self.change_seq, updated_at=_timestamp(self.change_seq))
+        self.changes.append((self.change_seq, row['id']))
+
+    def _update_row(self, row: Dict, values: Dict):
+        changed = any(column in values and values[column] != row.get(column) for column in CONTENT_COLUMNS)
+        row.update(values)
+        if changed and self.change_tracking:
+            row['processed'] = False
+            self._record_change(row)
+
+    def _changed_since(self, first_seq: int):
+        start = bisect.bisect_left(self.changes, (first_seq,))
+        for seq, row_id in self.changes[start:]:
+            row = self.rows.get(row_id)
+            if row is not None and row['change_seq'] == seq:
+                yield row
+
+    def _candidates(self, filters: List):
+        """(rows to test, column they come out ordered by), narrowed by id or
+        change_seq filters the way an index would"""
+        for column, op, arg in filters:
+            if column == 'id' and op in ('eq', 'in'):
+                ids = [arg] if op == 'eq' else arg
+                return [self.rows[i] for i in sorted({int(i) for i in ids}) if int(i) in self.rows], 'id'
+            if column == 'id' and op in ('gt', 'gte'):
+                first = int(arg) + (op == 'gt')
+                return (self.rows[i] for i in range(max(first, 1), self.next_id) if i in self.rows), 'id'
+            if column == 'change_seq' and op in ('gt', 'gte'):
+                return self._changed_since(int(arg) + (op == 'gt')), 'change_seq'
+        return list(self.rows.values()), 'id'
+
+    def select(self, filters: List, order=None, offset: int = 0, limit: int = None, count: bool = True):
+        """(window of matching rows, number matching or None if count is False)"""
+        with self.lock:
+            if not filters and order in (None, ('id', False)):
+                end = None if limit is None else offset + limit
+                return self.row_list[offset:end], len(self.row_list) if count else None
+            candidates, ordered_by = self._candidates(filters)
+            rows = (row for row in candidates if all(matches(row.get(c), op, arg) for c, op, arg in filters))
+            if not count and limit is not None and order in (None, (ordered_by, False)):
+                # Rows come out in the requested order, so stop once the window is filled
+                window = []
+                for row in rows:
+                    if len(window) == offset + limit:
+                        break
+                    window.append(row)
+                return window[offset:], None
+            rows = list(rows)
+        if order:
+            column, descending = order
+            rows.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=descending)
+        end = None if limit is None else offset + limit
+        return rows[offset:end], len(rows)
+
+    def update(self, values: Dict, filters: List) -> List[Dict]:
+        rows, _ = self.select(filters, count=False)
+        with self.lock:
+            for row in rows:
+                self._update_row(row, values)
+        return [dict(row) for row in rows]
+
+    def delete(self, filters: List) -> List[Dict]:
+        rows, _ = self.select(filters, count=False)
+        with self.lock:
+            gone = {row['id'] for row in rows}
+            for row in rows:
+                del self.rows[row['id']]
+                self.by_pmid.pop(row.get('pmid'), None)
+                if self.change_tracking:
+                    self.deletions.append(row['id'])
+            if gone:
+                self.row_list = [row for row in self.row_list if row['id'] not in gone]
+                # The append-only text index can't drop documents; rebuild on next search
+                self.text_index = InvertedIndex()
+        return [dict(row) for row in rows]
+
+    def paper_stats(self, top_journals: int = 20) -> Dict:
+        with self.lock:
+            rows = list(self.rows.values())
+        years = Counter(row['year'] for row in rows if row.get('year'))
+        journals = Counter(row['journal'] for row in rows if row.get('journal'))
+        return {
+            'total_papers': len(rows),
+            'processed_papers': sum(1 for row in rows if row.get('processed')),
+            'unique_journals': len(journals),
+            'papers_by_year': {str(year): n for year, n in years.items()},
+            'papers_by_journal': dict(journals.most_common(top_journals))
+        }
+
+    def search_papers(self, search_query: str, max_results: int = 10, year_min: int = None, year_max: int = None,
+                      journals: List[str] = None, sources: List[str] = None) -> List[Dict]:
+        from search_filters import SearchFilters
+
+        filters = SearchFilters(year_min, year_max, journals, sources)
+        with self.lock:
+            self.text_index.sync(self.row_list)
+        hits = []
+        for paper in self.text_index.search(search_query):
+            if len(hits) == max_results:
+                break
+            if filters.matches(paper):
+                paper['rank'] = paper.pop('relevance_score')
+                hits.append(paper)
+        return hits
+
+
+def project(rows: List[Dict], columns: str) -> List[Dict]:
+    if columns.strip() == '*':
+        return [dict(row) for row in rows]
+    names = [c.strip() for c in columns.split(',')]
+    return [{name: row.get(name) for name in names} for row in rows]
+
+
+class FakeQuery:
+    """One chained request against a PaperTable, run by execute()"""
+
+    def __init__(self, table: PaperTable, action: str, columns: str = '*', count: str = None, payload=None,
+                 on_conflict: str = 'pmid', latency_seconds: float = 0.0):
+        self.table = table
+        self.action = action
+        self.columns = columns
+        self.count = count
+        self.payload = payload
+        self.on_conflict = on_conflict
+        self.latency_seconds = latency_seconds
+        self.filters = []
+        self.order_by = None
+        self.limit_rows = None
+        self.offset = 0
+
+    def _filter(self, column: str, op: str, arg):
+        self.filters.append((column, op, arg))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, 'eq', value)
+
+    def gt(self, column, value):
+        return self._filter(column, 'gt', value)
+
+    def gte(self, column, value):
+        return self._filter(column, 'gte', value)
+
+    def lt(self, column, value):
+        return self._filter(column, 'lt', value)
+
+    def lte(self, column, value):
+        return self._filter(column, 'lte', value)
+
+    def in_(self, column, values):
+        return self._filter(column, 'in', list(values))
+
+    def ilike(self, column, pattern):
+        return self._filter(column, 'ilike', pattern)
+
+    def order(self, column, desc: bool = False):
+        self.order_by = (column, desc)
+        return self
+
+    def limit(self, size: int):
+        self.limit_rows = size
+        return self
+
+    def range(self, start: int, end: int):
+        self.offset, self.limit_rows = start, end - start + 1
+        return self
+
+    def execute(self) -> FakeResponse:
+        self.table.round_trips += 1
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        if not getattr(self.table, 'change_tracking', True):
+            referenced = [c.strip() for c in self.columns.split(',')] + [column for column, _, _ in self.filters]
+            if 'change_seq' in referenced or 'updated_at' in referenced:
+                raise FakeAPIError("column papers.change_seq does not exist", code='42703')
+        if self.action == 'upsert':
+            return FakeResponse(self.table.upsert(self.payload, self.on_conflict))
+        if self.action == 'update':
+            return FakeResponse(self.table.update(self.payload, self.filters))
+        if self.action == 'delete':
+            return FakeResponse(self.table.delete(self.filters))
+        rows, total = self.table.select(self.filters, self.order_by, self.offset, self.limit_rows,
+                                        count=bool(self.count))
+        return FakeResponse(project(rows, self.columns), total)
+
+
+class FakeTableRef:
+    def __init__(self, client: 'FakeSupabaseClient', table):
+        self.client = client
+        self.table = table
+
+    def _query(self, action: str, **kwargs) -> FakeQuery:
+        return FakeQuery(self.table, action, latency_seconds=self.client.latency_seconds, **kwargs)
+
+    def select(self, columns: str = '*', count: str = None) -> FakeQuery:
+        return self._query('select', columns=columns, count=count)
+
+    def update(self, values: Dict) -> FakeQuery:
+        return self._query('update', payload=values)
+
+    def upsert(self, rows, on_conflict: str = 'pmid') -> FakeQuery:
+        return self._query('upsert', payload=list(rows) if isinstance(rows, list) else [rows], on_conflict=on_conflict)
+
+    def delete(self) -> FakeQuery:
+        return self._query('delete')
+
+
+class FakeRPC:
+    def __init__(self, client: 'FakeSupabaseClient', name: str, params: Dict):
+        self.client = client
+        self.name = name
+        self.params = params or {}
+
+    def execute(self) -> FakeResponse:
+        table = self.client.papers
+        table.round_trips += 1
+        if self.client.latency_seconds:
+            time.sleep(self.client.latency_seconds)
+        if not self.client.rpc_enabled or self.name not in ('paper_stats', 'search_papers'):
+            raise FakeAPIError(f"Could not find the function public.{self.name}", code='PGRST202')
+        return FakeResponse(getattr(table, self.name)(**self.params))
+
+
+class FakeSupabaseClient:
+    """Drop-in for supabase.Client over a PaperTable
+
+    latency_seconds adds a simulated network round trip to every request;
+    rpc_enabled=False behaves like a database without the migrations applied.
+    """
+
+    def __init__(self, papers: PaperTable = None, latency_seconds: float = 0.0, rpc_enabled: bool = True):
+        self.papers = papers if papers is not None else PaperTable()
+        self.latency_seconds = latency_seconds
+        self.rpc_enabled = rpc_enabled
+
+    def table(self, name: str) -> FakeTableRef:
+        tables = {'papers': self.papers}
+        if self.papers.change_tracking:
+            tables['paper_deletions'] = self.papers.deletions
+        if name not in tables:
+            raise FakeAPIError(f"relation public.{name} does not exist", code='42P01')
+        return FakeTableRef(self, tables[name])
+
+    def rpc(self, name: str, params: Dict = None) -> FakeRPC:
+        return FakeRPC(self, name, params)
+
+
+def parse_filter(column: str, expression: str):
+    """PostgREST query-string filter, e.g. created_at=gte.2024-01-01 or id=in.(1,2)"""
+    op, _, arg = expression.partition('.')
+    if op == 'in':
+        return column, op, arg.strip('()').split(',')
+    if op == 'like':
+        op = 'ilike'
+    if op == 'ilike':
+        arg = arg.replace('*', '%')
+    return column, op, arg
+
+
+class PostgRESTStubServer:
+    """Threaded HTTP server answering GET /rest/v1/papers like PostgREST
+
+    Honors select, order, filters, Range headers and Prefer: count=exact;
+    max_rows caps rows per response like PostgREST's db-max-rows setting.
+    """
+
+    def __init__(self, papers: PaperTable, latency_seconds: float = 0.0, max_rows: int = 1000):
+        self.papers = papers
+        self.latency_seconds = latency_seconds
+        self.max_rows = max_rows
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                stub.requests += 1
+                if stub.latency_seconds:
+                    time.sleep(stub.latency_seconds)
+                url = urlparse(self.path)
+                if url.path != '/rest/v1/papers':
+                    self.send_error(404)
+                    return
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                columns = params.pop('select', '*')
+                order = None
+                if 'order' in params:
+                    column, _, direction = params.pop('order').partition('.')
+                    order = (column, direction == 'desc')
+                filters = [parse_filter(column, expression) for column, expression in params.items()]
+
+                start, end = 0, None
+                if self.headers.get('Range'):
+                    first, _, last = self.headers['Range'].partition('-')
+                    start, end = int(first), int(last) if last else None
+                limit = stub.max_rows if end is None else min(end - start + 1, stub.max_rows)
+                counted = 'count=exact' in self.headers.get('Prefer', '')
+                rows, total = stub.papers.select(filters, order, start, limit, count=counted)
+
+                body = json.dumps(project(rows, columns), default=str).encode('utf-8')
+                last_row = f"{start}-{start + len(rows) - 1}" if rows else '*'
+                self.send_response(206 if counted or end is not None else 200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Range', f"{last_row}/{total if counted else '*'}")
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.server.shutdown()
+        self.server.server_close()
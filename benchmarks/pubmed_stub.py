@@ -0,0 +1,96 @@
+# Local stub of the NCBI E-utilities endpoints that replays canned XML
+import time
+import zlib
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from xml.sax.saxutils import escape
+
+from benchmarks.corpus import synthetic_papers
+
+
+def esearch_xml(pmids) -> bytes:
+    ids = ''.join(f"<Id>{pmid}</Id>" for pmid in pmids)
+    return (f'<?xml version="1.0" ?><eSearchResult><Count>{len(pmids)}</Count>'
+            f'<RetMax>{len(pmids)}</RetMax><IdList>{ids}</IdList></eSearchResult>').encode()
+
+
+def article_xml(paper) -> str:
+    authors = ''.join(
+        f"<Author><LastName>{escape(name.split()[0])}</LastName><Initials>{escape(name.split()[-1])}</Initials></Author>"
+        for name in paper['authors'].split(', ')
+    )
+    keywords = ''.join(f"<Keyword>{escape(k)}</Keyword>" for k in paper['keywords'].split(', '))
+    return (
+        f"<PubmedArticle><MedlineCitation><PMID>{paper['pmid']}</PMID><Article>"
+        f"<Journal><JournalIssue><PubDate><Year>{paper['year']}</Year></PubDate></JournalIssue>"
+        f"<Title>{escape(paper['journal'])}</Title></Journal>"
+        f"<ArticleTitle>{escape(paper['title'])}</ArticleTitle>"
+        f"<Abstract><AbstractText>{escape(paper['abstract'])}</AbstractText></Abstract>"
+        f"<AuthorList>{authors}</AuthorList></Article>"
+        f"<KeywordList>{keywords}</KeywordList></MedlineCitation>"
+        f"<PubmedData><ArticleIdList><ArticleId IdType=\"doi\">{escape(paper['doi'])}</ArticleId>"
+        f"</ArticleIdList></PubmedData></PubmedArticle>"
+    )
+
+
+def efetch_xml(pmids) -> bytes:
+    papers = synthetic_papers(len(pmids), seed=zlib.crc32(','.join(pmids).encode()))
+    for paper, pmid in zip(papers, pmids):
+        paper['pmid'] = pmid
+    body = ''.join(article_xml(paper) for paper in papers)
+    return f'<?xml version="1.0" ?><PubmedArticleSet>{body}</PubmedArticleSet>'.encode()
+
+
+class PubMedStubServer:
+    """Threaded HTTP server answering esearch/efetch with synthetic data
+
+    latency_seconds simulates the network round trip of the real service.
+    """
+
+    def __init__(self, latency_seconds: float = 0.05):
+        self.latency_seconds = latency_seconds
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests += 1
+                url = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                time.sleep(stub.latency_seconds)
+
+                if url.path.endswith('esearch.fcgi'):
+                    # Deterministic PMIDs per search term
+                    base = 10000000 + zlib.crc32(params.get('term', '').encode()) % 20000000
+                    body = esearch_xml([str(base + i) for i in range(int(params.get('retmax', 20)))])
+                elif url.path.endswith('efetch.fcgi'):
+                    body = efetch_xml(params.get('id', '').split(','))
+                else:
+                    self.send_error(404)
+                    return
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/xml')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,29 @@
+# Synthetic embedding sets for vector index benchmarks
+import numpy as np
+
+
+def clustered_vectors(n: int, dim: int = 768, clusters: int = 200, noise: float = 1.5, seed: int = 0) -> np.ndarray:
+    """L2-normalized float32 vectors drawn around random topic centres"""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centres[rng.integers(0, clusters, n)] + noise * rng.standard_normal((n, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def query_vectors(base: np.ndarray, n: int, noise: float = 0.3, seed: int = 1) -> np.ndarray:
+    """Queries near (but not equal to) existing vectors"""
+    rng = np.random.default_rng(seed)
+    dim = base.shape[1]
+    queries = base[rng.integers(0, len(base), n)] + noise * rng.standard_normal((n, dim)).astype(np.float32) / np.sqrt(dim)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return queries.astype(np.float32)
+
+
+def recall_at_k(approx_ids, exact_ids) -> float:
+    return len(set(approx_ids) & set(exact_ids)) / max(len(exact_ids), 1)
+
+
+def percentiles_ms(latencies):
+    latencies = np.asarray(latencies) * 1000
+    return float(np.percentile(latencies, 50)), float(np.percentile(latencies, 99))
@@ -0,0 +1,101 @@
+# Bulk upserts into Supabase tables
+# Rows are split into chunks bounded by row count and JSON payload size, and
+# the chunks are sent concurrently over a small pool. Each chunk is retried
+# with backoff on its own, so one bad request doesn't lose the whole batch.
+
+import json
+import time
+import random
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+# Postgres error classes a retry can't fix: cardinality violations (an
+# upsert touching one row twice), data exceptions, integrity violations and
+# syntax/undefined-object errors
+PERMANENT_ERROR_CLASSES = ('21', '22', '23', '42')
+
+
+def is_permanent_error(error: Exception) -> bool:
+    code = str(getattr(error, 'code', '') or '')
+    return code[:2] in PERMANENT_ERROR_CLASSES or code.startswith('PGRST')
+
+
+class BulkUpserter:
+    """Chunked, concurrent, retrying upsert into one table"""
+
+    def __init__(self, client, table: str = 'papers', on_conflict: str = 'pmid',
+                 max_rows: int = 500, max_bytes: int = 2_000_000, max_workers: int = 4,
+                 max_retries: int = 3, backoff_seconds: float = 0.5):
+        self.client = client
+        self.table = table
+        self.on_conflict = on_conflict
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+
+    def chunk(self, rows: List[Dict]) -> List[List[Dict]]:
+        """Split rows so no chunk exceeds max_rows or (roughly) max_bytes of JSON"""
+        return [chunk for chunk, _ in self._chunk_with_sizes(rows)]
+
+    def _chunk_with_sizes(self, rows: List[Dict]):
+        chunks, current, size = [], [], 2  # the enclosing []
+        for row in rows:
+            row_size = len(json.dumps(row, default=str).encode('utf-8')) + 1
+            if current and (len(current) >= self.max_rows or size + row_size > self.max_bytes):
+                chunks.append((current, size))
+                current, size = [], 2
+            current.append(row)
+            size += row_size
+        if current:
+            chunks.append((current, size))
+        return chunks
+
+    def upsert(self, rows: List[Dict]) -> Dict:
+        """Upsert every row; returns counts, per-chunk outcomes and the returned rows
+
+        {'rows', 'succeeded', 'failed', 'data',
+         'chunks': [{'index', 'rows', 'bytes', 'status' ('ok'/'failed'), 'attempts', 'error'}]}
+        """
+        chunks = self._chunk_with_sizes(rows)
+        if len(chunks) <= 1:
+            outcomes = [self._send(i, *chunk) for i, chunk in enumerate(chunks)]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as pool:
+                outcomes = list(pool.map(lambda args: self._send(args[0], *args[1]), enumerate(chunks)))
+
+        data = [row for outcome in outcomes for row in outcome.pop('data')]
+        succeeded = sum(o['rows'] for o in outcomes if o['status'] == 'ok')
+        return {
+            'rows': len(rows),
+            'succeeded': succeeded,
+            'failed': len(rows) - succeeded,
+            'data': data,
+            'chunks': outcomes
+        }
+
+    def _send(self, index: int, chunk: List[Dict], size: int) -> Dict:
+        outcome = {'index': index, 'rows': len(chunk), 'bytes': size, 'status': 'failed', 'attempts': 0, 'error': None, 'data': []}
+        for attempt in range(self.max_retries + 1):
+            outcome['attempts'] = attempt + 1
+            try:
+                result = self.client.table(self.table).upsert(chunk, on_conflict=self.on_conflict).execute()
+                outcome.update(status='ok', error=None, data=result.data or [])
+                return outcome
+            except Exception as e:
+                outcome['error'] = str(e)
+                if is_permanent_error(e) or attempt == self.max_retries:
+                    return outcome
+                time.sleep(self.backoff_seconds * (2 ** attempt) * (1 + random.random()))
+        return outcome
+
+
+def summarize(report: Dict) -> str:
+    """One-line summary of an upsert report"""
+    failed_chunks = [c for c in report['chunks'] if c['status'] != 'ok']
+    summary = (f"{report['succeeded']}/{report['rows']} rows upserted in "
+               f"{len(report['chunks']) - len(failed_chunks)}/{len(report['chunks'])} chunks")
+    if failed_chunks:
+        summary += f"; first error: {failed_chunks[0]['error']}"
+    return summary
@@ -0,0 +1,130 @@
+# Paginated corpus loader for the PostgREST papers endpoint
+# Pages are fetched concurrently with Range headers over one pooled session,
+# and later refreshes only pull rows created since the last load.
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class CorpusLoader:
+    """Loads a PostgREST table page by page and keeps it up to date
+
+    `papers` is only ever appended to, so callers can index it incrementally.
+    """
+
+    def __init__(self, url: str, key: str, columns: str = '*', table: str = 'papers',
+                 page_size: int = 1000, max_workers: int = 4, timeout: float = 30):
+        self.endpoint = f"{url.rstrip('/')}/rest/v1/{table}"
+        self.columns = columns
+        self.page_size = page_size
+        self.max_workers = max_workers
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers, max_retries=3)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'apikey': key,
+            'Authorization': f'Bearer {key}',
+            'Content-Type': 'application/json'
+        })
+
+        self.papers: List[Dict] = []
+        self.watermark: Optional[str] = None  # newest created_at seen
+        self.refreshed_at = 0.0
+        self._ids = set()
+        self._lock = threading.Lock()
+        # One refresh at a time when several Streamlit sessions share the loader
+        self._refresh_lock = threading.Lock()
+
+    def _get(self, params: Dict, start: int, end: int, count: bool = False) -> Tuple[List[Dict], Optional[int]]:
+        """Rows start..end (inclusive) and, if requested, the total row count"""
+        headers = {'Range-Unit': 'items', 'Range': f"{start}-{end}"}
+        if count:
+            headers['Prefer'] = 'count=exact'
+        response = self.session.get(self.endpoint, params=params, headers=headers, timeout=self.timeout)
+        response.raise_for_status()
+        total = None
+        content_range = response.headers.get('Content-Range', '')
+        if '/' in content_range and not content_range.endswith('*'):
+            total = int(content_range.split('/')[-1])
+        return response.json(), total
+
+    def _fetch_range(self, params: Dict, start: int, end: int) -> List[Dict]:
+        # The server may cap rows per response (PostgREST max-rows), so keep
+        # asking until the range is filled or the table runs out
+        rows = []
+        while start <= end:
+            page, _ = self._get(params, start, end)
+            if not page:
+                break
+            rows.extend(page)
+            start += len(page)
+        return rows
+
+    def _params(self, **filters) -> Dict:
+        columns = self.columns
+        if columns != '*':
+            # id and created_at drive dedupe and incremental refresh
+            names = [c.strip() for c in columns.split(',')]
+            columns = ','.join(dict.fromkeys(['id', 'created_at'] + names))
+        return dict(filters, select=columns, order='id.asc')
+
+    def load_all(self) -> List[Dict]:
+        """Fetch the whole table with concurrent Range requests"""
+        params = self._params()
+        first, total = self._get(params, 0, self.page_size - 1, count=True)
+        rows = list(first)
+        # A short first page means the server caps rows per response; use its size
+        step = len(first)
+        if step and total is None:
+            # No count available: walk the table sequentially
+            rows.extend(self._fetch_range(params, step, 10 ** 9))
+        elif step:
+            ranges = [(start, min(start + step, total) - 1) for start in range(step, total, step)]
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                for page in pool.map(lambda r: self._fetch_range(params, *r), ranges):
+                    rows.extend(page)
+
+        with self._lock:
+            self.papers.clear()
+            self._ids = set()
+            self.watermark = None
+            self._append(rows)
+            self.refreshed_at = time.monotonic()
+        return self.papers
+
+    def refresh(self, max_age: float = 0) -> List[Dict]:
+        """Pull rows created since the last load; returns the new rows
+
+        Does nothing if the last refresh is younger than max_age seconds.
+        """
+        with self._refresh_lock:
+            if not self.refreshed_at:
+                return list(self.load_all())
+            if time.monotonic() - self.refreshed_at < max_age:
+                return []
+
+            # gte (not gt) so rows sharing the watermark timestamp aren't missed
+            params = self._params(created_at=f"gte.{self.watermark}") if self.watermark else self._params()
+            rows = self._fetch_range(params, 0, 10 ** 9)
+            with self._lock:
+                new_rows = self._append(rows)
+                self.refreshed_at = time.monotonic()
+            return new_rows
+
+    def _append(self, rows: List[Dict]) -> List[Dict]:
+        new_rows = [row for row in rows if row.get('id') not in self._ids]
+        for row in new_rows:
+            self._ids.add(row.get('id'))
+            created_at = row.get('created_at')
+            if created_at and (self.watermark is None or created_at > self.watermark):
+                self.watermark = created_at
+        self.papers.extend(new_rows)
+        return new_rows
@@ -0,0 +1,332 @@
+# Ingest-time duplicate detection for papers
+# Exact matches on normalized DOI and title catch re-harvests under another
+# PMID; MinHash signatures over title+abstract shingles, bucketed with LSH,
+# catch near-identical copies (preprints, reformatted records). The index
+# lives on disk with one row per stored paper: re-harvested papers are
+# skipped, edited ones overwrite their row.
+
+import os
+import re
+import json
+import threading
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+NON_ALNUM_RE = re.compile(r'[^a-z0-9]+')
+DOI_PREFIX_RE = re.compile(r'^(https?://(dx\.)?doi\.org/|doi:\s*)')
+
+# Short titles ("Editorial", "Correction") are too common to match on
+MIN_TITLE_CHARS = 30
+
+
+def normalize_doi(doi: Optional[str]) -> Optional[str]:
+    if not doi:
+        return None
+    return DOI_PREFIX_RE.sub('', doi.strip().lower()) or None
+
+
+def normalize_title(title: Optional[str]) -> Optional[str]:
+    normalized = NON_ALNUM_RE.sub(' ', (title or '').lower()).strip()
+    return normalized if len(normalized) >= MIN_TITLE_CHARS else None
+
+
+def paper_key(paper: Dict) -> Optional[str]:
+    """Identity of the stored record, so re-upserting it isn't a duplicate"""
+    return paper.get('pmid') or normalize_doi(paper.get('doi'))
+
+
+def collapse_repeats(papers: List[Dict], key=paper_key) -> Tuple[List[Dict], List[Dict]]:
+    """Keep only the last row per key (rows without one are kept), as (kept, duplicates)
+
+    Postgres rejects an upsert that touches one row twice, so a paper returned
+    by two queries in the same harvest must be sent once.
+    """
+    last = {}
+    for position, paper in enumerate(papers):
+        paper_id = key(paper)
+        if paper_id is not None:
+            last[paper_id] = position
+    kept, duplicates = [], []
+    for position, paper in enumerate(papers):
+        paper_id = key(paper)
+        if paper_id is None or last[paper_id] == position:
+            kept.append(paper)
+        else:
+            duplicates.append({'paper': paper, 'duplicate_of': paper_id, 'reason': 'repeated'})
+    return kept, duplicates
+
+
+class _Index:
+    """Keys, exact-match maps, LSH buckets and a growable signature matrix (one row per key)"""
+
+    def __init__(self, num_perm: int, bands: int):
+        self.keys: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.dois: Dict[str, str] = {}
+        self.titles: Dict[str, str] = {}
+        self.buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+        self.signatures = np.zeros((1024, num_perm), dtype=np.uint32)
+        # Per-row features, so an edited paper can be taken out of the maps and buckets
+        self.row_dois: List[Optional[str]] = []
+        self.row_titles: List[Optional[str]] = []
+        self.row_bands: List[List[bytes]] = []
+
+    def add(self, key: str, doi: Optional[str], title: Optional[str], signature: Optional[np.ndarray],
+            band_keys: List[bytes]) -> Tuple[int, Optional[str]]:
+        """(row, 'new' | 'changed' | None when the key is already indexed unchanged)"""
+        row = self.rows.get(key)
+        if row is None:
+            row = len(self.keys)
+            self.keys.append(key)
+            self.rows[key] = row
+            self.row_dois.append(None)
+            self.row_titles.append(None)
+            self.row_bands.append([])
+            status = 'new'
+        elif self.unchanged(row, doi, title, signature):
+            return row, None
+        else:
+            self._unlink(row)
+            status = 'changed'
+
+        self.row_dois[row] = doi
+        self.row_titles[row] = title
+        self.row_bands[row] = band_keys if signature is not None else []
+        if doi:
+            self.dois.setdefault(doi, key)
+        if title:
+            self.titles.setdefault(title, key)
+        if row >= len(self.signatures):
+            grown = np.zeros((len(self.signatures) * 2, self.signatures.shape[1]), dtype=np.uint32)
+            grown[:row] = self.signatures[:row]
+            self.signatures = grown
+        self.signatures[row] = signature if signature is not None else 0
+        for bucket, band_key in zip(self.buckets, self.row_bands[row]):
+            bucket.setdefault(band_key, []).append(row)
+        return row, status
+
+    def unchanged(self, row: int, doi: Optional[str], title: Optional[str],
+                  signature: Optional[np.ndarray]) -> bool:
+        if (doi, title) != (self.row_dois[row], self.row_titles[row]):
+            return False
+        if signature is None or not self.row_bands[row]:
+            return signature is None and not self.row_bands[row]
+        return bool(np.array_equal(self.signatures[row], signature))
+
+    def record(self, row: int) -> Dict:
+        return {'key': self.keys[row], 'doi': self.row_dois[row], 'title': self.row_titles[row],
+                'has_signature': bool(self.row_bands[row])}
+
+    def _unlink(self, row: int):
+        key = self.keys[row]
+        if self.dois.get(self.row_dois[row]) == key:
+            del self.dois[self.row_dois[row]]
+        if self.titles.get(self.row_titles[row]) == key:
+            del self.titles[self.row_titles[row]]
+        for bucket, band_key in zip(self.buckets, self.row_bands[row]):
+            rows = bucket[band_key]
+            rows.remove(row)
+            if not rows:
+                del bucket[band_key]
+
+    def match(self, own_key: Optional[str], doi: Optional[str], title: Optional[str],
+              signature: Optional[np.ndarray], band_keys: List[bytes], threshold: float):
+        """(key, reason, similarity) of the best match other than own_key, else None"""
+        if doi and self.dois.get(doi, own_key) != own_key:
+            return self.dois[doi], 'doi', 1.0
+        if title and self.titles.get(title, own_key) != own_key:
+            return self.titles[title], 'title', 1.0
+        if signature is None:
+            return None
+        rows = set()
+        for bucket, band_key in zip(self.buckets, band_keys):
+            rows.update(bucket.get(band_key, ()))
+        best = None
+        for row in rows:
+            if self.keys[row] == own_key:
+                continue
+            # Fraction of equal MinHash values estimates the Jaccard similarity
+            similarity = float(np.mean(self.signatures[row] == signature))
+            if similarity >= threshold and (best is None or similarity > best[2]):
+                best = (self.keys[row], 'minhash', similarity)
+        return best
+
+
+class DuplicateDetector:
+    """Exact DOI/title matching plus MinHash-LSH near-duplicate search
+
+    threshold is the estimated Jaccard similarity of word shingles above which
+    two papers count as the same; num_perm must be a multiple of bands.
+    """
+
+    def __init__(self, path: str, num_perm: int = 128, bands: int = 16,
+                 threshold: float = 0.8, shingle_size: int = 3, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.path = path
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self._lock = threading.Lock()
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 1 << 31, size=num_perm, dtype=np.int64).astype(np.uint64)
+        self._b = rng.randint(0, 1 << 31, size=num_perm, dtype=np.int64).astype(np.uint64)
+
+        self.index = _Index(num_perm, bands)
+        os.makedirs(path, exist_ok=True)
+        self.records_path = os.path.join(path, 'records.jsonl')
+        self.signatures_path = os.path.join(path, 'signatures.u32')
+        self._load()
+
+    def __len__(self):
+        return len(self.index.keys)
+
+    def shingles(self, paper: Dict) -> List[str]:
+        words = NON_ALNUM_RE.sub(' ', f"{paper.get('title') or ''} {paper.get('abstract') or ''}".lower()).split()
+        n = self.shingle_size
+        return [' '.join(words[i:i + n]) for i in range(max(len(words) - n + 1, 0))]
+
+    def signature(self, paper: Dict) -> Optional[np.ndarray]:
+        """MinHash signature, or None if the text is too short to compare"""
+        shingles = set(self.shingles(paper))
+        if len(shingles) < 5:
+            return None
+        hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles), dtype=np.uint64, count=len(shingles))
+        permuted = (hashes[:, None] * self._a + self._b) % np.uint64(MERSENNE_PRIME) & np.uint64(MAX_HASH)
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def band_keys(self, signature: Optional[np.ndarray]) -> List[bytes]:
+        if signature is None:
+            return []
+        return [signature[band * self.rows_per_band:(band + 1) * self.rows_per_band].tobytes()
+                for band in range(self.bands)]
+
+    def _features(self, paper: Dict):
+        signature = self.signature(paper)
+        return (paper_key(paper), normalize_doi(paper.get('doi')), normalize_title(paper.get('title')),
+                signature, self.band_keys(signature))
+
+    def find(self, paper: Dict) -> Optional[Tuple[str, str]]:
+        """(matching key, reason) if the paper duplicates an indexed one, else None"""
+        match = self.index.match(*self._features(paper), self.threshold)
+        return match[:2] if match else None
+
+    def filter(self, papers: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """Split papers into (unique, duplicates), also catching duplicates within the batch
+
+        Nothing is indexed here; call add() once the unique papers are stored.
+        Each duplicate is returned as {'paper', 'duplicate_of', 'reason'}; a
+        paper repeated in the batch keeps its last copy (reason 'repeated').
+        """
+        papers, duplicates = collapse_repeats(papers)
+        batch = _Index(self.num_perm, self.bands)
+        unique = []
+        with self._lock:
+            for position, paper in enumerate(papers):
+                features = self._features(paper)
+                match = self.index.match(*features, self.threshold) or batch.match(*features, self.threshold)
+                if match:
+                    duplicates.append({'paper': paper, 'duplicate_of': match[0], 'reason': match[1]})
+                    continue
+                unique.append(paper)
+                key, doi, title, signature, band_keys = features
+                batch.add(key or f"batch:{position}", doi, title, signature, band_keys)
+        return unique, duplicates
+
+    def add(self, papers: List[Dict]):
+        """Index stored papers and write new or edited ones to the on-disk index
+
+        Papers already indexed with the same DOI, title and signature are
+        skipped; an edited paper overwrites its row.
+        """
+        with self._lock:
+            first_new = len(self.index.keys)
+            changed = set()
+            for paper in papers:
+                key, doi, title, signature, band_keys = self._features(paper)
+                if key is None:
+                    continue
+                row, status = self.index.add(key, doi, title, signature, band_keys)
+                if status == 'changed' and row < first_new:
+                    changed.add(row)
+            added = range(first_new, len(self.index.keys))
+            if not changed and not added:
+                return
+
+            # Edited rows: signature overwritten in place, record appended with its row
+            # number (it supersedes the earlier line; _load compacts the file)
+            if changed:
+                with open(self.signatures_path, 'r+b') as f:
+                    for row in sorted(changed):
+                        f.seek(row * self.num_perm * 4)
+                        self.index.signatures[row].tofile(f)
+            with open(self.records_path, 'a') as f:
+                for row in sorted(changed):
+                    f.write(json.dumps(dict(self.index.record(row), row=row)) + '\n')
+                for row in added:
+                    f.write(json.dumps(self.index.record(row)) + '\n')
+            if added:
+                with open(self.signatures_path, 'ab') as f:
+                    self.index.signatures[first_new:len(self.index.keys)].tofile(f)
+
+    def _load(self):
+        if not os.path.exists(self.records_path) or not os.path.exists(self.signatures_path):
+            return
+        with open(self.records_path) as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        signatures = np.fromfile(self.signatures_path, dtype=np.uint32)
+        count = len(signatures) // self.num_perm
+        signatures = signatures[:count * self.num_perm].reshape(count, self.num_perm)
+
+        # Records without a row number each appended a signature; records with
+        # one rewrote that row's signature in place. Older indexes appended a
+        # record for every upsert, so the same key may appear several times.
+        slot, superseded = 0, False
+        for record in records:
+            if 'row' in record:
+                position = record['row']
+                superseded = True
+            else:
+                # A crash between the two appends leaves them out of step; keep the common prefix
+                if slot >= count:
+                    break
+                position, slot = slot, slot + 1
+            if position >= count:
+                continue
+            signature = signatures[position] if record['has_signature'] else None
+            row, status = self.index.add(record['key'], record['doi'], record['title'], signature,
+                                         self.band_keys(signature))
+            superseded = superseded or status != 'new' or row != position
+        if superseded or slot < count:
+            self._compact()
+
+    def _compact(self):
+        """Rewrite the on-disk index with exactly one record and signature per row"""
+        count = len(self.index.keys)
+        with open(self.records_path + '.tmp', 'w') as f:
+            for row in range(count):
+                f.write(json.dumps(self.index.record(row)) + '\n')
+        with open(self.signatures_path + '.tmp', 'wb') as f:
+            self.index.signatures[:count].tofile(f)
+        os.replace(self.signatures_path + '.tmp', self.signatures_path)
+        os.replace(self.records_path + '.tmp', self.records_path)
+
+
+_detectors = {}
+_detectors_lock = threading.Lock()
+
+
+def shared_detector(path: str, threshold: float = 0.8) -> DuplicateDetector:
+    """Process-wide detector per index directory, loaded on first use"""
+    with _detectors_lock:
+        if path not in _detectors:
+            _detectors[path] = DuplicateDetector(path, threshold=threshold)
+        return _detectors[path]
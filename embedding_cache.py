@@ -0,0 +1,176 @@
+# Persistent embedding cache
+# Content-addressed: entries are keyed by a hash of (model name, exact text),
+# so unchanged documents never need to be re-encoded.
+# Several processes (the app and the indexer) may share one cache directory:
+# each slot's stored key is checked on every read, and writes take a file
+# lock, so a process never serves a vector another one wrote for other text.
+
+import os
+import json
+import hashlib
+import threading
+from contextlib import contextmanager
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process write lock, reads still verify keys
+    fcntl = None
+
+
+class EmbeddingCache:
+    """Memory-mapped on-disk embedding cache with LRU eviction and a size cap"""
+
+    KEY_BYTES = 32  # sha256 digest
+
+    def __init__(self, cache_dir: str, model_name: str, dim: int, max_entries: int):
+        self.model_name = model_name
+        self.dim = dim
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        # One directory per model keeps vector files of different widths apart
+        safe_name = model_name.replace('/', '__')
+        self.path = os.path.join(cache_dir, safe_name)
+        os.makedirs(self.path, exist_ok=True)
+
+        meta = {'model': model_name, 'dim': dim, 'max_entries': max_entries}
+        meta_path = os.path.join(self.path, 'meta.json')
+        files = [os.path.join(self.path, name) for name in ('vectors.f32', 'keys.bin', 'last_used.i64')]
+        reuse = False
+        if os.path.exists(meta_path) and all(os.path.exists(f) for f in files):
+            with open(meta_path) as f:
+                reuse = json.load(f) == meta
+        if not reuse:
+            with open(meta_path, 'w') as f:
+                json.dump(meta, f)
+
+        mode = 'r+' if reuse else 'w+'
+        self.vectors = np.memmap(files[0], dtype=np.float32, mode=mode, shape=(max_entries, dim))
+        self.keys = np.memmap(files[1], dtype=np.uint8, mode=mode, shape=(max_entries, self.KEY_BYTES))
+        # Last-use tick per slot; 0 marks an empty slot
+        self.last_used = np.memmap(files[2], dtype=np.int64, mode=mode, shape=(max_entries,))
+
+        # Rebuild the in-memory LRU order from the persisted ticks
+        used_slots = np.flatnonzero(self.last_used)
+        used_slots = used_slots[np.argsort(self.last_used[used_slots], kind='stable')]
+        self._slots = OrderedDict(
+            (self.keys[slot].tobytes(), int(slot)) for slot in used_slots
+        )
+        self._free = sorted(set(range(max_entries)) - set(self._slots.values()), reverse=True)
+        self._tick = int(self.last_used.max()) if max_entries else 0
+        self._lock_path = os.path.join(self.path, 'write.lock')
+
+    @classmethod
+    def from_config(cls, cache_dir: str, model_name: str, dim: int, max_mb: float):
+        """Build a cache sized in megabytes, or None when disabled"""
+        if not cache_dir or max_mb <= 0:
+            return None
+        max_entries = int(max_mb * 1024 * 1024 // (dim * 4 + cls.KEY_BYTES + 8))
+        return cls(cache_dir, model_name, dim, max(max_entries, 1))
+
+    def key(self, text: str) -> bytes:
+        """Cache key for a text under this cache's model"""
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode('utf-8')).digest()
+
+    def __len__(self):
+        return len(self._slots)
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Cached vectors for texts, None where missing"""
+        found = []
+        with self._lock:
+            for text in texts:
+                key = self.key(text)
+                slot = self._slots.get(key)
+                vector = None
+                if slot is not None and self._owns(slot, key):
+                    vector = np.array(self.vectors[slot])
+                    # Re-check: another process may have rewritten the slot meanwhile
+                    if not self._owns(slot, key):
+                        vector = None
+                if vector is None:
+                    if slot is not None:
+                        # The slot was taken over by another process sharing the files
+                        del self._slots[key]
+                    self.misses += 1
+                    found.append(None)
+                    continue
+                self.hits += 1
+                self._touch(key, slot)
+                found.append(vector)
+        return found
+
+    def put_many(self, texts: List[str], vectors: np.ndarray):
+        """Store vectors for texts, evicting least recently used entries"""
+        with self._lock, self._file_lock():
+            for text, vector in zip(texts, vectors):
+                key = self.key(text)
+                slot = self._slots.get(key)
+                if slot is not None and not self._owns(slot, key):
+                    del self._slots[key]
+                    slot = None
+                if slot is None:
+                    slot = self._allocate()
+                # Invalidate the key while the vector is rewritten, so readers miss instead of mixing
+                self.keys[slot] = 0
+                self.vectors[slot] = vector
+                self.keys[slot] = np.frombuffer(key, dtype=np.uint8)
+                self._touch(key, slot)
+
+    def flush(self):
+        """Persist pending writes to disk"""
+        with self._lock:
+            self.vectors.flush()
+            self.keys.flush()
+            self.last_used.flush()
+
+    def stats(self):
+        return {
+            'entries': len(self._slots),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+    def _owns(self, slot: int, key: bytes) -> bool:
+        return self.keys[slot].tobytes() == key
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock on the cache files across processes"""
+        if fcntl is None:
+            yield
+            return
+        with open(self._lock_path, 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _touch(self, key: bytes, slot: int):
+        self._tick += 1
+        self.last_used[slot] = self._tick
+        self._slots[key] = slot
+        self._slots.move_to_end(key)
+
+    def _allocate(self) -> int:
+        while self._free:
+            slot = self._free.pop()
+            # Free here, but maybe filled by another process since we opened the files
+            if not self.last_used[slot]:
+                return slot
+        # Evict the least recently used entry and reuse its slot; if other
+        # processes filled every slot, take the oldest by tick instead
+        if self._slots:
+            _, slot = self._slots.popitem(last=False)
+        else:
+            slot = int(np.argmin(self.last_used))
+        self.last_used[slot] = 0
+        return slot
@@ -0,0 +1,205 @@
+# Process-wide sentence encoders
+# Loading SciBERT takes seconds and hundreds of MB, so each model is built
+# once per process, on first use, and shared by every vector store.
+#
+# Backends:
+#   torch      SentenceTransformer (float32 PyTorch)
+#   onnx       the same model exported to ONNX, run with onnxruntime
+#   onnx-int8  the ONNX export with int8 dynamically quantized weights
+# ONNX exports are built once from the PyTorch model and kept on disk, with
+# reference embeddings of a few sentences; every ONNX load must reproduce
+# them (cosine >= MIN_COSINE) or it raises instead of serving vectors.
+
+import os
+import json
+import threading
+from typing import List
+
+import numpy as np
+
+BACKENDS = ('torch', 'onnx', 'onnx-int8')
+
+# Lowest cosine similarity to the PyTorch embeddings each ONNX backend may show
+MIN_COSINE = {'onnx': 0.999, 'onnx-int8': 0.99}
+
+REFERENCE_TEXTS = [
+    "CRISPR-Cas9 base editing corrects a pathogenic point mutation in patient-derived cells.",
+    "Protein folding stability of engineered enzymes under thermal stress",
+    "mRNA vaccine delivery with lipid nanoparticles in vivo",
+    "Gene therapy",
+    "Single-cell RNA sequencing reveals heterogeneity of tumor-infiltrating T cells. " * 40,
+]
+
+_encoders = {}
+_lock = threading.Lock()
+
+
+def get_encoder(model_name: str, backend: str = 'torch', threads: int = 0, onnx_dir: str = '.cache/onnx'):
+    """Shared encoder for model_name on the given backend, loaded on first call
+
+    threads caps intra-op CPU threads (0 = library default).
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown encoder backend '{backend}' (expected one of {', '.join(BACKENDS)})")
+    key = (model_name, backend)
+    with _lock:
+        if key not in _encoders:
+            if backend == 'torch':
+                # Deferred: importing sentence_transformers pulls in torch
+                from sentence_transformers import SentenceTransformer
+                if threads:
+                    import torch
+                    torch.set_num_threads(threads)
+                _encoders[key] = SentenceTransformer(model_name)
+            else:
+                model_dir = onnx_model_dir(onnx_dir, model_name)
+                quantized = backend == 'onnx-int8'
+                if not all(os.path.exists(os.path.join(model_dir, name))
+                           for name in (OnnxEncoder.model_file(quantized), 'reference.npy')):
+                    export_onnx(model_name, model_dir, quantize=quantized)
+                encoder = OnnxEncoder(model_dir, quantized=quantized, threads=threads)
+                encoder.verify(MIN_COSINE[backend])
+                _encoders[key] = encoder
+        return _encoders[key]
+
+
+def encoder_cache_key(model_name: str, backend: str) -> str:
+    """Embedding cache namespace: quantized vectors must not mix with float32 ones"""
+    return model_name if backend == 'torch' else f"{model_name}@{backend}"
+
+
+def loaded_encoders():
+    """(model, backend) pairs loaded so far in this process"""
+    return list(_encoders)
+
+
+def onnx_model_dir(onnx_dir: str, model_name: str) -> str:
+    return os.path.join(onnx_dir, model_name.replace('/', '__'))
+
+
+def export_onnx(model_name: str, model_dir: str, quantize: bool = True):
+    """Export a SentenceTransformer's transformer to ONNX (and an int8 copy)
+
+    Pooling and normalization stay in NumPy, so only the transformer is
+    exported; its tokenizer, pooling settings and the PyTorch embeddings of
+    REFERENCE_TEXTS are saved alongside.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name, device='cpu')
+    transformer, pooling = model[0], model[1]
+    tokenizer = transformer.tokenizer
+    sample = tokenizer(["ONNX export sample"], return_tensors='pt')
+    input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in sample]
+
+    class LastHiddenState(torch.nn.Module):
+        def __init__(self, auto_model):
+            super().__init__()
+            self.auto_model = auto_model
+
+        def forward(self, *inputs):
+            return self.auto_model(**dict(zip(input_names, inputs)))[0]
+
+    os.makedirs(model_dir, exist_ok=True)
+    fp32_path = os.path.join(model_dir, OnnxEncoder.model_file(False))
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names + ['last_hidden_state']}
+    with torch.no_grad():
+        torch.onnx.export(
+            LastHiddenState(transformer.auto_model.eval()),
+            tuple(sample[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=['last_hidden_state'],
+            dynamic_axes=dynamic_axes,
+            opset_version=14
+        )
+    tokenizer.save_pretrained(model_dir)
+    with open(os.path.join(model_dir, 'encoder.json'), 'w') as f:
+        json.dump({
+            'model_name': model_name,
+            'pooling': pooling.get_pooling_mode_str(),
+            'max_seq_length': model.max_seq_length,
+            'dim': model.get_sentence_embedding_dimension()
+        }, f)
+    np.save(os.path.join(model_dir, 'reference.npy'),
+            model.encode(REFERENCE_TEXTS, convert_to_numpy=True, normalize_embeddings=True).astype(np.float32))
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(fp32_path, os.path.join(model_dir, OnnxEncoder.model_file(True)),
+                         weight_type=QuantType.QInt8)
+
+
+class OnnxEncoder:
+    """onnxruntime encoder exposing the SentenceTransformer methods we use"""
+
+    def __init__(self, model_dir: str, quantized: bool = True, threads: int = 0):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        with open(os.path.join(model_dir, 'encoder.json')) as f:
+            config = json.load(f)
+        self.model_dir = model_dir
+        self.model_name = config['model_name']
+        self.pooling = config['pooling']
+        self.max_seq_length = config['max_seq_length']
+        self.dim = config['dim']
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, self.model_file(quantized)), options, providers=['CPUExecutionProvider']
+        )
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    @staticmethod
+    def model_file(quantized: bool) -> str:
+        return 'model.int8.onnx' if quantized else 'model.onnx'
+
+    def verify(self, min_cosine: float) -> float:
+        """Worst cosine similarity to the saved PyTorch embeddings; raises below min_cosine"""
+        reference = np.load(os.path.join(self.model_dir, 'reference.npy'))
+        cosines = np.sum(reference * self.encode(REFERENCE_TEXTS, normalize_embeddings=True), axis=1)
+        worst = float(cosines.min())
+        if not worst >= min_cosine:
+            raise RuntimeError(
+                f"ONNX encoder in {self.model_dir} diverges from {self.model_name} "
+                f"(cosine {worst:.4f} < {min_cosine}); delete the directory to re-export, "
+                f"or use ENCODER_BACKEND=torch"
+            )
+        return worst
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def encode(self, texts, batch_size: int = 32, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = False, show_progress_bar: bool = False, **kwargs) -> np.ndarray:
+        """Embeddings for texts, one row each"""
+        single = isinstance(texts, str)
+        texts: List[str] = [texts] if single else list(texts)
+        embeddings = np.empty((len(texts), self.dim), dtype=np.float32)
+
+        # Similar lengths per batch keep padding (wasted compute) low
+        order = np.argsort([-len(text) for text in texts], kind='stable')
+        for start in range(0, len(texts), batch_size):
+            rows = order[start:start + batch_size]
+            batch = self.tokenizer([texts[i] for i in rows], padding=True, truncation=True,
+                                   max_length=self.max_seq_length, return_tensors='np')
+            hidden = self.session.run(None, {name: batch[name].astype(np.int64) for name in self.input_names})[0]
+            embeddings[rows] = self._pool(hidden, batch['attention_mask'])
+
+        if normalize_embeddings:
+            embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        return embeddings[0] if single else embeddings
+
+    def _pool(self, hidden: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        mask = attention_mask[..., None].astype(np.float32)
+        if self.pooling == 'cls':
+            return hidden[:, 0]
+        if self.pooling == 'max':
+            return np.where(mask > 0, hidden, -1e9).max(axis=1)
+        return (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
@@ -0,0 +1,123 @@
+# Hybrid lexical + semantic paper retrieval
+# The full-text and vector searches run concurrently and their rankings are
+# merged with reciprocal rank fusion, so exact gene/protein names found by the
+# lexical leg and paraphrases found by the vector leg both make the cut.
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+# Standard RRF constant: dampens the gap between the first few ranks
+RRF_K = 60
+
+SearchFn = Callable[[str, int], List[Dict]]
+
+
+def paper_key(row: Dict):
+    """paper_id for vector hits, id for database rows"""
+    return row.get('paper_id', row.get('id'))
+
+
+def reciprocal_rank_fusion(rankings: Dict[str, List[Dict]], k: int = RRF_K) -> List[Dict]:
+    """Merge ranked lists into one, deduped by paper
+
+    Each paper scores sum(1 / (k + rank)) over the legs that found it; the
+    fields of every leg's row are merged, earlier legs winning on conflicts.
+    """
+    fused: Dict = {}
+    for leg, rows in reversed(list(rankings.items())):
+        for rank, row in enumerate(rows, 1):
+            key = paper_key(row)
+            if key is None:
+                continue
+            entry = fused.setdefault(key, {'rrf_score': 0.0, 'ranks': {}})
+            entry.update(row)
+            entry['rrf_score'] += 1.0 / (k + rank)
+            entry['ranks'][leg] = rank
+
+    # Scale so a paper ranked first by every leg scores 1.0
+    best = len(rankings) / (k + 1)
+    results = sorted(fused.values(), key=lambda e: e['rrf_score'], reverse=True)
+    for entry in results:
+        entry['paper_id'] = paper_key(entry)
+        entry['relevance_score'] = entry['rrf_score'] / best
+        entry['matched_by'] = sorted(entry['ranks'])
+    return results
+
+
+class HybridRetriever:
+    """Concurrent lexical + vector search fused with reciprocal rank fusion
+
+    Either leg may be None (or fail); the other leg's results are returned.
+    hydrate(ids) optionally fetches full rows for hits that only came back
+    with vector-store properties. One retriever may serve many callers at
+    once (the app shares it across sessions); max_concurrent searches run
+    their legs in parallel before later ones queue.
+    """
+
+    def __init__(self, lexical_search: Optional[SearchFn], vector_search: Optional[SearchFn],
+                 hydrate: Callable[[List], List[Dict]] = None, k: int = RRF_K, candidates: int = 20,
+                 max_concurrent: int = 8):
+        self.legs = {name: fn for name, fn in (('lexical', lexical_search), ('vector', vector_search)) if fn}
+        self.hydrate = hydrate
+        self.k = k
+        self.candidates = candidates
+        # Shared across calls so each search doesn't pay for thread startup;
+        # a worker per leg per concurrent search (threads start on demand)
+        self.pool = ThreadPoolExecutor(max_workers=max(1, len(self.legs) * max_concurrent),
+                                       thread_name_prefix='hybrid-search')
+
+    def search(self, query: str, limit: int = 10, filters=None) -> Dict:
+        """Fused results plus per-leg timings and errors
+
+        filters (a search_filters.SearchFilters) is passed down to both legs.
+        Returns {'results', 'timings' (ms per leg, fusion, hydrate, total), 'errors'}.
+        """
+        start = time.perf_counter()
+        depth = max(limit, self.candidates)
+        futures = {name: self.pool.submit(self._timed, fn, query, depth, filters) for name, fn in self.legs.items()}
+
+        rankings, timings, errors = {}, {}, {}
+        for name, future in futures.items():
+            rows, elapsed_ms, error = future.result()
+            timings[f'{name}_ms'] = elapsed_ms
+            if error is not None:
+                errors[name] = error
+            else:
+                rankings[name] = rows
+        if errors and not rankings:
+            raise next(iter(errors.values()))
+
+        fusion_start = time.perf_counter()
+        results = reciprocal_rank_fusion(rankings, self.k)[:limit]
+        timings['fusion_ms'] = (time.perf_counter() - fusion_start) * 1000
+
+        if self.hydrate:
+            hydrate_start = time.perf_counter()
+            results = self._hydrate(results)
+            timings['hydrate_ms'] = (time.perf_counter() - hydrate_start) * 1000
+
+        timings['total_ms'] = (time.perf_counter() - start) * 1000
+        return {'results': results, 'timings': timings, 'errors': errors}
+
+    @staticmethod
+    def _timed(fn: SearchFn, query: str, limit: int, filters=None):
+        start = time.perf_counter()
+        try:
+            rows, error = (fn(query, limit, filters=filters) if filters else fn(query, limit)), None
+        except Exception as e:
+            rows, error = [], e
+        return rows, (time.perf_counter() - start) * 1000, error
+
+    def _hydrate(self, results: List[Dict]) -> List[Dict]:
+        # Only vector-only hits are missing database columns
+        missing = [r['paper_id'] for r in results if 'lexical' not in r['ranks']]
+        if not missing:
+            return results
+        rows = {row['id']: row for row in self.hydrate(missing)}
+        for result in results:
+            row = rows.get(result['paper_id'])
+            if row:
+                for column, value in row.items():
+                    result.setdefault(column, value)
+        return results
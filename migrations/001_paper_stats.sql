@@ -0,0 +1,32 @@
+-- Corpus statistics in a single round trip
+-- Run in the Supabase SQL editor; called as supabase.rpc('paper_stats')
+
+create index if not exists papers_processed_idx on papers (processed);
+create index if not exists papers_year_idx on papers (year);
+create index if not exists papers_journal_idx on papers (journal);
+
+create or replace function paper_stats(top_journals integer default 20)
+returns json
+language sql
+stable
+as $$
+    select json_build_object(
+        'total_papers', (select count(*) from papers),
+        'processed_papers', (select count(*) from papers where processed),
+        'unique_journals', (select count(distinct journal) from papers),
+        'papers_by_year', (
+            select coalesce(json_object_agg(year, n), '{}'::json)
+            from (select year, count(*) as n from papers where year is not null group by year) y
+        ),
+        'papers_by_journal', (
+            select coalesce(json_object_agg(journal, n), '{}'::json)
+            from (
+                select journal, count(*) as n from papers
+                where journal is not null
+                group by journal order by n desc limit top_journals
+            ) j
+        )
+    );
+$$;
+
+grant execute on function paper_stats(integer) to anon, authenticated;
@@ -0,0 +1,42 @@
+-- Ranked full-text search over title, keywords and abstract
+-- Run in the Supabase SQL editor; called as supabase.rpc('search_papers')
+
+-- Title matches outrank keyword matches, which outrank abstract matches
+alter table papers add column if not exists search_vector tsvector
+    generated always as (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(keywords, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(abstract, '')), 'C')
+    ) stored;
+
+create index if not exists papers_search_idx on papers using gin (search_vector);
+
+create or replace function search_papers(search_query text, max_results integer default 10)
+returns table (
+    id integer,
+    pmid varchar,
+    doi varchar,
+    title text,
+    abstract text,
+    authors text,
+    journal varchar,
+    year integer,
+    keywords text,
+    source varchar,
+    created_at timestamp,
+    processed boolean,
+    rank real
+)
+language sql
+stable
+as $$
+    select p.id, p.pmid, p.doi, p.title, p.abstract, p.authors, p.journal, p.year,
+           p.keywords, p.source, p.created_at, p.processed,
+           ts_rank(p.search_vector, q) as rank
+    from papers p, websearch_to_tsquery('english', search_query) q
+    where p.search_vector @@ q
+    order by rank desc, p.id
+    limit max_results;
+$$;
+
+grant execute on function search_papers(text, integer) to anon, authenticated;
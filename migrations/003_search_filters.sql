@@ -0,0 +1,50 @@
+-- Structured filters (year range, journals, sources) for ranked full-text search
+-- Run in the Supabase SQL editor after 002_paper_search.sql; filters are
+-- applied inside the query, so a selective filter doesn't cost extra rows
+
+create index if not exists papers_year_idx on papers (year);
+create index if not exists papers_journal_idx on papers (journal);
+
+-- Replaces the two-argument version; unfiltered calls still work unchanged
+drop function if exists search_papers(text, integer);
+
+create or replace function search_papers(
+    search_query text,
+    max_results integer default 10,
+    year_min integer default null,
+    year_max integer default null,
+    journals text[] default null,
+    sources text[] default null
+)
+returns table (
+    id integer,
+    pmid varchar,
+    doi varchar,
+    title text,
+    abstract text,
+    authors text,
+    journal varchar,
+    year integer,
+    keywords text,
+    source varchar,
+    created_at timestamp,
+    processed boolean,
+    rank real
+)
+language sql
+stable
+as $$
+    select p.id, p.pmid, p.doi, p.title, p.abstract, p.authors, p.journal, p.year,
+           p.keywords, p.source, p.created_at, p.processed,
+           ts_rank(p.search_vector, q) as rank
+    from papers p, websearch_to_tsquery('english', search_query) q
+    where p.search_vector @@ q
+      and (year_min is null or p.year >= year_min)
+      and (year_max is null or (p.year > 0 and p.year <= year_max))
+      and (journals is null or p.journal = any(journals))
+      and (sources is null or p.source = any(sources))
+    order by rank desc, p.id
+    limit max_results;
+$$;
+
+grant execute on function search_papers(text, integer, integer, integer, text[], text[]) to anon, authenticated;
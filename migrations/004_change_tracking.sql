@@ -0,0 +1,67 @@
+-- Change tracking for incremental vector sync (python research_system.py sync)
+-- Run in the Supabase SQL editor after 003_search_filters.sql. Every insert
+-- and every edit of an indexed column takes a new change_seq and clears
+-- processed; deletes leave a row in paper_deletions. The sync pages through
+-- both past its saved watermarks, so a run reads only what changed.
+
+create sequence if not exists paper_change_seq;
+
+alter table papers add column if not exists updated_at timestamptz default now();
+alter table papers add column if not exists change_seq bigint;
+
+-- Existing rows count as one change each; the first sync skips those already processed
+update papers set change_seq = nextval('paper_change_seq') where change_seq is null;
+alter table papers alter column change_seq set default nextval('paper_change_seq');
+
+create index if not exists papers_change_seq_idx on papers (change_seq);
+
+-- Edits to anything embedded or filtered on (not processed/created_at)
+-- mark the row changed, so the vector is rebuilt; re-upserting identical
+-- content leaves it alone
+create or replace function papers_track_changes()
+returns trigger
+language plpgsql
+as $$
+begin
+    if (new.title, new.abstract, new.authors, new.keywords, new.journal, new.year, new.source, new.doi)
+       is distinct from
+       (old.title, old.abstract, old.authors, old.keywords, old.journal, old.year, old.source, old.doi) then
+        new.change_seq := nextval('paper_change_seq');
+        new.updated_at := now();
+        new.processed := false;
+    end if;
+    return new;
+end;
+$$;
+
+drop trigger if exists papers_track_changes on papers;
+create trigger papers_track_changes
+    before update on papers
+    for each row execute function papers_track_changes();
+
+-- Tombstones for deleted papers, read by the sync to drop their vectors
+create table if not exists paper_deletions (
+    seq bigserial primary key,
+    paper_id integer not null,
+    deleted_at timestamptz default now()
+);
+
+-- security definer: whoever may delete papers needn't be able to write here
+create or replace function papers_record_deletion()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    insert into paper_deletions (paper_id) values (old.id);
+    return old;
+end;
+$$;
+
+drop trigger if exists papers_record_deletion on papers;
+create trigger papers_record_deletion
+    after delete on papers
+    for each row execute function papers_record_deletion();
+
+grant select on paper_deletions to anon, authenticated;
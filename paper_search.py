@@ -0,0 +1,51 @@
+# Ranked full-text paper search shared by app.py and SupabaseStorage
+# One RPC (migrations/002_paper_search.sql) matches the query against a
+# GIN-indexed, weighted tsvector and returns the top rows ranked by ts_rank.
+# Year/journal/source filters are RPC arguments (migrations/003_search_filters.sql).
+
+from typing import Dict, List
+
+from paper_stats import MISSING_FUNCTION_CODES
+from search_filters import SearchFilters
+
+
+class PaperSearch:
+    """Full-text search over title, keywords and abstract"""
+
+    def __init__(self, client):
+        self.client = client
+        self._rpc_available = True
+        self._rpc_filters_available = True
+
+    def search(self, query: str, limit: int = 10, filters: SearchFilters = None) -> List[Dict]:
+        """Papers matching the query and filters, best first (each row carries its rank)"""
+        if not query or not query.strip():
+            return []
+        filters = SearchFilters.coerce(filters)
+        if self._rpc_available and (filters is None or self._rpc_filters_available):
+            params = {'search_query': query, 'max_results': limit}
+            if filters:
+                params.update(filters.rpc_params())
+            try:
+                result = self.client.rpc('search_papers', params).execute()
+                return result.data or []
+            except Exception as e:
+                if getattr(e, 'code', None) not in MISSING_FUNCTION_CODES:
+                    raise
+                # Migration not applied yet: fall back to substring matching
+                if filters:
+                    self._rpc_filters_available = False
+                else:
+                    self._rpc_available = False
+        return self._search_substring(query, limit, filters)
+
+    def _search_substring(self, query: str, limit: int, filters: SearchFilters = None) -> List[Dict]:
+        papers = self.client.table('papers')
+        for column in ('title', 'abstract'):
+            request = papers.select('*').ilike(column, f'%{query}%')
+            if filters:
+                request = filters.apply(request)
+            result = request.limit(limit).execute()
+            if result.data:
+                return result.data
+        return []
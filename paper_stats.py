@@ -0,0 +1,79 @@
+# Corpus statistics shared by app.py, test.py and FreeResearchAI.get_system_status
+# One RPC (migrations/001_paper_stats.sql) returns every count together; the
+# result is cached briefly so page loads and reruns don't hit the database.
+
+from datetime import datetime
+from typing import Dict
+
+from query_cache import TTLCache
+
+# PostgREST / Postgres error codes for "function does not exist"
+MISSING_FUNCTION_CODES = {'PGRST202', '42883'}
+
+
+class PaperStats:
+    """Total, processed, per-year and per-journal paper counts with a short TTL"""
+
+    def __init__(self, client, ttl_seconds: float = 30, top_journals: int = 20):
+        self.client = client
+        self.top_journals = top_journals
+        self.cache = TTLCache(max_entries=8, ttl_seconds=ttl_seconds)
+        self._rpc_available = True
+
+    def get(self) -> Dict:
+        """Current stats (cached)"""
+        stats = self.cache.get('stats')
+        if stats is None:
+            stats = self._fetch()
+            self.cache.put('stats', stats)
+        return stats
+
+    def invalidate(self):
+        self.cache.clear()
+
+    def _fetch(self) -> Dict:
+        raw = None
+        if self._rpc_available:
+            try:
+                raw = self.client.rpc('paper_stats', {'top_journals': self.top_journals}).execute().data
+            except Exception as e:
+                if getattr(e, 'code', None) not in MISSING_FUNCTION_CODES:
+                    raise
+                # Migration not applied yet: fall back to count-only queries
+                self._rpc_available = False
+        if raw is None:
+            raw = self._fetch_counts()
+
+        total = raw.get('total_papers') or 0
+        processed = raw.get('processed_papers') or 0
+        return {
+            'total_papers': total,
+            'processed_papers': processed,
+            'processing_progress': f"{(processed/total*100):.1f}%" if total > 0 else "0%",
+            'unique_journals': raw.get('unique_journals'),
+            'papers_by_year': {int(year): n for year, n in (raw.get('papers_by_year') or {}).items()},
+            'papers_by_journal': dict(raw.get('papers_by_journal') or {}),
+            'fetched_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+    def _fetch_counts(self) -> Dict:
+        # Exact counts come back in the Content-Range header; limit(1) keeps
+        # the response body to a single row
+        papers = self.client.table('papers')
+        total = papers.select('id', count='exact').limit(1).execute()
+        processed = papers.select('id', count='exact').eq('processed', True).limit(1).execute()
+        return {'total_papers': total.count, 'processed_papers': processed.count}
+
+    def recent(self, since_year: int) -> int:
+        """Papers published in or after since_year"""
+        stats = self.get()
+        if self._rpc_available:
+            return sum(n for year, n in stats['papers_by_year'].items() if year >= since_year)
+
+        # No per-year breakdown without the RPC; count server-side instead
+        key = ('recent', since_year)
+        count = self.cache.get(key)
+        if count is None:
+            count = self.client.table('papers').select('id', count='exact').gte('year', since_year).limit(1).execute().count
+            self.cache.put(key, count)
+        return count
@@ -0,0 +1,111 @@
+# Passage-level chunking for long abstracts and full text
+# SciBERT only sees the first 512 tokens of a document, so long texts are split
+# into overlapping token windows that are embedded and searched separately.
+# Search hits on passages are folded back into one hit per paper.
+
+import re
+from typing import Dict, List, Tuple
+
+WORD_RE = re.compile(r'\S+')
+
+# Local passage ids are paper_id * stride + chunk_index
+PASSAGE_ID_STRIDE = 1024
+
+
+class PassageChunker:
+    """Splits paper text into overlapping, token-bounded passages"""
+
+    def __init__(self, tokenizer=None, max_tokens: int = 256, overlap: int = 32, max_chunks: int = 8):
+        if overlap >= max_tokens:
+            raise ValueError("Passage overlap must be smaller than the passage length")
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+        self.overlap = overlap
+        self.max_chunks = min(max_chunks, PASSAGE_ID_STRIDE)
+
+    @classmethod
+    def from_encoder(cls, encoder, max_tokens: int, overlap: int, max_chunks: int) -> 'PassageChunker':
+        """Chunker using the encoder's own tokenizer, capped at its input window"""
+        window = getattr(encoder, 'max_seq_length', None)
+        if window:
+            max_tokens = min(max_tokens, window - 2)  # room for [CLS] and [SEP]
+        return cls(getattr(encoder, 'tokenizer', None), max_tokens, overlap, max_chunks)
+
+    def token_spans(self, text: str) -> List[Tuple[int, int]]:
+        """Character span of every token in text"""
+        if self.tokenizer is not None:
+            try:
+                encoded = self.tokenizer(text, add_special_tokens=False, truncation=False,
+                                         return_offsets_mapping=True, verbose=False)
+                return [tuple(span) for span in encoded['offset_mapping']]
+            except (TypeError, ValueError, KeyError, NotImplementedError):
+                pass  # slow tokenizers have no offsets; fall back to words
+        return [match.span() for match in WORD_RE.finditer(text)]
+
+    def split(self, text: str, budget: int = None) -> List[str]:
+        """Overlapping windows of at most budget tokens, up to max_chunks of them"""
+        budget = budget or self.max_tokens
+        spans = self.token_spans(text)
+        if not spans:
+            return []
+        stride = max(budget - self.overlap, 1)
+        chunks = []
+        for start in range(0, len(spans), stride):
+            end = min(start + budget, len(spans))
+            chunks.append(text[spans[start][0]:spans[end - 1][1]])
+            if end == len(spans) or len(chunks) == self.max_chunks:
+                break
+        return chunks
+
+    def paper_passages(self, paper: Dict) -> List[Dict]:
+        """Passages for a paper whose text overflows a single window
+
+        Short papers return [] because their paper-level vector already covers
+        the whole text. Every passage is prefixed with the title for context.
+        """
+        title = paper.get('title') or ''
+        body = '\n\n'.join(part for part in (paper.get('abstract'), paper.get('full_text')) if part)
+        if not body:
+            return []
+        budget = max(self.max_tokens - len(self.token_spans(title)), self.overlap + 1)
+        chunks = self.split(body, budget)
+        if len(chunks) < 2:
+            return []
+        return [
+            {
+                'paper_id': paper.get('id'),
+                'chunk_index': i,
+                'text': f"{title}\n{chunk}" if title else chunk,
+                'title': title,
+                'authors': paper.get('authors', ''),
+                'journal': paper.get('journal', ''),
+                'year': paper.get('year') or 0,
+                'source': paper.get('source') or ''
+            }
+            for i, chunk in enumerate(chunks)
+        ]
+
+
+def passage_id(paper_id: int, chunk_index: int) -> int:
+    return int(paper_id) * PASSAGE_ID_STRIDE + chunk_index
+
+
+def aggregate_hits(hits: List[Dict], limit: int) -> List[Dict]:
+    """One hit per paper (its best-scoring paper or passage hit), best first
+
+    Each result records how many passages matched and the best passage text.
+    """
+    papers: Dict = {}
+    for hit in hits:
+        paper_id = hit.get('paper_id')
+        best = papers.get(paper_id)
+        if best is None or hit['relevance_score'] > best['relevance_score']:
+            merged = dict(hit, passage_hits=best['passage_hits'] if best else 0)
+            if best and 'passage' in best and 'passage' not in merged:
+                merged['passage'] = best['passage']
+            papers[paper_id] = best = merged
+        elif 'passage' in hit and 'passage' not in best:
+            best['passage'] = hit['passage']
+        if 'passage' in hit:
+            best['passage_hits'] += 1
+    return sorted(papers.values(), key=lambda h: h['relevance_score'], reverse=True)[:limit]
@@ -0,0 +1,209 @@
+# Concurrent PubMed harvesting over NCBI E-utilities
+# Queries run concurrently, efetch calls are split into PMID batches, and every
+# request goes through a shared token bucket so we stay under NCBI's limits.
+# efetch responses are parsed as they stream in, and iter_harvest() hands out
+# batches with backpressure so memory doesn't grow with the harvest size.
+
+import random
+import asyncio
+import time
+import xml.etree.ElementTree as ET
+from typing import AsyncIterator, Dict, List, Tuple
+
+import aiohttp
+
+from pubmed_parser import PubMedStreamParser, element_text
+
+
+EUTILS_URL = 'https://eutils.ncbi.nlm.nih.gov/entrez/eutils'
+
+# NCBI allows 3 requests/second per client, 10 with an API key
+RATE_LIMIT = 3
+RATE_LIMIT_WITH_KEY = 10
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+STREAM_CHUNK_BYTES = 64 * 1024
+
+_DONE = object()
+
+
+class TokenBucket:
+    """Async token bucket limiting requests per second"""
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncPubMedHarvester:
+    """Rate-limited concurrent PubMed client"""
+
+    def __init__(self, email: str, api_key: str = None, base_url: str = EUTILS_URL,
+                 efetch_batch_size: int = 200, max_connections: int = 10,
+                 max_retries: int = 4, backoff_seconds: float = 0.5,
+                 requests_per_second: float = None, timeout_seconds: float = 60):
+        self.email = email
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.efetch_batch_size = efetch_batch_size
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.timeout = aiohttp.ClientTimeout(total=timeout_seconds)
+        self.requests_per_second = requests_per_second or (RATE_LIMIT_WITH_KEY if api_key else RATE_LIMIT)
+        self.request_count = 0
+        self.retry_count = 0
+
+    async def _request(self, session: aiohttp.ClientSession, bucket: TokenBucket,
+                       endpoint: str, params: Dict, read=None):
+        """GET an E-utilities endpoint with rate limiting and retry/backoff
+
+        read(response) consumes the body; by default it is read into bytes.
+        """
+        params = dict(params, tool='research-ai-assistant', email=self.email)
+        if self.api_key:
+            params['api_key'] = self.api_key
+
+        for attempt in range(self.max_retries + 1):
+            await bucket.acquire()
+            self.request_count += 1
+            retry_after = None
+            try:
+                async with session.get(f"{self.base_url}/{endpoint}", params=params) as response:
+                    if response.status not in RETRY_STATUSES:
+                        response.raise_for_status()
+                        return await (read(response) if read else response.read())
+                    retry_after = response.headers.get('Retry-After')
+                    error = aiohttp.ClientResponseError(
+                        response.request_info, response.history,
+                        status=response.status, message=response.reason
+                    )
+            except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError) as e:
+                error = e
+
+            if attempt == self.max_retries:
+                raise error
+            self.retry_count += 1
+            delay = float(retry_after) if retry_after and retry_after.isdigit() else \
+                self.backoff_seconds * (2 ** attempt) * (1 + random.random())
+            await asyncio.sleep(delay)
+
+    async def search(self, session, bucket, query: str, max_results: int) -> List[str]:
+        """PMIDs matching a query"""
+        body = await self._request(session, bucket, 'esearch.fcgi', {
+            'db': 'pubmed', 'term': query, 'retmax': max_results, 'retmode': 'xml'
+        })
+        return [element_text(pmid) for pmid in ET.fromstring(body).findall('IdList/Id')]
+
+    async def fetch(self, session, bucket, pmids: List[str]) -> List[Dict]:
+        """Paper details for PMIDs, fetched in concurrent batches"""
+        batches = [pmids[i:i + self.efetch_batch_size] for i in range(0, len(pmids), self.efetch_batch_size)]
+        results = await asyncio.gather(*[self._fetch_batch(session, bucket, batch) for batch in batches])
+        return [paper for batch in results for paper in batch]
+
+    async def _fetch_batch(self, session, bucket, pmids: List[str]) -> List[Dict]:
+        return await self._request(session, bucket, 'efetch.fcgi', {
+            'db': 'pubmed', 'id': ','.join(pmids), 'retmode': 'xml'
+        }, read=self._read_articles)
+
+    @staticmethod
+    async def _read_articles(response) -> List[Dict]:
+        # Parse while the body streams in instead of buffering the whole XML
+        parser = PubMedStreamParser()
+        papers = []
+        async for chunk in response.content.iter_chunked(STREAM_CHUNK_BYTES):
+            papers.extend(parser.feed(chunk))
+        papers.extend(parser.close())
+        return papers
+
+    async def harvest_query(self, session, bucket, query: str, max_results: int) -> List[Dict]:
+        pmids = await self.search(session, bucket, query, max_results)
+        return await self.fetch(session, bucket, pmids) if pmids else []
+
+    def _session(self) -> aiohttp.ClientSession:
+        # One pooled session shared by every request of a harvest
+        connector = aiohttp.TCPConnector(limit=self.max_connections)
+        return aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+
+    async def harvest(self, queries: List[str], papers_per_query: int = 500,
+                      concurrent: bool = True) -> Dict[str, List[Dict]]:
+        """Papers for each query, keyed by query"""
+        bucket = TokenBucket(self.requests_per_second)
+        async with self._session() as session:
+            if concurrent:
+                results = await asyncio.gather(*[
+                    self.harvest_query(session, bucket, query, papers_per_query) for query in queries
+                ])
+            else:
+                results = []
+                for query in queries:
+                    pmids = await self.search(session, bucket, query, papers_per_query)
+                    papers = []
+                    for i in range(0, len(pmids), self.efetch_batch_size):
+                        papers.extend(await self._fetch_batch(session, bucket, pmids[i:i + self.efetch_batch_size]))
+                    results.append(papers)
+        return dict(zip(queries, results))
+
+    def harvest_sync(self, queries: List[str], papers_per_query: int = 500,
+                     concurrent: bool = True) -> Dict[str, List[Dict]]:
+        """Blocking wrapper around harvest() for Streamlit and scripts"""
+        return asyncio.run(self.harvest(queries, papers_per_query, concurrent))
+
+    async def iter_harvest(self, queries: List[str],
+                           papers_per_query: int = 500) -> AsyncIterator[Tuple[str, List[Dict]]]:
+        """Yield (query, papers) per efetch batch as soon as it is parsed
+
+        At most max_connections batches are in flight or waiting for the
+        consumer, so a slow consumer throttles fetching instead of letting
+        parsed papers pile up.
+        """
+        bucket = TokenBucket(self.requests_per_second)
+        slots = asyncio.Semaphore(self.max_connections)
+        ready = asyncio.Queue(maxsize=self.max_connections)
+
+        async def fetch_into_queue(session, query, pmids):
+            async with slots:
+                papers = await self._fetch_batch(session, bucket, pmids)
+                await ready.put((query, papers))
+
+        async def harvest_query(session, query):
+            pmids = await self.search(session, bucket, query, papers_per_query)
+            await asyncio.gather(*[
+                fetch_into_queue(session, query, pmids[i:i + self.efetch_batch_size])
+                for i in range(0, len(pmids), self.efetch_batch_size)
+            ])
+
+        async with self._session() as session:
+            async def produce():
+                try:
+                    await asyncio.gather(*[harvest_query(session, query) for query in queries])
+                    await ready.put(_DONE)
+                except Exception as e:
+                    await ready.put(e)
+
+            producer = asyncio.create_task(produce())
+            try:
+                while True:
+                    item = await ready.get()
+                    if item is _DONE:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    yield item
+            finally:
+                producer.cancel()
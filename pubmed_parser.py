@@ -0,0 +1,108 @@
+# PubMed efetch XML parsing
+# The streaming parsers yield one paper per <PubmedArticle> and clear parsed
+# elements right away, so memory stays flat regardless of response size.
+
+import re
+import xml.etree.ElementTree as ET
+from typing import BinaryIO, Dict, Iterator, List, Optional, Union
+
+
+def element_text(element: Optional[ET.Element]) -> str:
+    return ''.join(element.itertext()).strip() if element is not None else ''
+
+
+def parse_article(article: ET.Element) -> Dict:
+    """Convert a <PubmedArticle> element into a paper dict for SupabaseStorage.add_papers"""
+    citation = article.find('MedlineCitation')
+    info = citation.find('Article') if citation is not None else None
+    if info is None:
+        return None
+
+    abstract_parts = []
+    for part in info.findall('Abstract/AbstractText'):
+        label = part.get('Label')
+        text = element_text(part)
+        abstract_parts.append(f"{label}: {text}" if label else text)
+
+    authors = []
+    for author in info.findall('AuthorList/Author'):
+        if author.find('CollectiveName') is not None:
+            authors.append(element_text(author.find('CollectiveName')))
+        elif author.find('LastName') is not None:
+            authors.append(f"{element_text(author.find('LastName'))} {element_text(author.find('Initials'))}".strip())
+
+    pub_date = info.find('Journal/JournalIssue/PubDate')
+    year = element_text(pub_date.find('Year')) if pub_date is not None else ''
+    if not year and pub_date is not None:
+        match = re.search(r'\d{4}', element_text(pub_date.find('MedlineDate')))
+        year = match.group(0) if match else ''
+
+    doi = None
+    for article_id in article.findall('PubmedData/ArticleIdList/ArticleId'):
+        if article_id.get('IdType') == 'doi':
+            doi = element_text(article_id)
+    if not doi:
+        for location in info.findall('ELocationID'):
+            if location.get('EIdType') == 'doi':
+                doi = element_text(location)
+
+    return {
+        'pmid': element_text(citation.find('PMID')),
+        'doi': doi,
+        'title': element_text(info.find('ArticleTitle')),
+        'abstract': '\n'.join(abstract_parts),
+        'authors': authors,
+        'journal': element_text(info.find('Journal/Title')),
+        'year': year,
+        'keywords': [element_text(k) for k in citation.findall('KeywordList/Keyword')],
+        'source': 'pubmed'
+    }
+
+
+def parse_pubmed_xml(xml_bytes: bytes) -> List[Dict]:
+    """Parse an efetch response into paper dicts"""
+    root = ET.fromstring(xml_bytes)
+    papers = [parse_article(article) for article in root.iter('PubmedArticle')]
+    return [paper for paper in papers if paper]
+
+
+def iter_pubmed_articles(source: Union[str, BinaryIO]) -> Iterator[Dict]:
+    """Incrementally parse an efetch file (path or file object) into paper dicts"""
+    context = ET.iterparse(source, events=('start', 'end'))
+    _, root = next(context)
+    for event, element in context:
+        if event == 'end' and element.tag == 'PubmedArticle':
+            paper = parse_article(element)
+            # Drop everything parsed so far
+            root.clear()
+            if paper:
+                yield paper
+
+
+class PubMedStreamParser:
+    """Push parser for efetch responses that arrive in chunks"""
+
+    def __init__(self):
+        self._parser = ET.XMLPullParser(events=('start', 'end'))
+        self._root = None
+
+    def feed(self, chunk: bytes) -> List[Dict]:
+        """Papers completed by this chunk"""
+        self._parser.feed(chunk)
+        return self._drain()
+
+    def close(self) -> List[Dict]:
+        self._parser.close()
+        return self._drain()
+
+    def _drain(self) -> List[Dict]:
+        papers = []
+        for event, element in self._parser.read_events():
+            if event == 'start' and self._root is None:
+                self._root = element
+            elif event == 'end' and element.tag == 'PubmedArticle':
+                paper = parse_article(element)
+                self._root.clear()
+                if paper:
+                    papers.append(paper)
+        return papers
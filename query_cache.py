@@ -0,0 +1,86 @@
+# In-process caches for hot queries
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class LRUCache:
+    """Bounded least-recently-used cache with hit/miss counters"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key: Hashable, value: Any):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._data),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': f"{(self.hits / lookups * 100):.1f}%" if lookups else "0%"
+        }
+
+
+class TTLCache(LRUCache):
+    """LRU cache whose entries expire after ttl_seconds"""
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 300):
+        super().__init__(max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.invalidations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = super().get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            # Expired entries count as misses
+            with self._lock:
+                self.hits -= 1
+                self.misses += 1
+                self._data.pop(key, None)
+            return default
+        return value
+
+    def put(self, key: Hashable, value: Any):
+        super().put(key, (time.monotonic() + self.ttl_seconds, value))
+
+    def clear(self):
+        super().clear()
+        self.invalidations += 1
+
+    def stats(self):
+        stats = super().stats()
+        stats['invalidations'] = self.invalidations
+        return stats
@@ -3,17 +3,35 @@
 
 import os
 import json
-import pandas as pd
+import time
+import queue
+import asyncio
+import argparse
+import threading
 import numpy as np
 import streamlit as st
 from datetime import datetime
-import requests
-import weaviate
-from sentence_transformers import SentenceTransformer
-from supabase import create_client, Client
 from typing import List, Dict, Any
 import logging
 
+# weaviate, supabase, sentence_transformers and aiohttp are imported where
+# they're first needed, so importing this module (or printing the setup
+# guide) doesn't pay for them
+
+from embedding_cache import EmbeddingCache
+from encoders import encoder_cache_key, get_encoder
+from query_cache import LRUCache, TTLCache
+from vector_index import AttributeIndex, IVFIndex, PropertyStore
+from paper_stats import PaperStats
+from paper_search import PaperSearch
+from hybrid_search import HybridRetriever
+from passages import PassageChunker, aggregate_hits, passage_id
+from search_filters import SearchFilters
+from analytics import shared_analytics
+from bulk_ingest import BulkUpserter, summarize
+from dedup import collapse_repeats, shared_detector
+from tracing import serve_metrics, shared_tracer
+
 # Free services configuration
 class FreeCloudConfig:
     """Configuration for free cloud services"""
@@ -28,15 +46,110 @@ class FreeCloudConfig:
     
     # Email for PubMed (required for API access)
     PUBMED_EMAIL = os.getenv('PUBMED_EMAIL', 'your-email@university.edu')
+    
+    # Optional NCBI API key (raises the rate limit from 3 to 10 requests/sec)
+    NCBI_API_KEY = os.getenv('NCBI_API_KEY')
+    
+    # Papers per upsert while harvesting, and bulk upsert limits
+    INGEST_CHUNK_SIZE = int(os.getenv('INGEST_CHUNK_SIZE', '500'))
+    INGEST_MAX_BYTES = int(os.getenv('INGEST_MAX_BYTES', '2000000'))  # JSON payload per request
+    INGEST_WORKERS = int(os.getenv('INGEST_WORKERS', '4'))
+    INGEST_MAX_RETRIES = int(os.getenv('INGEST_MAX_RETRIES', '3'))
+    
+    # Near-duplicate detection at ingest (DOI/title match plus MinHash over title+abstract)
+    DEDUP_ENABLED = os.getenv('DEDUP_ENABLED', 'true').lower() == 'true'
+    DEDUP_DIR = os.getenv('DEDUP_DIR', '.cache/dedup')
+    DEDUP_THRESHOLD = float(os.getenv('DEDUP_THRESHOLD', '0.8'))  # estimated Jaccard similarity
+    
+    # Embedding model and batch size for SciBERT encoding
+    EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'allenai/scibert_scivocab_uncased')
+    EMBEDDING_BATCH_SIZE = int(os.getenv('EMBEDDING_BATCH_SIZE', '32'))
+    
+    # Encoder backend: 'torch', 'onnx' or 'onnx-int8' (quantized, fastest on CPU)
+    ENCODER_BACKEND = os.getenv('ENCODER_BACKEND', 'torch')
+    ENCODER_THREADS = int(os.getenv('ENCODER_THREADS', '0'))  # 0 = library default
+    ONNX_MODEL_DIR = os.getenv('ONNX_MODEL_DIR', '.cache/onnx')
+    
+    # On-disk embedding cache (set EMBEDDING_CACHE_MAX_MB=0 to disable)
+    EMBEDDING_CACHE_DIR = os.getenv('EMBEDDING_CACHE_DIR', '.cache/embeddings')
+    EMBEDDING_CACHE_MAX_MB = float(os.getenv('EMBEDDING_CACHE_MAX_MB', '512'))
+    
+    # In-process caches for repeated questions
+    QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv('QUERY_EMBEDDING_CACHE_SIZE', '1024'))
+    ANSWER_CACHE_SIZE = int(os.getenv('ANSWER_CACHE_SIZE', '256'))
+    ANSWER_CACHE_TTL = float(os.getenv('ANSWER_CACHE_TTL', '600'))
+    
+    # Seconds to cache corpus statistics
+    STATS_TTL = float(os.getenv('STATS_TTL', '30'))
+    
+    # Vector store backend: 'weaviate' (cloud) or 'local' (in-process IVF index)
+    VECTOR_BACKEND = os.getenv('VECTOR_BACKEND', 'weaviate')
+    LOCAL_INDEX_DIR = os.getenv('LOCAL_INDEX_DIR', '.cache/vector_index')
+    LOCAL_INDEX_NPROBE = int(os.getenv('LOCAL_INDEX_NPROBE', '8'))
+    # 'float16' or 'int8' searches a compact copy and re-scores the top hits exactly
+    LOCAL_INDEX_DTYPE = os.getenv('LOCAL_INDEX_DTYPE', 'float32')
+    LOCAL_INDEX_RESCORE = int(os.getenv('LOCAL_INDEX_RESCORE', '4'))  # candidates re-scored per hit
+    
+    # Passage-level indexing of long abstracts/full text (token-bounded, overlapping chunks)
+    PASSAGE_INDEXING = os.getenv('PASSAGE_INDEXING', 'true').lower() == 'true'
+    PASSAGE_MAX_TOKENS = int(os.getenv('PASSAGE_MAX_TOKENS', '256'))
+    PASSAGE_OVERLAP_TOKENS = int(os.getenv('PASSAGE_OVERLAP_TOKENS', '32'))
+    PASSAGE_MAX_CHUNKS = int(os.getenv('PASSAGE_MAX_CHUNKS', '8'))  # bounds vectors per paper
+    PASSAGE_SEARCH_OVERSAMPLE = int(os.getenv('PASSAGE_SEARCH_OVERSAMPLE', '3'))
+    # Searches the shared hybrid retriever runs in parallel before callers queue
+    SEARCH_CONCURRENCY = int(os.getenv('SEARCH_CONCURRENCY', '8'))
+    
+    # Port serving per-stage metrics at /metrics and /metrics.json (0 = off);
+    # spans are only recorded with TRACING_ENABLED=true
+    METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))
+    METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')  # 0.0.0.0 exposes it on every interface
+    
+    # Resume point for `python research_system.py index`
+    INDEXER_CHECKPOINT = os.getenv('INDEXER_CHECKPOINT', '.cache/indexer_checkpoint.json')
+    
+    # Watermarks for `python research_system.py sync` (needs migrations/004_change_tracking.sql)
+    SYNC_CHECKPOINT = os.getenv('SYNC_CHECKPOINT', '.cache/sync_checkpoint.json')
+    SYNC_BATCH_SIZE = int(os.getenv('SYNC_BATCH_SIZE', '100'))
+    # Sequence numbers re-read below each watermark, for transactions that committed late
+    SYNC_RESCAN_WINDOW = int(os.getenv('SYNC_RESCAN_WINDOW', '1000'))
+
+tracer = shared_tracer()
+
+# PostgREST / Postgres error codes for "column does not exist"
+MISSING_COLUMN_CODES = {'42703', 'PGRST204'}
+
+def normalize_query(query: str, lowercase: bool = True) -> str:
+    """Canonical form of a query for cache keys only (never sent to the encoder)"""
+    query = ' '.join(query.split())
+    return query.lower() if lowercase else query
 
 class SupabaseStorage:
     """Free PostgreSQL storage using Supabase"""
     
-    def __init__(self):
-        self.supabase: Client = create_client(
-            FreeCloudConfig.SUPABASE_URL,
-            FreeCloudConfig.SUPABASE_KEY
+    def __init__(self, client=None):
+        if client is None:
+            from supabase import create_client
+            client = create_client(
+                FreeCloudConfig.SUPABASE_URL,
+                FreeCloudConfig.SUPABASE_KEY
+            )
+        
+        self.supabase = client
+        self.stats = PaperStats(self.supabase, ttl_seconds=FreeCloudConfig.STATS_TTL)
+        self.analytics = shared_analytics()
+        self.text_search = PaperSearch(self.supabase)
+        self.upserter = BulkUpserter(
+            self.supabase,
+            on_conflict='pmid',
+            max_rows=FreeCloudConfig.INGEST_CHUNK_SIZE,
+            max_bytes=FreeCloudConfig.INGEST_MAX_BYTES,
+            max_workers=FreeCloudConfig.INGEST_WORKERS,
+            max_retries=FreeCloudConfig.INGEST_MAX_RETRIES
         )
+        self.dedup = shared_detector(
+            FreeCloudConfig.DEDUP_DIR, FreeCloudConfig.DEDUP_THRESHOLD
+        ) if FreeCloudConfig.DEDUP_ENABLED else None
+        self._change_tracking = None
         self.setup_tables()
     
     def setup_tables(self):
@@ -63,8 +176,38 @@ class SupabaseStorage:
         # This is handled in Supabase dashboard for simplicity
         pass
     
+    @property
+    def change_tracking(self) -> bool:
+        """Whether migrations/004_change_tracking.sql is applied (checked once)"""
+        if self._change_tracking is None:
+            try:
+                self.supabase.table('papers').select('change_seq').limit(1).execute()
+                self._change_tracking = True
+            except Exception as e:
+                if getattr(e, 'code', None) not in MISSING_COLUMN_CODES:
+                    raise
+                self._change_tracking = False
+        return self._change_tracking
+    
     def add_papers(self, papers: List[Dict]):
-        """Add papers to Supabase"""
+        """Add papers to Supabase; returns the number upserted"""
+        return self.upsert_papers(papers)['succeeded']
+    
+    def upsert_papers(self, papers: List[Dict]) -> Dict:
+        """Bulk upsert papers in chunks; returns the per-chunk report from BulkUpserter
+        
+        Duplicates of stored papers (same DOI or title under another PMID, or a
+        near-identical abstract) are skipped before upserting, so they never
+        reach the encoder; they're listed under report['duplicates'].
+        """
+        with tracer.span('ingest.upsert') as span:
+            report = self._upsert_papers(papers)
+            span.add(rows=report['succeeded'],
+                     bytes=sum(c['bytes'] for c in report['chunks']),
+                     round_trips=sum(c['attempts'] for c in report['chunks']))
+        return report
+    
+    def _upsert_papers(self, papers: List[Dict]) -> Dict:
         processed_papers = []
         
         for paper in papers:
@@ -77,71 +220,429 @@ class SupabaseStorage:
                 'journal': paper.get('journal'),
                 'year': int(paper.get('year')) if str(paper.get('year', '')).isdigit() else None,
                 'keywords': ', '.join(paper.get('keywords', [])) if paper.get('keywords') else None,
-                'source': paper.get('source', 'pubmed'),
-                'processed': False
+                'source': paper.get('source', 'pubmed')
             }
             processed_papers.append(processed_paper)
         
-        # Insert to Supabase (handles duplicates gracefully)
-        try:
-            result = self.supabase.table('papers').upsert(
-                processed_papers, 
-                on_conflict='pmid'
-            ).execute()
-            return len(result.data) if result.data else 0
-        except Exception as e:
-            st.error(f"Error adding papers: {e}")
-            return 0
+        # With change tracking, new rows default to unprocessed and the trigger
+        # clears processed only when content changed, so re-harvests of
+        # unchanged papers aren't re-indexed. Without it, every upserted row
+        # must be re-indexed or corrections would never reach the vectors.
+        if not self.change_tracking:
+            for processed_paper in processed_papers:
+                processed_paper['processed'] = False
+        
+        # Drop near-duplicates; re-upserting the same PMID is still allowed,
+        # but only once per upsert (Postgres rejects touching a row twice)
+        if self.dedup is not None:
+            with tracer.span('ingest.dedup', rows=len(processed_papers)):
+                processed_papers, duplicates = self.dedup.filter(processed_papers)
+        else:
+            processed_papers, duplicates = collapse_repeats(processed_papers, key=lambda paper: paper.get('pmid'))
+        
+        # Upsert to Supabase (handles duplicates gracefully); failed chunks
+        # are reported without losing the chunks that went through
+        report = self.upserter.upsert(processed_papers)
+        report['duplicates'] = duplicates
+        if report['succeeded']:
+            self.stats.invalidate()
+            # Upserted rows come back with their ids, so re-harvests re-count instead of double counting
+            self.analytics.update(report['data'])
+            if self.dedup is not None:
+                self.dedup.add(report['data'])
+        if report['failed']:
+            st.error(f"Error adding papers: {summarize(report)}")
+        return report
     
-    def get_unprocessed_papers(self, limit: int = 100):
-        """Get papers that need processing"""
-        result = self.supabase.table('papers').select('*').eq('processed', False).limit(limit).execute()
+    def get_unprocessed_papers(self, limit: int = 100, after_id: int = None):
+        """Get papers that need processing, ordered by id
+        
+        Pass the last id of the previous page as after_id to page through the
+        backlog with keyset pagination.
+        """
+        query = self.supabase.table('papers').select('*').eq('processed', False)
+        if after_id is not None:
+            query = query.gt('id', after_id)
+        result = query.order('id').limit(limit).execute()
         return result.data if result.data else []
     
-    def mark_as_processed(self, paper_ids: List[int]):
+    def count_unprocessed(self) -> int:
+        """Number of papers still waiting to be processed"""
+        result = self.supabase.table('papers').select('id', count='exact').eq('processed', False).limit(1).execute()
+        return result.count or 0
+    
+    def mark_as_processed(self, paper_ids: List[int], chunk_size: int = 200):
         """Mark papers as processed"""
-        for paper_id in paper_ids:
-            self.supabase.table('papers').update({'processed': True}).eq('id', paper_id).execute()
+        # One UPDATE per chunk; chunking keeps the id list within URL limits
+        with tracer.span('ingest.mark_processed', rows=len(paper_ids)) as span:
+            for i in range(0, len(paper_ids), chunk_size):
+                chunk = paper_ids[i:i + chunk_size]
+                self.supabase.table('papers').update({'processed': True}).in_('id', chunk).execute()
+                span.add(round_trips=1)
+        self.stats.invalidate()
+    
+    def reset_processed(self, page_size: int = 1000) -> int:
+        """Mark every processed paper unprocessed, so the next index run re-embeds it"""
+        reset = 0
+        while True:
+            # Updated rows leave the filter, so each page starts from the top again
+            ids = [row['id'] for row in self.supabase.table('papers').select('id')
+                   .eq('processed', True).order('id').limit(page_size).execute().data or []]
+            if not ids:
+                break
+            self.supabase.table('papers').update({'processed': False}).in_('id', ids).execute()
+            reset += len(ids)
+        self.stats.invalidate()
+        return reset
+    
+    def get_changed_papers(self, after_seq: int = None, limit: int = 100, until_seq: int = None,
+                           unprocessed_only: bool = False) -> List[Dict]:
+        """Papers inserted or edited after change_seq after_seq (up to until_seq), in change order"""
+        with tracer.span('sync.fetch_changes', round_trips=1) as span:
+            query = self.supabase.table('papers').select('*').gt('change_seq', after_seq or 0)
+            if until_seq is not None:
+                query = query.lte('change_seq', until_seq)
+            if unprocessed_only:
+                query = query.eq('processed', False)
+            result = query.order('change_seq').limit(limit).execute()
+            span.add(rows=len(result.data or []))
+        return result.data if result.data else []
+    
+    def get_deletions(self, after_seq: int = None, limit: int = 100) -> List[Dict]:
+        """Tombstones (seq, paper_id) of papers deleted after seq after_seq"""
+        with tracer.span('sync.fetch_deletions', round_trips=1) as span:
+            result = (
+                self.supabase.table('paper_deletions').select('seq,paper_id')
+                .gt('seq', after_seq or 0)
+                .order('seq')
+                .limit(limit)
+                .execute()
+            )
+            span.add(rows=len(result.data or []))
+        return result.data if result.data else []
     
     def get_paper_by_id(self, paper_id: int):
         """Get specific paper"""
         result = self.supabase.table('papers').select('*').eq('id', paper_id).execute()
         return result.data[0] if result.data else None
     
-    def search_papers_text(self, query: str, limit: int = 10):
-        """Text-based search in papers"""
-        # Supabase supports full-text search
-        result = self.supabase.table('papers').select('*').text_search(
-            'title', query
-        ).limit(limit).execute()
-        return result.data if result.data else []
+    def get_papers_by_ids(self, paper_ids: List[int], columns: str = '*') -> List[Dict]:
+        """Get several papers in one request, in the order of paper_ids"""
+        unique_ids = list(dict.fromkeys(pid for pid in paper_ids if pid is not None))
+        if not unique_ids:
+            return []
+        
+        # The id column is needed to restore the requested order
+        if columns != '*' and 'id' not in [c.strip() for c in columns.split(',')]:
+            columns = f"id,{columns}"
+        
+        with tracer.span('answer.hydrate', round_trips=1) as span:
+            result = self.supabase.table('papers').select(columns).in_('id', unique_ids).execute()
+            span.add(rows=len(result.data or []))
+        by_id = {row['id']: row for row in (result.data or [])}
+        return [by_id[pid] for pid in unique_ids if pid in by_id]
+    
+    def search_papers_text(self, query: str, limit: int = 10, filters: SearchFilters = None):
+        """Ranked full-text search over title, keywords and abstract"""
+        with tracer.span('answer.lexical_search', round_trips=1) as span:
+            results = self.text_search.search(query, limit, filters)
+            span.add(rows=len(results))
+        return results
     
     def get_stats(self):
         """Get database statistics"""
-        total_result = self.supabase.table('papers').select('id', count='exact').execute()
-        processed_result = self.supabase.table('papers').select('id', count='exact').eq('processed', True).execute()
-        
-        total = total_result.count if hasattr(total_result, 'count') else 0
-        processed = processed_result.count if hasattr(processed_result, 'count') else 0
-        
+        return self.stats.get()
+
+class VectorStorage:
+    """Base class for vector store backends
+    
+    Handles embedding (batching, caching) and passage chunking; backends
+    implement write_papers/search_by_vector/delete_papers and their passage
+    counterparts.
+    """
+    
+    backend_name = 'base'
+    remote = False  # whether searches are network round trips
+    # Set when opening the store added filter properties that objects
+    # indexed earlier lack; the corpus must be re-indexed to fill them in
+    backfill_required = False
+    
+    def __init__(self, encoder=None, batch_size: int = None, embedding_cache=None, chunker=None):
+        # The encoder, embedding cache and chunker are built on first use, so
+        # constructing a store doesn't load the model.
+        # Pass embedding_cache=False to always encode, chunker=False to index
+        # whole papers only.
+        self._encoder = encoder
+        self._embedding_cache = embedding_cache
+        self._chunker = chunker
+        self._lazy_lock = threading.Lock()
+        self.batch_size = batch_size or FreeCloudConfig.EMBEDDING_BATCH_SIZE
+        self.query_embeddings = LRUCache(FreeCloudConfig.QUERY_EMBEDDING_CACHE_SIZE)
+    
+    @property
+    def encoder(self):
+        """Sentence encoder (the process-wide shared one unless injected)"""
+        if self._encoder is None:
+            self._encoder = get_encoder(
+                FreeCloudConfig.EMBEDDING_MODEL,
+                FreeCloudConfig.ENCODER_BACKEND,
+                FreeCloudConfig.ENCODER_THREADS,
+                FreeCloudConfig.ONNX_MODEL_DIR
+            )
+        return self._encoder
+    
+    @property
+    def embedding_dim(self) -> int:
+        return self.encoder.get_sentence_embedding_dimension()
+    
+    @property
+    def embedding_cache(self):
+        with self._lazy_lock:
+            if self._embedding_cache is None:
+                self._embedding_cache = EmbeddingCache.from_config(
+                    FreeCloudConfig.EMBEDDING_CACHE_DIR,
+                    encoder_cache_key(FreeCloudConfig.EMBEDDING_MODEL, FreeCloudConfig.ENCODER_BACKEND),
+                    self.embedding_dim,
+                    FreeCloudConfig.EMBEDDING_CACHE_MAX_MB
+                ) or False
+        return self._embedding_cache or None
+    
+    @property
+    def passages_enabled(self) -> bool:
+        """Whether passages are indexed, known without loading the model"""
+        if self._chunker is None:
+            return FreeCloudConfig.PASSAGE_INDEXING
+        return bool(self._chunker)
+    
+    @property
+    def chunker(self):
+        if self._chunker is None:
+            self._chunker = PassageChunker.from_encoder(
+                self.encoder,
+                FreeCloudConfig.PASSAGE_MAX_TOKENS,
+                FreeCloudConfig.PASSAGE_OVERLAP_TOKENS,
+                FreeCloudConfig.PASSAGE_MAX_CHUNKS
+            ) if FreeCloudConfig.PASSAGE_INDEXING else False
+        return self._chunker or None
+    
+    @staticmethod
+    def build_doc_text(paper: Dict) -> str:
+        """Create document text for embedding"""
+        return f"""
+                Title: {paper.get('title', '')}
+                Abstract: {paper.get('abstract', '')}
+                Authors: {paper.get('authors', '')}
+                Keywords: {paper.get('keywords', '')}
+                """.strip()
+    
+    @staticmethod
+    def paper_properties(paper: Dict) -> Dict:
+        """Properties stored alongside each paper vector"""
+        return {
+            "paper_id": paper.get('id'),
+            "title": paper.get('title', ''),
+            "abstract": (paper.get('abstract') or '')[:1000],  # Limit length
+            "authors": paper.get('authors', ''),
+            "journal": paper.get('journal', ''),
+            "year": paper.get('year') or 0,
+            "source": paper.get('source') or '',
+            "relevance_score": 1.0
+        }
+    
+    @staticmethod
+    def format_hit(properties: Dict, distance: float) -> Dict:
+        """Search hit in the format every backend returns"""
         return {
-            'total_papers': total,
-            'processed_papers': processed,
-            'processing_progress': f"{(processed/total*100):.1f}%" if total > 0 else "0%"
+            'paper_id': properties.get('paper_id'),
+            'title': properties.get('title'),
+            'authors': properties.get('authors'),
+            'journal': properties.get('journal'),
+            'year': properties.get('year'),
+            'distance': distance,
+            'relevance_score': 1 - distance
         }
+    
+    @classmethod
+    def format_passage_hit(cls, properties: Dict, distance: float) -> Dict:
+        """Passage hit: a paper hit plus the matching passage"""
+        return dict(
+            cls.format_hit(properties, distance),
+            chunk_index=properties.get('chunk_index'),
+            passage=properties.get('text')
+        )
+    
+    def encode_texts(self, texts: List[str]) -> np.ndarray:
+        """Encode texts in batches into a normalized float32 matrix"""
+        if not self.embedding_cache:
+            return self._encode(texts)
+        
+        # Only encode texts the cache hasn't seen
+        cached = self.embedding_cache.get_many(texts)
+        missing = [i for i, vector in enumerate(cached) if vector is None]
+        if missing:
+            fresh = self._encode([texts[i] for i in missing])
+            self.embedding_cache.put_many([texts[i] for i in missing], fresh)
+            self.embedding_cache.flush()
+            for i, vector in zip(missing, fresh):
+                cached[i] = vector
+        
+        return np.vstack(cached).astype(np.float32, copy=False)
+    
+    def encode_query(self, query: str) -> np.ndarray:
+        """Embedding for a search query, memoized in-process"""
+        # Case variants share an entry only when the tokenizer lowercases anyway
+        tokenizer = getattr(self.encoder, 'tokenizer', None)
+        key = normalize_query(query, lowercase=bool(getattr(tokenizer, 'do_lower_case', False)))
+        embedding = self.query_embeddings.get(key)
+        if embedding is None:
+            with tracer.span('answer.query_encode'):
+                embedding = self.encode_texts([query])[0]
+            self.query_embeddings.put(key, embedding)
+        return embedding
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        embeddings = self.encoder.encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+        return np.asarray(embeddings, dtype=np.float32)
+    
+    def embed_papers(self, papers: List[Dict]) -> np.ndarray:
+        """Embed a chunk of papers in one batched call"""
+        doc_texts = [self.build_doc_text(paper) for paper in papers]
+        return self.encode_texts(doc_texts)
+    
+    def embed_passages(self, papers: List[Dict]):
+        """Passages of the papers' long texts and their embeddings"""
+        passages = [passage for paper in papers for passage in self.chunker.paper_passages(paper)]
+        if not passages:
+            return [], np.zeros((0, self.embedding_dim), dtype=np.float32)
+        return passages, self.encode_texts([passage['text'] for passage in passages])
+    
+    def encode_batch(self, papers: List[Dict]) -> Dict:
+        """Everything write_batch needs: paper vectors and, if enabled, passage vectors"""
+        with tracer.span('ingest.encode', rows=len(papers)):
+            encoded = {'papers': self.embed_papers(papers)}
+            if self.passages_enabled:
+                encoded['passages'], encoded['passage_embeddings'] = self.embed_passages(papers)
+        return encoded
+    
+    def write_batch(self, papers: List[Dict], encoded: Dict):
+        """Write the output of encode_batch"""
+        with tracer.span('ingest.vector_write', rows=len(papers), bytes=encoded['papers'].nbytes):
+            self.write_papers(papers, encoded['papers'])
+        if self.passages_enabled:
+            # A re-indexed paper may now split into fewer passages; drop the
+            # leftover chunks (the rest are overwritten in place)
+            chunk_counts = dict.fromkeys((paper['id'] for paper in papers), 0)
+            for passage in encoded.get('passages') or []:
+                chunk_counts[passage['paper_id']] += 1
+            with tracer.span('ingest.passage_prune', rows=len(papers), round_trips=int(self.remote)):
+                self.delete_passages(list(chunk_counts), from_chunk=chunk_counts)
+        if encoded.get('passages'):
+            with tracer.span('ingest.passage_write', rows=len(encoded['passages']),
+                             bytes=encoded['passage_embeddings'].nbytes):
+                self.write_passages(encoded['passages'], encoded['passage_embeddings'])
+    
+    def add_papers(self, papers: List[Dict]):
+        """Add papers with embeddings to the vector store"""
+        if not papers:
+            return
+        self.write_batch(papers, self.encode_batch(papers))
+    
+    def remove_papers(self, paper_ids: List[int]):
+        """Remove papers and their passages from the vector store"""
+        if not paper_ids:
+            return
+        with tracer.span('sync.vector_delete', rows=len(paper_ids), round_trips=int(self.remote)):
+            self.delete_papers(paper_ids)
+            if self.passages_enabled:
+                self.delete_passages(paper_ids)
+    
+    def write_papers(self, papers: List[Dict], embeddings: np.ndarray):
+        """Write papers with precomputed embeddings"""
+        raise NotImplementedError
+    
+    def write_passages(self, passages: List[Dict], embeddings: np.ndarray):
+        """Write passages (from PassageChunker.paper_passages) with precomputed embeddings"""
+        raise NotImplementedError
+    
+    def delete_papers(self, paper_ids: List[int]):
+        """Delete paper vectors (ids not in the store are ignored)"""
+        raise NotImplementedError
+    
+    def delete_passages(self, paper_ids: List[int], from_chunk: Dict[int, int] = None):
+        """Delete the papers' passages, or only chunks from from_chunk[paper_id] on"""
+        raise NotImplementedError
+    
+    def search_by_vector(self, query_embedding: np.ndarray, limit: int = 10,
+                         filters: SearchFilters = None) -> List[Dict]:
+        """Nearest papers to an embedding among those passing the filters"""
+        raise NotImplementedError
+    
+    def search_passages_by_vector(self, query_embedding: np.ndarray, limit: int = 10,
+                                  filters: SearchFilters = None) -> List[Dict]:
+        """Nearest passages to an embedding among those passing the filters"""
+        raise NotImplementedError
+    
+    def search_papers(self, query: str, limit: int = 10, filters: SearchFilters = None):
+        """Semantic search for papers, optionally filtered by year, journal and source
+        
+        With passage indexing, passage hits are folded into their papers so a
+        paper matched deep in a long abstract still ranks.
+        """
+        filters = SearchFilters.coerce(filters)
+        query_embedding = self.encode_query(query)
+        with tracer.span('answer.vector_search', round_trips=int(self.remote)) as span:
+            hits = self.search_by_vector(query_embedding, limit, filters)
+            span.add(rows=len(hits))
+        if not self.passages_enabled:
+            return hits
+        with tracer.span('answer.passage_search', round_trips=int(self.remote)) as span:
+            passage_hits = self.search_passages_by_vector(
+                query_embedding, limit * FreeCloudConfig.PASSAGE_SEARCH_OVERSAMPLE, filters
+            )
+            span.add(rows=len(passage_hits))
+        return aggregate_hits(hits + passage_hits, limit)
+
+# Exact-match (field tokenized) so source and journal filters compare whole
+# values; "journal" itself stays word-tokenized for text search
+SOURCE_PROPERTY = {
+    "name": "source",
+    "dataType": ["text"],
+    "tokenization": "field",
+    "description": "Where the paper was harvested from"
+}
+JOURNAL_EXACT_PROPERTY = {
+    "name": "journal_exact",
+    "dataType": ["text"],
+    "tokenization": "field",
+    "description": "Journal name, matched whole by filters"
+}
+FILTER_PROPERTIES = [SOURCE_PROPERTY, JOURNAL_EXACT_PROPERTY]
 
-class WeaviateVectorStorage:
+class WeaviateVectorStorage(VectorStorage):
     """Free vector storage using Weaviate Cloud"""
     
-    def __init__(self):
-        # Connect to Weaviate Cloud (free tier)
-        self.client = weaviate.Client(
-            url=FreeCloudConfig.WEAVIATE_URL,
-            auth_client_secret=weaviate.AuthApiKey(api_key=FreeCloudConfig.WEAVIATE_API_KEY)
-        )
+    backend_name = 'Weaviate (Free)'
+    remote = True
+    
+    def __init__(self, client=None, encoder=None, batch_size: int = None, embedding_cache=None, chunker=None):
+        # Connect to Weaviate Cloud (free tier) unless a client is injected
+        if client is None:
+            import weaviate
+            client = weaviate.Client(
+                url=FreeCloudConfig.WEAVIATE_URL,
+                auth_client_secret=weaviate.AuthApiKey(api_key=FreeCloudConfig.WEAVIATE_API_KEY)
+            )
+        self.client = client
         
-        self.encoder = SentenceTransformer('allenai/scibert_scivocab_uncased')
+        super().__init__(encoder, batch_size, embedding_cache, chunker)
         self.class_name = "ResearchPaper"
+        self.passage_class_name = "ResearchPassage"
         self.setup_schema()
     
     def setup_schema(self):
@@ -181,6 +682,7 @@ class WeaviateVectorStorage:
                     "dataType": ["int"],
                     "description": "Publication year"
                 },
+                *FILTER_PROPERTIES,
                 {
                     "name": "relevance_score",
                     "dataType": ["number"],
@@ -189,109 +691,373 @@ class WeaviateVectorStorage:
             ]
         }
         
-        # Create class if it doesn't exist
+        # Create class if it doesn't exist; older classes gain the filter properties
         if not self.client.schema.exists(self.class_name):
             self.client.schema.create_class(schema)
-    
-    def add_papers(self, papers: List[Dict]):
-        """Add papers with embeddings to Weaviate"""
+        else:
+            for prop in FILTER_PROPERTIES:
+                if self.ensure_property(self.class_name, prop):
+                    self.backfill_required = True
         
+        if self.passages_enabled and not self.client.schema.exists(self.passage_class_name):
+            self.client.schema.create_class({
+                "class": self.passage_class_name,
+                "description": "Overlapping passages of long paper texts",
+                "vectorizer": "none",
+                "properties": [
+                    {"name": "paper_id", "dataType": ["int"], "description": "Parent paper ID"},
+                    {"name": "chunk_index", "dataType": ["int"], "description": "Position of the passage in the paper"},
+                    {"name": "text", "dataType": ["text"], "description": "Passage text"},
+                    {"name": "title", "dataType": ["text"], "description": "Paper title"},
+                    {"name": "authors", "dataType": ["text"], "description": "Paper authors"},
+                    {"name": "journal", "dataType": ["text"], "description": "Journal name"},
+                    {"name": "year", "dataType": ["int"], "description": "Publication year"},
+                    *FILTER_PROPERTIES
+                ]
+            })
+        elif self.passages_enabled:
+            for prop in FILTER_PROPERTIES:
+                if self.ensure_property(self.passage_class_name, prop):
+                    self.backfill_required = True
+    
+    def ensure_property(self, class_name: str, prop: Dict) -> bool:
+        """Add a property to an existing class, True if it was missing
+
+        Objects indexed before it lack the value, so filters on it skip them
+        until they are re-indexed.
+        """
+        existing = self.client.schema.get(class_name).get('properties', [])
+        if prop['name'] in {p['name'] for p in existing}:
+            return False
+        self.client.schema.property.create(class_name, prop)
+        return True
+    
+    def paper_uuid(self, paper_id: int) -> str:
+        """Deterministic object UUID so re-indexing a paper overwrites it"""
+        from weaviate.util import generate_uuid5
+        return generate_uuid5(paper_id, self.class_name)
+    
+    def passage_uuid(self, paper_id: int, chunk_index: int) -> str:
+        from weaviate.util import generate_uuid5
+        return generate_uuid5(f"{paper_id}:{chunk_index}", self.passage_class_name)
+    
+    def write_papers(self, papers: List[Dict], embeddings: np.ndarray):
+        """Write papers with precomputed embeddings to Weaviate"""
+        self.client.batch.configure(batch_size=self.batch_size)
         with self.client.batch as batch:
-            for paper in papers:
-                # Create document text for embedding
-                doc_text = f"""
-                Title: {paper.get('title', '')}
-                Abstract: {paper.get('abstract', '')}
-                Authors: {paper.get('authors', '')}
-                Keywords: {paper.get('keywords', '')}
-                """.strip()
-                
-                # Create embedding
-                embedding = self.encoder.encode(doc_text).tolist()
-                
-                # Prepare properties
-                properties = {
-                    "paper_id": paper.get('id'),
-                    "title": paper.get('title', ''),
-                    "abstract": paper.get('abstract', '')[:1000],  # Limit length
-                    "authors": paper.get('authors', ''),
-                    "journal": paper.get('journal', ''),
-                    "year": paper.get('year') or 0,
-                    "relevance_score": 1.0
-                }
-                
+            for paper, embedding in zip(papers, embeddings):
                 # Add to batch
+                properties = self.paper_properties(paper)
                 batch.add_data_object(
-                    data_object=properties,
+                    data_object=dict(properties, journal_exact=properties['journal'] or ''),
                     class_name=self.class_name,
+                    uuid=self.paper_uuid(paper.get('id')),
                     vector=embedding
                 )
     
-    def search_papers(self, query: str, limit: int = 10):
-        """Semantic search for papers"""
-        # Create query embedding
-        query_embedding = self.encoder.encode(query).tolist()
-        
-        # Search in Weaviate
-        result = (
+    def write_passages(self, passages: List[Dict], embeddings: np.ndarray):
+        """Write passages with precomputed embeddings to Weaviate"""
+        self.client.batch.configure(batch_size=self.batch_size)
+        with self.client.batch as batch:
+            for passage, embedding in zip(passages, embeddings):
+                batch.add_data_object(
+                    data_object=dict(passage, journal_exact=passage.get('journal') or ''),
+                    class_name=self.passage_class_name,
+                    uuid=self.passage_uuid(passage['paper_id'], passage['chunk_index']),
+                    vector=embedding
+                )
+    
+    def _delete_where(self, class_name: str, operands: List[Dict], chunk_size: int = 100):
+        """Batch-delete objects matching any of the operands, one request per chunk"""
+        for i in range(0, len(operands), chunk_size):
+            chunk = operands[i:i + chunk_size]
+            where = chunk[0] if len(chunk) == 1 else {"operator": "Or", "operands": chunk}
+            self.client.batch.delete_objects(class_name=class_name, where=where)
+    
+    def delete_papers(self, paper_ids: List[int]):
+        """Delete paper objects from Weaviate"""
+        self._delete_where(self.class_name, [
+            {"path": ["paper_id"], "operator": "Equal", "valueInt": int(pid)} for pid in paper_ids
+        ])
+    
+    def delete_passages(self, paper_ids: List[int], from_chunk: Dict[int, int] = None):
+        """Delete the papers' passage objects (or their chunks past from_chunk) from Weaviate"""
+        operands = []
+        for pid in paper_ids:
+            operand = {"path": ["paper_id"], "operator": "Equal", "valueInt": int(pid)}
+            start = (from_chunk or {}).get(pid, 0)
+            if start:
+                operand = {"operator": "And", "operands": [
+                    operand, {"path": ["chunk_index"], "operator": "GreaterThanEqual", "valueInt": start}
+                ]}
+            operands.append(operand)
+        self._delete_where(self.passage_class_name, operands)
+    
+    def _near_vector(self, class_name: str, properties: List[str], query_embedding: np.ndarray, limit: int,
+                     filters: SearchFilters = None) -> List[Dict]:
+        """Objects nearest to an embedding, with the filters pushed down as a where-clause"""
+        query = (
             self.client.query
-            .get(self.class_name, ["paper_id", "title", "authors", "journal", "year"])
-            .with_near_vector({"vector": query_embedding})
-            .with_limit(limit)
-            .with_additional(["distance"])
-            .do()
+            .get(class_name, properties)
+            .with_near_vector({"vector": np.asarray(query_embedding).tolist()})
+        )
+        if filters:
+            query = query.with_where(filters.weaviate_where())
+        result = query.with_limit(limit).with_additional(["distance"]).do()
+        return result.get('data', {}).get('Get', {}).get(class_name, [])
+    
+    def search_passages_by_vector(self, query_embedding: np.ndarray, limit: int = 10,
+                                  filters: SearchFilters = None) -> List[Dict]:
+        """Near-vector search over passages in Weaviate"""
+        passages = self._near_vector(
+            self.passage_class_name,
+            ["paper_id", "chunk_index", "text", "title", "authors", "journal", "year", "source"],
+            query_embedding, limit, filters
+        )
+        return [
+            self.format_passage_hit(passage, passage.get('_additional', {}).get('distance', 1.0))
+            for passage in passages[:limit]
+        ]
+    
+    def search_by_vector(self, query_embedding: np.ndarray, limit: int = 10,
+                         filters: SearchFilters = None) -> List[Dict]:
+        """Near-vector search in Weaviate"""
+        papers = self._near_vector(
+            self.class_name, ["paper_id", "title", "authors", "journal", "year", "source"],
+            query_embedding, limit, filters
         )
-        
-        papers = result.get('data', {}).get('Get', {}).get(self.class_name, [])
         
         # Convert to consistent format
-        formatted_papers = []
-        for paper in papers:
-            formatted_papers.append({
-                'paper_id': paper.get('paper_id'),
-                'title': paper.get('title'),
-                'authors': paper.get('authors'),
-                'journal': paper.get('journal'),
-                'year': paper.get('year'),
-                'distance': paper.get('_additional', {}).get('distance', 1.0),
-                'relevance_score': 1 - paper.get('_additional', {}).get('distance', 1.0)
-            })
-        
-        return formatted_papers
+        return [
+            self.format_hit(paper, paper.get('_additional', {}).get('distance', 1.0))
+            for paper in papers[:limit]
+        ]
+
+class LocalVectorStorage(VectorStorage):
+    """In-process vector storage backed by a memory-mapped IVF index"""
+    
+    backend_name = 'Local IVF index'
+    
+    def __init__(self, index_dir: str = None, encoder=None, batch_size: int = None, embedding_cache=None,
+                 chunker=None):
+        super().__init__(encoder, batch_size, embedding_cache, chunker)
+        self.index_dir = index_dir or FreeCloudConfig.LOCAL_INDEX_DIR
+        self._stores = None
+    
+    def _open(self) -> Dict:
+        # The index dimension comes from the model, so open on first use
+        with self._lazy_lock:
+            if self._stores is None:
+                stores = {
+                    'index': self._open_index(self.index_dir),
+                    'properties': PropertyStore(os.path.join(self.index_dir, 'properties.jsonl'))
+                }
+                stores['attributes'] = self._attribute_index(stores['index'], stores['properties'])
+                if self.passages_enabled:
+                    passage_dir = os.path.join(self.index_dir, 'passages')
+                    stores['passage_index'] = self._open_index(passage_dir)
+                    stores['passage_properties'] = PropertyStore(os.path.join(passage_dir, 'properties.jsonl'))
+                    stores['passage_attributes'] = self._attribute_index(
+                        stores['passage_index'], stores['passage_properties']
+                    )
+                self._stores = stores
+        return self._stores
+    
+    def _open_index(self, path: str) -> IVFIndex:
+        return IVFIndex(
+            path,
+            self.embedding_dim,
+            nprobe=FreeCloudConfig.LOCAL_INDEX_NPROBE,
+            dtype=FreeCloudConfig.LOCAL_INDEX_DTYPE,
+            rescore_factor=FreeCloudConfig.LOCAL_INDEX_RESCORE
+        )
+    
+    @staticmethod
+    def _attribute_index(index: IVFIndex, properties: PropertyStore) -> AttributeIndex:
+        """Filter columns for an index, rebuilt from its stored properties"""
+        attributes = AttributeIndex()
+        stored = [(index.rows[pid], props) for pid, props in properties.records.items() if pid in index.rows]
+        attributes.set([row for row, _ in stored], [props for _, props in stored])
+        return attributes
+    
+    @property
+    def index(self) -> IVFIndex:
+        return self._open()['index']
+    
+    @property
+    def properties(self) -> PropertyStore:
+        return self._open()['properties']
+    
+    @property
+    def passage_index(self) -> IVFIndex:
+        return self._open()['passage_index']
+    
+    @property
+    def passage_properties(self) -> PropertyStore:
+        return self._open()['passage_properties']
+    
+    def write_papers(self, papers: List[Dict], embeddings: np.ndarray):
+        """Insert papers into the local index (re-adding a paper overwrites it)"""
+        ids = [paper['id'] for paper in papers]
+        properties = [self.paper_properties(paper) for paper in papers]
+        rows = self.index.add(ids, embeddings)
+        self.properties.put_many(ids, properties)
+        self._open()['attributes'].set(rows, properties)
+        self.index.save()
+    
+    def write_passages(self, passages: List[Dict], embeddings: np.ndarray):
+        """Insert passages into the local passage index"""
+        ids = [passage_id(p['paper_id'], p['chunk_index']) for p in passages]
+        rows = self.passage_index.add(ids, embeddings)
+        self.passage_properties.put_many(ids, passages)
+        self._open()['passage_attributes'].set(rows, passages)
+        self.passage_index.save()
+    
+    def delete_papers(self, paper_ids: List[int]):
+        """Remove papers from the local index"""
+        self.index.remove(paper_ids)
+        self.properties.delete_many(paper_ids)
+        self.index.save()
+    
+    def delete_passages(self, paper_ids: List[int], from_chunk: Dict[int, int] = None):
+        """Remove the papers' passages (or their chunks past from_chunk) from the local passage index"""
+        # Chunk indexes of a paper run 0, 1, 2, ... so stop at the first gap
+        ids = []
+        for pid in paper_ids:
+            chunk_index = (from_chunk or {}).get(pid, 0)
+            while passage_id(pid, chunk_index) in self.passage_index.rows:
+                ids.append(passage_id(pid, chunk_index))
+                chunk_index += 1
+        if ids:
+            self.passage_index.remove(ids)
+            self.passage_properties.delete_many(ids)
+            self.passage_index.save()
+    
+    def _allowed(self, index: IVFIndex, attributes: str, filters: SearchFilters):
+        """Row bitmap for the filters, or None to search everything"""
+        if not filters:
+            return None
+        return self._open()[attributes].mask(filters, len(index))
+    
+    def search_passages_by_vector(self, query_embedding: np.ndarray, limit: int = 10,
+                                  filters: SearchFilters = None) -> List[Dict]:
+        """Approximate nearest-neighbour search over local passages"""
+        allowed = self._allowed(self.passage_index, 'passage_attributes', filters)
+        ids, scores = self.passage_index.search(query_embedding, limit, allowed=allowed)
+        return [
+            self.format_passage_hit(self.passage_properties.get(pid) or {}, float(1 - score))
+            for pid, score in zip(ids, scores)
+        ]
+    
+    def search_by_vector(self, query_embedding: np.ndarray, limit: int = 10,
+                         filters: SearchFilters = None) -> List[Dict]:
+        """Approximate nearest-neighbour search in the local index, pre-filtered by row bitmap"""
+        allowed = self._allowed(self.index, 'attributes', filters)
+        ids, scores = self.index.search(query_embedding, limit, allowed=allowed)
+        return [
+            self.format_hit(self.properties.get(pid) or {'paper_id': int(pid)}, float(1 - score))
+            for pid, score in zip(ids, scores)
+        ]
+
+def create_vector_storage() -> VectorStorage:
+    """Vector storage for the configured VECTOR_BACKEND"""
+    backends = {
+        'weaviate': WeaviateVectorStorage,
+        'local': LocalVectorStorage
+    }
+    backend = FreeCloudConfig.VECTOR_BACKEND.lower()
+    if backend not in backends:
+        raise ValueError(f"Unknown VECTOR_BACKEND '{backend}' (expected one of {', '.join(backends)})")
+    return backends[backend]()
 
 class FreeResearchAI:
     """Complete research AI using only free services"""
     
-    def __init__(self):
-        self.paper_storage = SupabaseStorage()
-        self.vector_storage = WeaviateVectorStorage()
+    # Columns rendered for each answer source
+    SOURCE_COLUMNS = 'id,title,authors,journal,year,abstract,pmid'
+    
+    def __init__(self, paper_storage: SupabaseStorage = None, vector_storage: VectorStorage = None):
+        self.paper_storage = paper_storage or SupabaseStorage()
+        self.vector_storage = vector_storage or create_vector_storage()
+        self.retriever = HybridRetriever(
+            self.paper_storage.search_papers_text,
+            self.vector_storage.search_papers,
+            hydrate=lambda ids: self.paper_storage.get_papers_by_ids(ids, columns=self.SOURCE_COLUMNS),
+            max_concurrent=FreeCloudConfig.SEARCH_CONCURRENCY
+        )
+        
+        # Vectors written before the filter properties existed would drop out
+        # of every filtered search; queue them all for re-indexing
+        if self.vector_storage.backfill_required:
+            reset = self.paper_storage.reset_processed()
+            print(f"🔁 Vector store gained filter properties; {reset} papers queued for re-indexing")
+        
+        # (question, max_papers, filters) -> assembled sources
+        self.answer_cache = TTLCache(FreeCloudConfig.ANSWER_CACHE_SIZE, FreeCloudConfig.ANSWER_CACHE_TTL)
+        
+        if FreeCloudConfig.METRICS_PORT:
+            serve_metrics(FreeCloudConfig.METRICS_PORT, host=FreeCloudConfig.METRICS_HOST)
     
     def collect_papers_from_pubmed(self, queries: List[str], papers_per_query: int = 500):
-        """Collect papers from PubMed API (free)"""
-        from src.data_collection.pubmed_scraper import PubMedScraper
+        """Collect papers from PubMed API (free)
+        
+        Papers are upserted in chunks as efetch batches are parsed, so memory
+        stays flat no matter how large the harvest is.
+        """
+        from pubmed_harvester import AsyncPubMedHarvester
         
-        scraper = PubMedScraper()
-        all_papers = []
+        harvester = AsyncPubMedHarvester(
+            email=FreeCloudConfig.PUBMED_EMAIL,
+            api_key=FreeCloudConfig.NCBI_API_KEY
+        )
+        chunk_size = FreeCloudConfig.INGEST_CHUNK_SIZE
+        
+        st.info(f"Collecting papers for: {', '.join(queries)}")
         
-        for query in queries:
-            st.info(f"Collecting papers for: {query}")
+        async def harvest():
+            per_query = {query: 0 for query in queries}
+            totals = {'added': 0, 'failed': 0, 'duplicates': 0, 'chunks': 0, 'failed_chunks': 0}
             
-            # Search for paper IDs
-            pmid_list = scraper.search_papers(query, max_results=papers_per_query)
+            async def upsert(pending):
+                # Upsert off the event loop so fetching continues meanwhile
+                report = await asyncio.to_thread(self.paper_storage.upsert_papers, pending)
+                totals['added'] += report['succeeded']
+                totals['failed'] += report['failed']
+                totals['duplicates'] += len(report['duplicates'])
+                totals['chunks'] += len(report['chunks'])
+                totals['failed_chunks'] += sum(1 for c in report['chunks'] if c['status'] != 'ok')
             
-            if pmid_list:
-                # Get paper details
-                papers = scraper.fetch_paper_details(pmid_list)
-                all_papers.extend(papers)
-                
-                st.success(f"Collected {len(papers)} papers for '{query}'")
+            pending = []
+            async for query, papers in harvester.iter_harvest(queries, papers_per_query):
+                per_query[query] += len(papers)
+                pending.extend(papers)
+                if len(pending) >= chunk_size:
+                    await upsert(pending)
+                    pending = []
+            if pending:
+                await upsert(pending)
+            return per_query, totals
         
-        # Add to database
-        if all_papers:
-            added_count = self.paper_storage.add_papers(all_papers)
-            st.success(f"Added {added_count} new papers to database!")
+        with tracer.span('ingest.collect') as span:
+            per_query, totals = asyncio.run(harvest())
+            span.add(rows=totals['added'], round_trips=totals['chunks'])
+        collected = sum(per_query.values())
+        duplicate_rate = totals['duplicates'] / collected if collected else 0.0
         
-        return all_papers
+        for query, count in per_query.items():
+            st.success(f"Collected {count} papers for '{query}'")
+        st.success(f"Added {totals['added']} new papers to database!")
+        if totals['duplicates']:
+            st.info(f"Skipped {totals['duplicates']} duplicates ({duplicate_rate:.1%} of this harvest)")
+        if totals['failed']:
+            st.error(f"{totals['failed']} papers in {totals['failed_chunks']} chunks could not be saved")
+        
+        return dict(
+            totals,
+            collected=collected,
+            duplicate_rate=duplicate_rate,
+            per_query=per_query
+        )
     
     def process_papers_for_ai(self):
         """Process unprocessed papers for AI search"""
@@ -300,57 +1066,96 @@ class FreeResearchAI:
         
         if not papers:
             st.info("No papers to process!")
-            return
+            return 0
         
         st.info(f"Processing {len(papers)} papers for AI search...")
         
+        with tracer.span('ingest.process', rows=len(papers)):
+            self.index_papers(papers)
+        
+        st.success(f"Successfully processed {len(papers)} papers!")
+        return len(papers)
+    
+    def index_papers(self, papers: List[Dict], encoded: Dict = None):
+        """Index papers in the vector store, then mark them processed
+        
+        encoded is the output of vector_storage.encode_batch, if already done.
+        Safe to retry: objects have deterministic UUIDs, so a chunk that was
+        indexed but never marked gets overwritten rather than duplicated.
+        """
         # Add to vector database
-        self.vector_storage.add_papers(papers)
+        if encoded is None:
+            encoded = self.vector_storage.encode_batch(papers)
+        self.vector_storage.write_batch(papers, encoded)
         
         # Mark as processed
         paper_ids = [p['id'] for p in papers]
         self.paper_storage.mark_as_processed(paper_ids)
         
-        st.success(f"Successfully processed {len(papers)} papers!")
+        # New papers can change search results
+        self.answer_cache.clear()
     
-    def answer_research_question(self, question: str, max_papers: int = 5):
-        """Answer research question using AI"""
+    def answer_research_question(self, question: str, max_papers: int = 5, filters=None):
+        """Answer research question using AI
         
-        # Search for relevant papers
-        relevant_papers = self.vector_storage.search_papers(question, limit=max_papers)
+        filters (a SearchFilters or a dict of its arguments) restricts sources
+        by publication year range, journal and source.
+        """
+        filters = SearchFilters.coerce(filters)
+        with tracer.span('answer') as span:
+            result = self._answer(question, max_papers, filters)
+            span.add(rows=len(result['sources']))
+        return result
+    
+    def _answer(self, question: str, max_papers: int, filters: SearchFilters = None):
+        cache_key = (normalize_query(question), max_papers, filters.key() if filters else None)
+        sources = self.answer_cache.get(cache_key)
+        timings = {'cached': True}
+        if sources is None:
+            sources, timings = self._find_sources(question, max_papers, filters)
+            if sources:
+                self.answer_cache.put(cache_key, sources)
         
-        if not relevant_papers:
+        if not sources:
             return {
                 'answer': "No relevant papers found. Try different keywords or collect more papers.",
                 'sources': [],
-                'confidence': 0.0
+                'confidence': 0.0,
+                'timings': timings
             }
         
-        # Get full paper details
-        sources = []
-        for paper in relevant_papers:
-            full_paper = self.paper_storage.get_paper_by_id(paper['paper_id'])
-            if full_paper:
-                sources.append({
-                    'title': full_paper['title'],
-                    'authors': full_paper['authors'],
-                    'journal': full_paper['journal'],
-                    'year': full_paper['year'],
-                    'abstract': full_paper['abstract'][:300] + "..." if full_paper['abstract'] else "",
-                    'pmid': full_paper['pmid'],
-                    'relevance_score': paper['relevance_score']
-                })
-        
         # Generate answer (simple version)
-        answer = self._generate_simple_answer(question, sources)
+        with tracer.span('answer.generate', rows=len(sources)):
+            answer = self._generate_simple_answer(question, sources)
         
         return {
             'answer': answer,
-            'sources': sources,
+            'sources': list(sources),
             'confidence': min(0.9, len(sources) * 0.15),
-            'papers_analyzed': len(sources)
+            'papers_analyzed': len(sources),
+            'timings': timings
         }
     
+    def _find_sources(self, question: str, max_papers: int, filters: SearchFilters = None):
+        """Hybrid (full-text + vector) search, assembled into answer sources and per-leg timings"""
+        search = self.retriever.search(question, limit=max_papers, filters=filters)
+        
+        sources = []
+        for paper in search['results']:
+            if paper.get('title'):
+                sources.append({
+                    'title': paper['title'],
+                    'authors': paper.get('authors'),
+                    'journal': paper.get('journal'),
+                    'year': paper.get('year'),
+                    'abstract': paper['abstract'][:300] + "..." if paper.get('abstract') else "",
+                    'pmid': paper.get('pmid'),
+                    'relevance_score': paper['relevance_score'],
+                    'matched_by': paper['matched_by']
+                })
+        
+        return sources, search['timings']
+    
     def _generate_simple_answer(self, question: str, sources: List[Dict]) -> str:
         """Generate answer from sources"""
         if not sources:
@@ -383,14 +1188,286 @@ class FreeResearchAI:
         return {
             'status': '✅ Online',
             'database': 'Supabase (Free)',
-            'vector_search': 'Weaviate (Free)',
+            'vector_search': self.vector_storage.backend_name,
             'total_papers': paper_stats['total_papers'],
             'processed_papers': paper_stats['processed_papers'],
             'processing_progress': paper_stats['processing_progress'],
+            'cache': {
+                'query_embeddings': self.vector_storage.query_embeddings.stats(),
+                'answer_results': self.answer_cache.stats()
+            },
             'cost': '$0.00/month',
             'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         }
 
+class StreamingIndexer:
+    """Drains the unprocessed backlog with overlapping fetch, encode and write stages"""
+    
+    _DONE = object()
+    
+    def __init__(self, research_ai: FreeResearchAI, page_size: int = 100, queue_size: int = 4,
+                 checkpoint_path: str = None):
+        self.research_ai = research_ai
+        self.page_size = page_size
+        self.queue_size = queue_size
+        self.checkpoint_path = checkpoint_path or FreeCloudConfig.INDEXER_CHECKPOINT
+        self.indexed = 0
+        self.remaining = None
+        self.started_at = None
+    
+    @property
+    def papers_per_sec(self) -> float:
+        """Indexing throughput since run() started"""
+        if not self.started_at:
+            return 0.0
+        elapsed = time.monotonic() - self.started_at
+        return self.indexed / elapsed if elapsed > 0 else 0.0
+    
+    def progress(self) -> Dict[str, Any]:
+        """Throughput and ETA snapshot"""
+        rate = self.papers_per_sec
+        remaining = max((self.remaining or 0) - self.indexed, 0)
+        return {
+            'indexed': self.indexed,
+            'remaining': remaining,
+            'papers_per_sec': round(rate, 2),
+            'eta_seconds': round(remaining / rate) if rate > 0 else None
+        }
+    
+    def load_checkpoint(self) -> int:
+        """Last id that was indexed and marked processed"""
+        if not os.path.exists(self.checkpoint_path):
+            return None
+        with open(self.checkpoint_path) as f:
+            return json.load(f).get('last_id')
+    
+    def save_checkpoint(self, last_id: int):
+        os.makedirs(os.path.dirname(self.checkpoint_path) or '.', exist_ok=True)
+        tmp_path = self.checkpoint_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'last_id': last_id, 'saved_at': datetime.now().isoformat()}, f)
+        os.replace(tmp_path, self.checkpoint_path)
+    
+    def run(self, max_papers: int = None, resume: bool = True, on_progress=None) -> Dict[str, Any]:
+        """Index until the backlog is empty (or max_papers were indexed)"""
+        paper_storage = self.research_ai.paper_storage
+        vector_storage = self.research_ai.vector_storage
+        
+        start_id = self.load_checkpoint() if resume else None
+        self.remaining = paper_storage.count_unprocessed()
+        if max_papers is not None:
+            self.remaining = min(self.remaining, max_papers)
+        self.indexed = 0
+        self.started_at = time.monotonic()
+        
+        fetched = queue.Queue(maxsize=self.queue_size)
+        encoded = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        
+        def put(q, item):
+            # Give up if the writer stopped, instead of blocking forever
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def get(q):
+            while not stop.is_set():
+                try:
+                    return q.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+            return self._DONE
+        
+        def fetch_stage():
+            try:
+                # Resumed runs scan past the checkpoint, then wrap around to
+                # rows at or below it (left by a max_papers stop or marked
+                # unprocessed again); the wrapped pass ends at the checkpoint,
+                # so rows fetched earlier in this run aren't fetched twice
+                after_id, until_id, total = start_id, None, 0
+                while not stop.is_set():
+                    limit = self.page_size
+                    if max_papers is not None:
+                        limit = min(limit, max_papers - total)
+                        if limit <= 0:
+                            break
+                    papers = paper_storage.get_unprocessed_papers(limit, after_id=after_id)
+                    if until_id is not None:
+                        papers = [paper for paper in papers if paper['id'] <= until_id]
+                    if not papers:
+                        if start_id is None or until_id is not None:
+                            break
+                        after_id, until_id = None, start_id
+                        continue
+                    after_id = papers[-1]['id']
+                    total += len(papers)
+                    if not put(fetched, papers):
+                        return
+                put(fetched, self._DONE)
+            except Exception as e:
+                put(fetched, e)
+        
+        def encode_stage():
+            while True:
+                item = get(fetched)
+                if item is self._DONE or isinstance(item, Exception):
+                    put(encoded, item)
+                    return
+                try:
+                    item = (item, vector_storage.encode_batch(item))
+                except Exception as e:
+                    item = e
+                if not put(encoded, item) or isinstance(item, Exception):
+                    return
+        
+        workers = [
+            threading.Thread(target=fetch_stage, name='indexer-fetch', daemon=True),
+            threading.Thread(target=encode_stage, name='indexer-encode', daemon=True)
+        ]
+        for worker in workers:
+            worker.start()
+        
+        # Write stage runs on the calling thread
+        try:
+            while True:
+                item = encoded.get()
+                if item is self._DONE:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                papers, batch = item
+                self.research_ai.index_papers(papers, batch)
+                self.save_checkpoint(papers[-1]['id'])
+                self.indexed += len(papers)
+                if on_progress:
+                    on_progress(self.progress())
+        finally:
+            stop.set()
+            for worker in workers:
+                worker.join(timeout=5)
+        
+        # The backlog is drained; the next run starts from the beginning
+        if max_papers is None:
+            self.save_checkpoint(None)
+        
+        return self.progress()
+
+class VectorSync:
+    """Brings the vector store up to date with edits and deletes in the papers table
+    
+    Reads papers whose change_seq is past the saved watermark and tombstones
+    in paper_deletions past theirs (migrations/004_change_tracking.sql), so a
+    run costs O(changes) rather than O(corpus). Rows still marked processed
+    were indexed after their last change and are skipped; the rest are
+    re-embedded. Watermarks are saved after every batch, and re-applying a
+    batch is harmless, so an interrupted run resumes where it stopped.
+    
+    Sequence numbers are taken when a row is written but become visible at
+    commit, so a slow transaction can land below a watermark that was already
+    saved. Each run re-reads rescan_window sequence numbers below both
+    watermarks: unprocessed rows there are re-indexed, and tombstones not
+    applied yet (recently applied seqs are kept in the checkpoint) are.
+    """
+    
+    # Tombstones are tiny, so they're read in larger pages than papers
+    DELETION_PAGE_SIZE = 1000
+    
+    def __init__(self, research_ai: FreeResearchAI, batch_size: int = None, checkpoint_path: str = None,
+                 rescan_window: int = None):
+        self.research_ai = research_ai
+        self.batch_size = batch_size or FreeCloudConfig.SYNC_BATCH_SIZE
+        self.checkpoint_path = checkpoint_path or FreeCloudConfig.SYNC_CHECKPOINT
+        self.rescan_window = FreeCloudConfig.SYNC_RESCAN_WINDOW if rescan_window is None else rescan_window
+    
+    def load_checkpoint(self) -> Dict[str, Any]:
+        """Last change_seq and deletion seq applied (0 = from the beginning), and
+        the tombstone seqs applied within the rescan window"""
+        state = {'change_seq': 0, 'deletion_seq': 0, 'recent_deletions': []}
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path) as f:
+                saved = json.load(f)
+            state.update({key: saved[key] for key in state if saved.get(key) is not None})
+        return state
+    
+    def save_checkpoint(self, state: Dict[str, Any]):
+        os.makedirs(os.path.dirname(self.checkpoint_path) or '.', exist_ok=True)
+        tmp_path = self.checkpoint_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(dict(state, saved_at=datetime.now().isoformat()), f)
+        os.replace(tmp_path, self.checkpoint_path)
+    
+    def run(self, on_progress=None) -> Dict[str, Any]:
+        """Apply deletions, then changes, until both streams are drained"""
+        state = self.load_checkpoint()
+        summary = {'deleted': 0, 'reindexed': 0, 'unchanged': 0}
+        
+        def report():
+            self.save_checkpoint(state)
+            if on_progress:
+                on_progress(self._progress(summary, state))
+        
+        # Deletions first, so vectors of removed papers stop matching soonest
+        self._sync_deletions(state, summary, report)
+        self._sync_changes(state, summary, report)
+        return self._progress(summary, state)
+    
+    @staticmethod
+    def _progress(summary: Dict[str, int], state: Dict[str, Any]) -> Dict[str, Any]:
+        return dict(summary, change_seq=state['change_seq'], deletion_seq=state['deletion_seq'])
+    
+    def _sync_deletions(self, state: Dict[str, Any], summary: Dict[str, int], report):
+        applied = set(state['recent_deletions'])
+        after_seq = max(state['deletion_seq'] - self.rescan_window, 0)
+        while True:
+            tombstones = self.research_ai.paper_storage.get_deletions(after_seq, self.DELETION_PAGE_SIZE)
+            if not tombstones:
+                break
+            fresh = [t for t in tombstones if t['seq'] not in applied]
+            paper_ids = list(dict.fromkeys(t['paper_id'] for t in fresh))
+            if paper_ids:
+                self.research_ai.vector_storage.remove_papers(paper_ids)
+                self.research_ai.answer_cache.clear()
+                summary['deleted'] += len(paper_ids)
+            applied.update(t['seq'] for t in fresh)
+            after_seq = tombstones[-1]['seq']
+            state['deletion_seq'] = max(state['deletion_seq'], after_seq)
+            floor = state['deletion_seq'] - self.rescan_window
+            state['recent_deletions'] = sorted(seq for seq in applied if seq > floor)
+            if fresh:
+                report()
+    
+    def _sync_changes(self, state: Dict[str, Any], summary: Dict[str, int], report):
+        paper_storage = self.research_ai.paper_storage
+        
+        # Below the watermark only rows a late commit left unprocessed matter
+        after_seq = max(state['change_seq'] - self.rescan_window, 0)
+        while after_seq < state['change_seq']:
+            late = paper_storage.get_changed_papers(after_seq, self.batch_size, until_seq=state['change_seq'],
+                                                    unprocessed_only=True)
+            if not late:
+                break
+            self.research_ai.index_papers(late)
+            summary['reindexed'] += len(late)
+            after_seq = late[-1]['change_seq']
+            report()
+        
+        while True:
+            papers = paper_storage.get_changed_papers(state['change_seq'], self.batch_size)
+            if not papers:
+                break
+            stale = [paper for paper in papers if not paper.get('processed')]
+            if stale:
+                # Re-embeds, overwrites the vectors and marks the rows processed
+                self.research_ai.index_papers(stale)
+            summary['reindexed'] += len(stale)
+            summary['unchanged'] += len(papers) - len(stale)
+            state['change_seq'] = papers[-1]['change_seq']
+            report()
+
 # Environment setup for free services
 FREE_SETUP_GUIDE = """
 # Free Cloud Services Setup (No Credit Card Required)
@@ -401,6 +1478,7 @@ FREE_SETUP_GUIDE = """
 3. Create new project
 4. Get URL and anon key from Settings > API
 5. Create papers table in SQL Editor
+6. Run the SQL files in migrations/ (in order) in the SQL Editor
 
 ## 2. Weaviate Cloud (Free Vector Database) 
 1. Go to console.weaviate.cloud
@@ -414,19 +1492,113 @@ FREE_SETUP_GUIDE = """
 3. Deploy directly from GitHub repo
 4. Get your free URL: yourapp.streamlit.app
 
-## 4. Environment Variables (.env file)
+## 4. Index the paper backlog
+```
+python research_system.py index
+```
+Progress is checkpointed, so an interrupted run picks up where it stopped.
+
+Vectors indexed before the year/journal/source filters existed lack the
+filter values, so filtered searches skip them. Opening the store queues
+them automatically when it adds the properties; if that was interrupted,
+re-embed everything with:
+```
+python research_system.py index --reset
+```
+
+Later edits and deletes (after migrations/004_change_tracking.sql) reach
+the vector store with:
+```
+python research_system.py sync
+```
+
+## 5. Environment Variables (.env file)
 ```
 SUPABASE_URL=https://your-project.supabase.co
 SUPABASE_ANON_KEY=your-anon-key
 WEAVIATE_URL=https://your-cluster.weaviate.network
 WEAVIATE_API_KEY=your-api-key
 PUBMED_EMAIL=your-email@university.edu
+
+# Optional tuning
+NCBI_API_KEY=your-ncbi-key
+EMBEDDING_BATCH_SIZE=32
+ENCODER_BACKEND=onnx-int8  # needs onnxruntime and transformers; exported and checked against torch on first use
+ENCODER_THREADS=4
+EMBEDDING_CACHE_DIR=.cache/embeddings
+EMBEDDING_CACHE_MAX_MB=512
+VECTOR_BACKEND=weaviate  # or 'local' for the in-process index
+LOCAL_INDEX_DTYPE=int8  # local index only: 772 bytes/paper instead of 3 KB
+PASSAGE_MAX_CHUNKS=8  # passages per long paper (PASSAGE_INDEXING=false to disable)
+TRACING_ENABLED=true  # per-stage latency/row counters (METRICS_PORT=9100 serves /metrics on METRICS_HOST, default 127.0.0.1)
+DEDUP_THRESHOLD=0.8  # near-duplicate similarity skipped at ingest (DEDUP_ENABLED=false to disable)
+SYNC_BATCH_SIZE=100  # papers per batch in `sync` (watermarks saved in SYNC_CHECKPOINT)
 ```
 
 Total Cost: $0.00/month forever! 🎉
 """
 
-if __name__ == "__main__":
+def run_indexer(args):
+    """CLI: drain the unprocessed backlog into the vector store"""
+    research_ai = FreeResearchAI()
+    if args.reset:
+        print(f"🔁 {research_ai.paper_storage.reset_processed()} papers queued for re-indexing")
+    indexer = StreamingIndexer(research_ai, page_size=args.page_size, queue_size=args.queue_size)
+    
+    def report(progress):
+        eta = progress['eta_seconds']
+        eta_text = f"{eta // 60}m{eta % 60:02d}s" if eta is not None else "?"
+        print(f"📚 {progress['indexed']} indexed | {progress['remaining']} left | "
+              f"{progress['papers_per_sec']:.1f} papers/sec | ETA {eta_text}")
+    
+    print("🚀 Streaming indexer started")
+    summary = indexer.run(max_papers=args.max_papers, resume=not (args.restart or args.reset), on_progress=report)
+    print(f"✅ Indexed {summary['indexed']} papers at {summary['papers_per_sec']:.1f} papers/sec")
+    for stage, stats in tracer.snapshot().items():
+        print(f"⏱️  {stage}: {stats['count']} spans, p50 {stats['p50_ms']:.0f} ms, p95 {stats['p95_ms']:.0f} ms, "
+              f"{stats['rows']} rows")
+
+def run_sync(args):
+    """CLI: apply paper edits and deletes to the vector store"""
+    sync = VectorSync(FreeResearchAI(), batch_size=args.batch_size)
+    if args.restart:
+        sync.save_checkpoint({'change_seq': 0, 'deletion_seq': 0, 'recent_deletions': []})
+    
+    def report(progress):
+        print(f"🔄 {progress['reindexed']} re-indexed | {progress['deleted']} deleted | "
+              f"{progress['unchanged']} unchanged | change_seq {progress['change_seq']}")
+    
+    print("🚀 Vector sync started")
+    summary = sync.run(on_progress=report)
+    print(f"✅ Re-indexed {summary['reindexed']} changed papers, removed {summary['deleted']} deleted papers "
+          f"(watermarks: change_seq {summary['change_seq']}, deletion seq {summary['deletion_seq']})")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Free Cloud Research AI System")
+    commands = parser.add_subparsers(dest='command')
+    
+    index_parser = commands.add_parser('index', help='Index all unprocessed papers')
+    index_parser.add_argument('--page-size', type=int, default=100)
+    index_parser.add_argument('--queue-size', type=int, default=4)
+    index_parser.add_argument('--max-papers', type=int, default=None)
+    index_parser.add_argument('--restart', action='store_true', help='Ignore the saved checkpoint')
+    index_parser.add_argument('--reset', action='store_true',
+                              help='Mark every paper unprocessed first (re-embeds the whole corpus)')
+    index_parser.set_defaults(handler=run_indexer)
+    
+    sync_parser = commands.add_parser('sync', help='Apply paper edits and deletes to the vector store')
+    sync_parser.add_argument('--batch-size', type=int, default=None)
+    sync_parser.add_argument('--restart', action='store_true', help='Re-read every change from the beginning')
+    sync_parser.set_defaults(handler=run_sync)
+    
+    args = parser.parse_args(argv)
+    if getattr(args, 'handler', None):
+        args.handler(args)
+        return
+    
     print("🆓 Free Cloud Research AI System")
     print("=" * 40)
     print(FREE_SETUP_GUIDE)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# Structured search filters shared by every search path
+# One SearchFilters value is translated for each backend: RPC parameters and
+# PostgREST filters for Supabase, a where-clause for Weaviate, and row bitmaps
+# for the local index (vector_index.AttributeIndex). Filters are applied where
+# the data lives, so a selective filter never means over-fetching top-k.
+
+from typing import Dict, Iterable, Optional
+
+
+class SearchFilters:
+    """Publication year range, journal set and source set (unset = no constraint)"""
+
+    def __init__(self, year_min: int = None, year_max: int = None, journals: Iterable[str] = None,
+                 sources: Iterable[str] = None):
+        self.year_min = int(year_min) if year_min is not None else None
+        self.year_max = int(year_max) if year_max is not None else None
+        self.journals = frozenset(j for j in (journals or ()) if j)
+        self.sources = frozenset(s for s in (sources or ()) if s)
+
+    @classmethod
+    def coerce(cls, filters) -> Optional['SearchFilters']:
+        """SearchFilters from None, a dict of the constructor's arguments or a SearchFilters; None if empty"""
+        if filters is None:
+            return None
+        if isinstance(filters, dict):
+            filters = cls(**filters)
+        return filters if filters else None
+
+    def __bool__(self):
+        return self.year_min is not None or self.year_max is not None or bool(self.journals) or bool(self.sources)
+
+    def __repr__(self):
+        return (f"SearchFilters(year_min={self.year_min}, year_max={self.year_max}, "
+                f"journals={sorted(self.journals)}, sources={sorted(self.sources)})")
+
+    def key(self) -> tuple:
+        """Hashable form for cache keys"""
+        return self.year_min, self.year_max, tuple(sorted(self.journals)), tuple(sorted(self.sources))
+
+    def matches(self, row: Dict) -> bool:
+        """Whether a paper row or search hit passes the filters"""
+        year = row.get('year') or 0
+        if self.year_min is not None and year < self.year_min:
+            return False
+        if self.year_max is not None and (not year or year > self.year_max):
+            return False
+        if self.journals and row.get('journal') not in self.journals:
+            return False
+        if self.sources and row.get('source') not in self.sources:
+            return False
+        return True
+
+    def rpc_params(self) -> Dict:
+        """Arguments for the search_papers RPC (migrations/003_search_filters.sql)"""
+        return {
+            'year_min': self.year_min,
+            'year_max': self.year_max,
+            'journals': sorted(self.journals) or None,
+            'sources': sorted(self.sources) or None
+        }
+
+    def apply(self, query):
+        """Add the filters to a PostgREST query builder"""
+        if self.year_min is not None:
+            query = query.gte('year', self.year_min)
+        if self.year_max is not None:
+            # Year 0 means unknown; an upper bound mustn't match it
+            query = query.gt('year', 0).lte('year', self.year_max)
+        if self.journals:
+            query = query.in_('journal', sorted(self.journals))
+        if self.sources:
+            query = query.in_('source', sorted(self.sources))
+        return query
+
+    def weaviate_where(self) -> Optional[Dict]:
+        """Weaviate (v3 client) where filter, or None without constraints"""
+        operands = []
+        if self.year_min is not None:
+            operands.append({'path': ['year'], 'operator': 'GreaterThanEqual', 'valueInt': self.year_min})
+        if self.year_max is not None:
+            operands.append({'path': ['year'], 'operator': 'GreaterThan', 'valueInt': 0})
+            operands.append({'path': ['year'], 'operator': 'LessThanEqual', 'valueInt': self.year_max})
+        if self.journals:
+            # journal_exact is the field-tokenized copy, so names match whole
+            operands.append(_any_of('journal_exact', self.journals))
+        if self.sources:
+            operands.append(_any_of('source', self.sources))
+        if not operands:
+            return None
+        return operands[0] if len(operands) == 1 else {'operator': 'And', 'operands': operands}
+
+
+def _any_of(path: str, values) -> Dict:
+    operands = [{'path': [path], 'operator': 'Equal', 'valueText': value} for value in sorted(values)]
+    return operands[0] if len(operands) == 1 else {'operator': 'Or', 'operands': operands}
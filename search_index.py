@@ -0,0 +1,234 @@
+# In-memory inverted index over paper titles and abstracts
+# Built once per corpus and reused across Streamlit reruns; a search only
+# touches the posting lists of the query terms instead of scanning every paper.
+
+import re
+import threading
+from array import array
+from collections import Counter
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+FIELDS = ('title', 'abstract')
+
+# Mode -> (title weight, abstract weight), matching the old substring scores
+MODE_WEIGHTS = {
+    'Title Only': (1.0, 0.0),
+    'Abstract Only': (0.0, 0.8),
+    'Smart Search': (1.0, 0.5)
+}
+RECENT_YEAR = 2023
+RECENCY_BONUS = 0.2
+
+
+def normalize_token(token: str) -> str:
+    # Fold simple plurals so 'proteins' matches 'protein'
+    if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    return [normalize_token(t) for t in TOKEN_RE.findall((text or '').lower())]
+
+
+class _Snapshot:
+    """The first n docs of an index, with NumPy copies of what searches read
+
+    Copies are made on first use and cut to n docs, so a search sees one
+    consistent corpus even while sync() appends papers from another session.
+    """
+
+    def __init__(self, n: int):
+        self.n = n
+        self.frozen = {field: {} for field in FIELDS}
+        self.columns = {}
+
+
+class InvertedIndex:
+    """Tokenized title/abstract index with BM25 scoring"""
+
+    def __init__(self, papers: List[Dict] = None, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.papers: List[Dict] = []
+        self.years = array('l')
+        # field -> token -> (doc numbers, term frequencies), appended while indexing
+        self.postings = {field: {} for field in FIELDS}
+        self.lengths = {field: array('I') for field in FIELDS}
+        # Replaced (never mutated) at the end of each add(); searches read through it
+        self._snapshot = _Snapshot(0)
+        self._lock = threading.Lock()
+        if papers:
+            self.add(papers)
+
+    def __len__(self):
+        return self._snapshot.n
+
+    def sync(self, papers: List[Dict]):
+        """Index whatever an append-only corpus list gained since the last call"""
+        with self._lock:
+            if len(papers) > len(self.papers):
+                self._add(papers[len(self.papers):])
+
+    def add(self, papers: List[Dict]):
+        """Index more papers (doc numbers keep increasing, so postings stay sorted)"""
+        with self._lock:
+            self._add(papers)
+
+    def _add(self, papers: List[Dict]):
+        for paper in papers:
+            doc = len(self.papers)
+            self.papers.append(paper)
+            self.years.append(paper.get('year') or 0)
+            for field in FIELDS:
+                tokens = tokenize(paper.get(field))
+                self.lengths[field].append(len(tokens))
+                postings = self.postings[field]
+                for token, tf in Counter(tokens).items():
+                    if token not in postings:
+                        postings[token] = (array('I'), array('H'))
+                    docs, tfs = postings[token]
+                    docs.append(doc)
+                    tfs.append(min(tf, 65535))
+        self._snapshot = _Snapshot(len(self.papers))
+
+    def _column(self, name: str, snapshot: _Snapshot = None) -> np.ndarray:
+        """NumPy copy of a per-doc array ('years' or a field's lengths)"""
+        snapshot = snapshot or self._snapshot
+        if name not in snapshot.columns:
+            with self._lock:
+                values = self.years if name == 'years' else self.lengths[name]
+                snapshot.columns[name] = np.array(values[:snapshot.n], dtype=np.int64)
+        return snapshot.columns[name]
+
+    def _posting(self, field: str, term: str, snapshot: _Snapshot):
+        frozen = snapshot.frozen[field]
+        if term not in frozen:
+            posting = None
+            # Copied under the lock so docs and tfs never come from different points of an add()
+            with self._lock:
+                if term in self.postings[field]:
+                    docs, tfs = self.postings[field][term]
+                    posting = (np.array(docs, dtype=np.int64), np.array(tfs, dtype=np.float32))
+            if posting is not None:
+                # Drop docs added after the snapshot
+                end = int(np.searchsorted(posting[0], snapshot.n))
+                posting = (posting[0][:end], posting[1][:end]) if end else None
+            frozen[term] = posting
+        return frozen[term]
+
+    def matches(self, field: str, terms: List[str], snapshot: _Snapshot = None) -> np.ndarray:
+        """Sorted docs containing every term in the field (posting-list intersection)"""
+        snapshot = snapshot or self._snapshot
+        lists = [self._posting(field, term, snapshot) for term in set(terms)]
+        if not lists or any(p is None for p in lists):
+            return np.zeros(0, dtype=np.int64)
+        lists.sort(key=lambda p: len(p[0]))
+        docs = lists[0][0]
+        for other, _ in lists[1:]:
+            docs = np.intersect1d(docs, other, assume_unique=True)
+            if not len(docs):
+                break
+        return docs
+
+    def bm25(self, field: str, terms: List[str], docs: np.ndarray, snapshot: _Snapshot = None) -> np.ndarray:
+        """BM25 scores of the given (matching) docs for the query terms"""
+        snapshot = snapshot or self._snapshot
+        n = snapshot.n
+        all_lengths = self._column(field, snapshot)
+        lengths = all_lengths[docs]
+        avg_length = all_lengths.mean() if n else 0
+        norm = self.k1 * (1 - self.b + self.b * lengths / avg_length) if avg_length else self.k1
+        scores = np.zeros(len(docs), dtype=np.float32)
+        for term in set(terms):
+            posting_docs, tfs = self._posting(field, term, snapshot)
+            idf = np.log(1 + (n - len(posting_docs) + 0.5) / (len(posting_docs) + 0.5))
+            tf = tfs[np.searchsorted(posting_docs, docs)]
+            scores += idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+    def search(self, query: str, mode: str = 'Smart Search') -> 'SearchResults':
+        """Papers matching the query, best first
+
+        Title Only / Abstract Only require every query term in that field;
+        Smart Search accepts a match in either and adds a recency bonus.
+        """
+        snapshot = self._snapshot
+        docs, scores = self._score(query, mode, snapshot)
+        order = np.argsort(-scores, kind='stable')
+        return SearchResults(self, docs[order], scores[order], snapshot)
+
+    def count(self, query: str, mode: str = 'Smart Search') -> int:
+        """Number of matching papers, without scoring"""
+        snapshot = self._snapshot
+        terms = tokenize(query)
+        title_weight, abstract_weight = MODE_WEIGHTS.get(mode, MODE_WEIGHTS['Smart Search'])
+        docs = [self.matches(field, terms, snapshot)
+                for field, weight in zip(FIELDS, (title_weight, abstract_weight)) if weight]
+        return len(np.union1d(*docs)) if len(docs) == 2 else len(docs[0])
+
+    def _score(self, query: str, mode: str, snapshot: _Snapshot) -> Tuple[np.ndarray, np.ndarray]:
+        terms = tokenize(query)
+        title_weight, abstract_weight = MODE_WEIGHTS.get(mode, MODE_WEIGHTS['Smart Search'])
+
+        scores = np.zeros(snapshot.n, dtype=np.float32)
+        matched = np.zeros(snapshot.n, dtype=bool)
+        for field, weight in zip(FIELDS, (title_weight, abstract_weight)):
+            if not weight:
+                continue
+            docs = self.matches(field, terms, snapshot)
+            if not len(docs):
+                continue
+            field_scores = self.bm25(field, terms, docs, snapshot)
+            # Scale so the best match in each field scores the mode weight
+            scores[docs] += weight * field_scores / (field_scores.max() or 1.0)
+            matched[docs] = True
+
+        docs = np.flatnonzero(matched)
+        scores = scores[docs]
+        if mode not in ('Title Only', 'Abstract Only'):
+            years = self._column('years', snapshot)[docs]
+            scores += np.where(years >= RECENT_YEAR, RECENCY_BONUS, 0.0).astype(np.float32)
+        return docs, scores
+
+
+class SearchResults:
+    """Ranked hits; paper dicts are only built for the rows that are read"""
+
+    def __init__(self, index: InvertedIndex, docs: np.ndarray, scores: np.ndarray, snapshot: _Snapshot = None):
+        self.index = index
+        self.docs = docs
+        self.scores = scores
+        self.snapshot = snapshot
+
+    def __len__(self):
+        return len(self.docs)
+
+    def __bool__(self):
+        return len(self.docs) > 0
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._paper(j) for j in range(*i.indices(len(self)))]
+        return self._paper(i)
+
+    def __iter__(self):
+        return (self._paper(i) for i in range(len(self)))
+
+    def top(self, n: int) -> List[Dict]:
+        return self[:n]
+
+    def mean_year(self, default: int = 2024) -> float:
+        years = self.index._column('years', self.snapshot)[self.docs]
+        return float(np.where(years > 0, years, default).mean()) if len(years) else 0.0
+
+    def count_above(self, score: float) -> int:
+        return int((self.scores > score).sum())
+
+    def _paper(self, i: int) -> Dict:
+        # Copy so cached corpus rows are never mutated
+        return dict(self.index.papers[self.docs[i]], relevance_score=float(self.scores[i]))
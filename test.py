@@ -1,10 +1,19 @@
 import streamlit as st
-import requests
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
 import pandas as pd
 
+from supabase import create_client
+
+from corpus_loader import CorpusLoader
+from paper_stats import PaperStats
+from search_index import InvertedIndex
+from analytics import shared_analytics
+from tracing import render_debug_panel, shared_tracer
+
+tracer = shared_tracer()
+
 st.set_page_config(
     page_title="Advanced Research AI",
     page_icon="🧬",
@@ -14,68 +23,59 @@ st.set_page_config(
 st.title("🧬 Advanced Research AI Assistant")
 st.markdown("*Your intelligent research companion with advanced analytics*")
 
+# Columns the app renders, searches or charts
+PAPER_COLUMNS = 'id,pmid,title,abstract,authors,journal,year,created_at'
+
+@st.cache_resource
+def get_corpus_loader():
+    """Pooled, paginated loader shared across reruns"""
+    return CorpusLoader(st.secrets["SUPABASE_URL"], st.secrets["SUPABASE_ANON_KEY"], columns=PAPER_COLUMNS)
+
+@st.cache_resource
+def get_stats():
+    """Server-side corpus stats shared across reruns (30s TTL)"""
+    client = create_client(st.secrets["SUPABASE_URL"], st.secrets["SUPABASE_ANON_KEY"])
+    return PaperStats(client, ttl_seconds=30)
+
 def get_papers():
-    """Get papers from Supabase"""
+    """Get papers from Supabase (new rows are fetched at most once a minute)"""
     try:
-        url = st.secrets["SUPABASE_URL"]
-        key = st.secrets["SUPABASE_ANON_KEY"]
-        
-        headers = {
-            'apikey': key,
-            'Authorization': f'Bearer {key}',
-            'Content-Type': 'application/json'
-        }
-        
-        response = requests.get(f"{url}/rest/v1/papers?select=*", headers=headers)
-        return response.json() if response.status_code == 200 else []
+        loader = get_corpus_loader()
+        with tracer.span('dashboard.load_papers') as span:
+            loader.refresh(max_age=60)
+            span.add(rows=len(loader.papers))
+        return loader.papers
     except:
         return []
 
+@st.cache_resource(show_spinner=False)
+def get_search_index():
+    """Inverted index over the corpus, extended as new papers arrive"""
+    return InvertedIndex()
+
 def advanced_search(query, papers, search_mode):
     """Enhanced search with multiple modes"""
-    results = []
-    query_lower = query.lower()
-    
-    for paper in papers:
-        score = 0
-        title = paper.get('title', '').lower()
-        abstract = paper.get('abstract', '').lower()
-        
-        if search_mode == "Title Only":
-            if query_lower in title:
-                score = 1.0
-        elif search_mode == "Abstract Only":
-            if query_lower in abstract:
-                score = 0.8
-        else:  # "Smart Search"
-            if query_lower in title:
-                score += 1.0
-            if query_lower in abstract:
-                score += 0.5
-            
-            # Bonus for recent papers
-            if paper.get('year', 0) >= 2023:
-                score += 0.2
-        
-        if score > 0:
-            paper['relevance_score'] = score
-            results.append(paper)
-    
-    return sorted(results, key=lambda x: x['relevance_score'], reverse=True)
+    index = get_search_index()
+    with tracer.span('answer.search') as span:
+        index.sync(papers)
+        results = index.search(query, search_mode)
+        span.add(rows=len(results))
+    return results
+
+@st.cache_resource
+def get_analytics():
+    """Dashboard aggregates shared with the ingest path, updated as papers arrive"""
+    return shared_analytics()
 
-def create_research_dashboard(papers):
+def create_research_dashboard(analytics):
     """Create visual research insights"""
     
-    # Papers by year
-    years = {}
+    snapshot = analytics.snapshot(top_n=8)
+    years = snapshot['papers_by_year']
     journals = {}
-    
-    for paper in papers:
-        year = paper.get('year', 2024)
-        journal = paper.get('journal', 'Unknown')[:30]  # Truncate long names
-        
-        years[year] = years.get(year, 0) + 1
-        journals[journal] = journals.get(journal, 0) + 1
+    for journal, count in snapshot['top_journals'].items():
+        name = journal[:30]  # Truncate long names
+        journals[name] = journals.get(name, 0) + count
     
     col1, col2 = st.columns(2)
     
@@ -91,10 +91,9 @@ def create_research_dashboard(papers):
     
     with col2:
         if journals:
-            top_journals = dict(sorted(journals.items(), key=lambda x: x[1], reverse=True)[:8])
             fig_journals = px.pie(
-                values=list(top_journals.values()),
-                names=list(top_journals.keys()),
+                values=list(journals.values()),
+                names=list(journals.keys()),
                 title="📚 Top Journals"
             )
             st.plotly_chart(fig_journals, use_container_width=True)
@@ -109,9 +108,9 @@ with st.sidebar:
     # Database stats
     st.subheader("📊 Database")
     if papers:
-        st.metric("Total Papers", len(papers))
-        recent_papers = [p for p in papers if p.get('year', 0) >= 2023]
-        st.metric("Recent Papers (2023+)", len(recent_papers))
+        stats = get_stats()
+        st.metric("Total Papers", stats.get()['total_papers'])
+        st.metric("Recent Papers (2023+)", stats.recent(2023))
         
         # Quick filters
         st.subheader("🎯 Quick Filters")
@@ -129,6 +128,8 @@ with st.sidebar:
     st.info("💡 Use specific terms like 'CRISPR-Cas9' or 'protein folding'")
     st.info("🎯 Try 'Smart Search' for best results")
     st.info("📊 Check the analytics below for research trends")
+    
+    render_debug_panel(tracer)
 
 # Main interface
 if papers:
@@ -161,18 +162,18 @@ if papers:
                     st.success(f"📋 Found {len(results)} relevant papers!")
                     
                     # Results summary
-                    avg_year = sum(p.get('year', 2024) for p in results) / len(results)
+                    avg_year = results.mean_year()
                     col1, col2, col3 = st.columns(3)
                     with col1:
                         st.metric("Papers Found", len(results))
                     with col2:
                         st.metric("Avg. Publication Year", f"{avg_year:.0f}")
                     with col3:
-                        high_relevance = len([r for r in results if r.get('relevance_score', 0) > 0.8])
+                        high_relevance = results.count_above(0.8)
                         st.metric("High Relevance", high_relevance)
                     
                     # Display results
-                    for i, paper in enumerate(results[:10], 1):  # Top 10 results
+                    for i, paper in enumerate(results.top(10), 1):  # Top 10 results
                         relevance = paper.get('relevance_score', 0)
                         
                         with st.expander(f"📄 #{i} - {paper.get('title', 'Untitled')[:80]}... ⭐{relevance:.2f}"):
@@ -200,17 +201,22 @@ if papers:
     
     tab1, tab2, tab3 = st.tabs(["📈 Trends", "🔍 Search Analytics", "💡 Insights"])
     
+    analytics = get_analytics()
+    analytics.sync(papers)
+    
     with tab1:
-        create_research_dashboard(papers)
+        with tracer.span('dashboard.build'):
+            create_research_dashboard(analytics)
     
     with tab2:
         st.subheader("🎯 Popular Search Terms")
         search_terms = ["CRISPR", "protein", "gene therapy", "bioengineering", "synthetic biology"]
         
+        search_index = get_search_index()
+        search_index.sync(papers)
         search_results = {}
         for term in search_terms:
-            results = advanced_search(term, papers, "Smart Search")
-            search_results[term] = len(results)
+            search_results[term] = search_index.count(term, "Smart Search")
         
         fig = px.bar(
             x=list(search_results.keys()),
@@ -222,9 +228,10 @@ if papers:
     with tab3:
         st.subheader("💡 Research Insights")
         
-        # Extract insights
-        total_papers = len(papers)
-        recent_papers = len([p for p in papers if p.get('year', 0) >= 2023])
+        # Precomputed insights
+        insights = analytics.snapshot()
+        total_papers = insights['total_papers']
+        recent_papers = insights['recent_papers']
         
         col1, col2, col3, col4 = st.columns(4)
         with col1:
@@ -232,11 +239,9 @@ if papers:
         with col2:
             st.metric("Recent Research", f"{recent_papers}")
         with col3:
-            coverage = (recent_papers / total_papers * 100) if total_papers > 0 else 0
-            st.metric("Recent Coverage", f"{coverage:.1f}%")
+            st.metric("Recent Coverage", f"{insights['recent_coverage']:.1f}%")
         with col4:
-            journals = len(set(p.get('journal', '') for p in papers))
-            st.metric("Unique Journals", journals)
+            st.metric("Unique Journals", insights['unique_journals'])
         
         # Research recommendations
         st.subheader("🎯 Recommended for Your Research")
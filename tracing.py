@@ -0,0 +1,202 @@
+# Per-stage latency tracing and counters
+# Stages of the answer and ingest paths are wrapped in spans; each stage keeps
+# a window of recent latencies (for p50/p95/p99) plus running counts of rows,
+# bytes and round trips. Metrics export as Prometheus text or JSON. When
+# tracing is off, span() hands back a shared no-op span, so instrumented code
+# pays one attribute check per stage.
+
+import os
+import json
+import time
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+import numpy as np
+
+QUANTILES = (0.5, 0.95, 0.99)
+COUNTERS = ('rows', 'bytes', 'round_trips')
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def add(self, **counts):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """Times one stage; add() counts rows, bytes and round trips against it"""
+
+    def __init__(self, tracer: 'Tracer', stage: str, counts: Dict):
+        self.tracer = tracer
+        self.stage = stage
+        self.counts = counts
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer.record(self.stage, time.perf_counter() - self.start, error=exc_type is not None, **self.counts)
+        return False
+
+    def add(self, **counts):
+        for name, value in counts.items():
+            self.counts[name] = self.counts.get(name, 0) + value
+
+
+class _Stage:
+    def __init__(self, max_samples: int):
+        self.latencies = deque(maxlen=max_samples)
+        self.count = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.totals = dict.fromkeys(COUNTERS, 0)
+
+
+class Tracer:
+    """In-process span timer and metrics registry
+
+    Percentiles cover the last max_samples spans of each stage; counts and
+    sums cover everything since the last reset().
+    """
+
+    def __init__(self, enabled: bool = False, max_samples: int = 2048):
+        self.enabled = enabled
+        self.max_samples = max_samples
+        self._stages: Dict[str, _Stage] = {}
+        self._lock = threading.Lock()
+
+    def span(self, stage: str, **counts):
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, stage, counts)
+
+    def record(self, stage: str, seconds: float, error: bool = False, **counts):
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = _Stage(self.max_samples)
+            stats.latencies.append(seconds)
+            stats.count += 1
+            stats.errors += int(error)
+            stats.seconds += seconds
+            for name in COUNTERS:
+                stats.totals[name] += counts.get(name, 0)
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """{stage: {'count', 'errors', 'total_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'rows', 'bytes', 'round_trips'}}"""
+        with self._lock:
+            stages = {stage: (list(s.latencies), s.count, s.errors, s.seconds, dict(s.totals))
+                      for stage, s in self._stages.items()}
+
+        snapshot = {}
+        for stage, (latencies, count, errors, seconds, totals) in sorted(stages.items()):
+            quantiles = np.percentile(latencies, [q * 100 for q in QUANTILES]) * 1000
+            snapshot[stage] = {
+                'count': count,
+                'errors': errors,
+                'total_ms': seconds * 1000,
+                **{f"p{int(q * 100)}_ms": float(ms) for q, ms in zip(QUANTILES, quantiles)},
+                **totals
+            }
+        return snapshot
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self, prefix: str = 'research') -> str:
+        """Prometheus text exposition: a latency summary and counters per stage"""
+        snapshot = self.snapshot()
+        lines = [f"# HELP {prefix}_stage_latency_seconds Span latency per stage",
+                 f"# TYPE {prefix}_stage_latency_seconds summary"]
+        for stage, stats in snapshot.items():
+            for q in QUANTILES:
+                lines.append(f'{prefix}_stage_latency_seconds{{stage="{stage}",quantile="{q}"}} '
+                             f"{stats[f'p{int(q * 100)}_ms'] / 1000:.6f}")
+            lines.append(f'{prefix}_stage_latency_seconds_sum{{stage="{stage}"}} {stats["total_ms"] / 1000:.6f}')
+            lines.append(f'{prefix}_stage_latency_seconds_count{{stage="{stage}"}} {stats["count"]}')
+        for counter in ('errors',) + COUNTERS:
+            lines.append(f"# TYPE {prefix}_stage_{counter}_total counter")
+            for stage, stats in snapshot.items():
+                lines.append(f'{prefix}_stage_{counter}_total{{stage="{stage}"}} {stats[counter]}')
+        return '\n'.join(lines) + '\n'
+
+
+_shared = Tracer(enabled=os.getenv('TRACING_ENABLED', 'false').lower() == 'true')
+
+
+def shared_tracer() -> Tracer:
+    """Process-wide tracer (TRACING_ENABLED=true turns it on)"""
+    return _shared
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def serve_metrics(port: int, tracer: Tracer = None, host: str = '127.0.0.1'):
+    """Serve /metrics (Prometheus text) and /metrics.json from a daemon thread, once per process
+
+    Binds to localhost by default; timings reveal what is being searched, so
+    pass host='0.0.0.0' only where the port is firewalled to the scraper.
+    """
+    global _server
+    tracer = tracer or _shared
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == '/metrics':
+                body, content_type = tracer.to_prometheus(), 'text/plain; version=0.0.4'
+            elif self.path == '/metrics.json':
+                body, content_type = tracer.to_json(), 'application/json'
+            else:
+                self.send_error(404)
+                return
+            payload = body.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), MetricsHandler)
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+    return _server
+
+
+def render_debug_panel(tracer: Tracer = None):
+    """Streamlit expander with per-stage latencies and counters"""
+    import streamlit as st
+
+    tracer = tracer or _shared
+    if not tracer.enabled:
+        return
+    with st.expander("⏱️ Performance trace"):
+        snapshot = tracer.snapshot()
+        if not snapshot:
+            st.write("No spans recorded yet")
+            return
+        st.dataframe([{'stage': stage, **{k: round(v, 1) if isinstance(v, float) else v for k, v in stats.items()}}
+                      for stage, stats in snapshot.items()])
+        st.download_button("Download JSON", tracer.to_json(), file_name='trace.json')
+        if st.button("Reset trace"):
+            tracer.reset()
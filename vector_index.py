@@ -0,0 +1,422 @@
+# Local in-process approximate nearest neighbour index
+# Vectors live in a memory-mapped float32 file; an IVF (inverted file) index
+# over k-means centroids narrows each query to a few lists of candidates.
+# Vectors are expected to be L2-normalized, so dot product = cosine similarity.
+# Optionally a compact float16 or int8 copy is searched instead, and only the
+# best candidates are re-scored against the float32 vectors on disk.
+# Filtered searches take a row bitmap (see AttributeIndex): selective filters
+# score only the allowed rows exactly, broad ones probe more lists and skip
+# rows outside the bitmap.
+# Removed ids leave tombstoned rows that searches skip; their slots aren't
+# reused, since removals (deleted papers) are rare next to inserts.
+
+import os
+import json
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+# Storage dtype -> (numpy dtype of the compact copy, file suffix)
+COMPACT_DTYPES = {
+    'float16': (np.float16, 'f16'),
+    'int8': (np.int8, 'i8')
+}
+
+
+class IVFIndex:
+    """Memory-mapped IVF index keyed by integer ids, with incremental inserts
+
+    dtype='float16' or 'int8' searches a compact copy of the vectors (2x / ~4x
+    smaller; int8 is scalar-quantized per vector) and re-scores the best
+    k * rescore_factor candidates exactly with the float32 vectors.
+    """
+
+    MIN_TRAIN_SIZE = 1024  # brute force below this size
+    RETRAIN_FACTOR = 4     # retrain once the index grows 4x past its training size
+    SCORE_BLOCK = 65536    # rows per block when scoring compact vectors
+    FILTER_EXACT_ROWS = 16384  # filters allowing fewer rows are searched exactly
+
+    def __init__(self, path: str, dim: int, nprobe: int = 8, initial_capacity: int = 1024,
+                 dtype: str = 'float32', rescore_factor: int = 4):
+        if dtype != 'float32' and dtype not in COMPACT_DTYPES:
+            raise ValueError(f"Unknown vector dtype '{dtype}' (expected float32, {', '.join(COMPACT_DTYPES)})")
+        self.path = path
+        self.dim = dim
+        self.nprobe = nprobe
+        self.dtype = dtype
+        self.rescore_factor = rescore_factor
+        self._lock = threading.RLock()
+        os.makedirs(path, exist_ok=True)
+
+        self.vectors_path = os.path.join(path, 'vectors.f32')
+        self.state_path = os.path.join(path, 'state.npz')
+
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.centroids = None
+        self.assignments = np.zeros(0, dtype=np.int32)
+        self.trained_size = 0
+        self.deleted = np.zeros(0, dtype=bool)
+        if os.path.exists(self.state_path) and os.path.exists(self.vectors_path):
+            state = np.load(self.state_path)
+            self.ids = state['ids']
+            self.assignments = state['assignments']
+            self.trained_size = int(state['trained_size'])
+            self.centroids = state['centroids'] if state['centroids'].size else None
+            # Indexes saved before removals existed have no tombstones
+            self.deleted = state['deleted'] if 'deleted' in state.files else np.zeros(len(self.ids), dtype=bool)
+            capacity = os.path.getsize(self.vectors_path) // (dim * 4)
+            self.vectors = np.memmap(self.vectors_path, dtype=np.float32, mode='r+', shape=(capacity, dim))
+        else:
+            self.vectors = np.memmap(self.vectors_path, dtype=np.float32, mode='w+',
+                                     shape=(initial_capacity, dim))
+
+        self.rows = {int(pid): row for row, pid in enumerate(self.ids) if not self.deleted[row]}
+        self.num_deleted = int(self.deleted.sum())
+        self._lists = None
+
+        self.codes = None
+        self.scales = None
+        if dtype != 'float32':
+            self._open_compact()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, ids: List[int], vectors: np.ndarray) -> List[int]:
+        """Insert or overwrite vectors by id; returns their row numbers"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            rows = []
+            new_ids = []
+            for pid in ids:
+                row = self.rows.get(int(pid))
+                if row is None:
+                    row = len(self.ids) + len(new_ids)
+                    self.rows[int(pid)] = row
+                    new_ids.append(int(pid))
+                rows.append(row)
+
+            self._reserve(len(self.ids) + len(new_ids))
+            self.ids = np.concatenate([self.ids, np.asarray(new_ids, dtype=np.int64)])
+            self.deleted = np.concatenate([self.deleted, np.zeros(len(new_ids), dtype=bool)])
+            self.vectors[rows] = vectors
+            if self.codes is not None:
+                self._write_compact(rows, vectors)
+
+            if self.centroids is not None and len(self.ids) > self.trained_size * self.RETRAIN_FACTOR:
+                self.train()
+            elif self.centroids is not None:
+                assignments = np.resize(self.assignments, len(self.ids))
+                assignments[rows] = self._nearest_centroid(vectors)
+                self.assignments = assignments
+                self._lists = None
+            elif len(self.ids) >= self.MIN_TRAIN_SIZE:
+                self.train()
+            return rows
+
+    def remove(self, ids: List[int]) -> int:
+        """Drop ids from search results; returns how many were present"""
+        with self._lock:
+            removed = 0
+            for pid in ids:
+                row = self.rows.pop(int(pid), None)
+                if row is not None:
+                    self.deleted[row] = True
+                    removed += 1
+            self.num_deleted += removed
+            return removed
+
+    def train(self, iterations: int = 10, seed: int = 0):
+        """(Re)build the coarse quantizer with spherical k-means"""
+        with self._lock:
+            n = len(self.ids)
+            nlist = max(1, min(int(4 * np.sqrt(n)), n // 39))
+            rng = np.random.default_rng(seed)
+            sample_rows = np.sort(rng.choice(n, size=min(n, nlist * 64), replace=False))
+            sample = np.asarray(self.vectors[sample_rows])
+
+            centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+            for _ in range(iterations):
+                labels = np.argmax(sample @ centroids.T, axis=1)
+                for c in range(nlist):
+                    members = sample[labels == c]
+                    if len(members):
+                        centroids[c] = members.mean(axis=0)
+                centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+
+            self.centroids = centroids
+            self.assignments = self._nearest_centroid(self.vectors[:n])
+            self.trained_size = n
+            self._lists = None
+
+    def search(self, query: np.ndarray, k: int = 10, nprobe: int = None,
+               allowed: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Approximate top-k ids and cosine similarities for one query
+
+        allowed is an optional boolean mask over rows; only those rows can match.
+        """
+        query = np.asarray(query, dtype=np.float32)
+        with self._lock:
+            n = len(self.ids)
+            if n == 0:
+                return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+            nprobe = nprobe or self.nprobe
+            if self.num_deleted:
+                live = ~self.deleted
+                allowed = live if allowed is None else allowed[:n] & live
+            if allowed is not None:
+                allowed = allowed[:n]
+                allowed_rows = np.flatnonzero(allowed)
+                if self.centroids is None or len(allowed_rows) <= self.FILTER_EXACT_ROWS:
+                    # Selective filter: scoring just the allowed rows beats probing lists
+                    return self._top_k(allowed_rows, query, k)
+                # Probe proportionally more lists so about as many candidates survive the filter
+                nprobe = int(np.ceil(nprobe * n / len(allowed_rows)))
+            elif self.centroids is None:
+                return self._top_k(None, query, k)
+
+            nprobe = min(nprobe, len(self.centroids))
+            probes = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+            lists = self._inverted_lists()
+            candidates = np.concatenate([lists[c] for c in probes])
+            if allowed is not None:
+                candidates = candidates[allowed[candidates]]
+            return self._top_k(candidates, query, k)
+
+    def exact_search(self, query: np.ndarray, k: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+        """Brute-force top-k over every vector"""
+        with self._lock:
+            rows = np.flatnonzero(~self.deleted) if self.num_deleted else None
+            return self._top_k(rows, np.asarray(query, dtype=np.float32), k)
+
+    def save(self):
+        """Flush vectors and persist ids and the quantizer"""
+        with self._lock:
+            self.vectors.flush()
+            if self.codes is not None:
+                self.codes.flush()
+                if self.scales is not None:
+                    self.scales.flush()
+            tmp_path = self.state_path + '.tmp.npz'
+            np.savez(
+                tmp_path,
+                ids=self.ids,
+                assignments=self.assignments,
+                trained_size=self.trained_size,
+                deleted=self.deleted,
+                centroids=self.centroids if self.centroids is not None else np.zeros(0, dtype=np.float32)
+            )
+            os.replace(tmp_path, self.state_path)
+
+    @property
+    def bytes_per_vector(self) -> int:
+        """Bytes per vector on the search path (float32 vectors are only touched for re-scoring)"""
+        if self.codes is None:
+            return self.dim * 4
+        return self.dim * self.codes.dtype.itemsize + (4 if self.scales is not None else 0)
+
+    def _top_k(self, rows: Optional[np.ndarray], query: np.ndarray, k: int):
+        """Top-k among candidate rows (None = every row)"""
+        if self.codes is not None:
+            return self._top_k_compact(rows, query, k)
+        if rows is None:
+            scores = self.vectors[:len(self.ids)] @ query
+            rows = np.arange(len(self.ids))
+        else:
+            scores = self.vectors[rows] @ query
+        if len(rows) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        k = min(k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return self.ids[rows[top]], scores[top]
+
+    def _top_k_compact(self, rows: Optional[np.ndarray], query: np.ndarray, k: int):
+        """Shortlist on the compact vectors, then re-score the shortlist exactly"""
+        # Only a full scan may read the memmap by slice; candidate rows (even
+        # all of them, when every list is probed) come in list order
+        contiguous = rows is None
+        if rows is None:
+            rows = np.arange(len(self.ids))
+        if len(rows) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        scores = np.empty(len(rows), dtype=np.float32)
+        for start in range(0, len(rows), self.SCORE_BLOCK):
+            block = slice(start, min(start + self.SCORE_BLOCK, len(rows)))
+            # A slice of the memmap avoids copying every row when scanning everything
+            codes = self.codes[block] if contiguous else self.codes[rows[block]]
+            scores[block] = codes.astype(np.float32) @ query
+            if self.scales is not None:
+                scores[block] *= self.scales[block] if contiguous else self.scales[rows[block]]
+
+        shortlist = min(len(rows), k * self.rescore_factor)
+        candidates = np.sort(rows[np.argpartition(-scores, shortlist - 1)[:shortlist]])
+        exact = np.asarray(self.vectors[candidates]) @ query
+        k = min(k, len(candidates))
+        top = np.argpartition(-exact, k - 1)[:k]
+        top = top[np.argsort(-exact[top])]
+        return self.ids[candidates[top]], exact[top]
+
+    def _compress(self, vectors: np.ndarray):
+        """Compact codes (and per-vector int8 scales) for float32 vectors"""
+        if self.dtype == 'float16':
+            return vectors.astype(np.float16), None
+        scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127
+        codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+
+    def _write_compact(self, rows, vectors: np.ndarray):
+        codes, scales = self._compress(np.asarray(vectors, dtype=np.float32))
+        self.codes[rows] = codes
+        if self.scales is not None:
+            self.scales[rows] = scales
+
+    def _open_compact(self):
+        np_dtype, suffix = COMPACT_DTYPES[self.dtype]
+        codes_path = os.path.join(self.path, f'vectors.{suffix}')
+        scales_path = os.path.join(self.path, 'scales.f32')
+        capacity = self.vectors.shape[0]
+        fresh = not os.path.exists(codes_path) or os.path.getsize(codes_path) < capacity * self.dim * np.dtype(np_dtype).itemsize
+        self.codes = self._map(codes_path, np_dtype, capacity, self.dim)
+        if self.dtype == 'int8':
+            fresh = fresh or not os.path.exists(scales_path)
+            self.scales = self._map(scales_path, np.float32, capacity)
+        if fresh and len(self.ids):
+            # Index built with another dtype: derive the compact copy from the float32 vectors
+            for start in range(0, len(self.ids), self.SCORE_BLOCK):
+                rows = np.arange(start, min(start + self.SCORE_BLOCK, len(self.ids)))
+                self._write_compact(rows, self.vectors[start:start + len(rows)])
+
+    @staticmethod
+    def _map(path: str, dtype, capacity: int, width: int = None) -> np.memmap:
+        """Open (creating or growing) a memmap of capacity rows"""
+        shape = (capacity, width) if width else (capacity,)
+        size = capacity * (width or 1) * np.dtype(dtype).itemsize
+        with open(path, 'ab') as f:
+            if f.tell() < size:
+                f.truncate(size)
+        return np.memmap(path, dtype=dtype, mode='r+', shape=shape)
+
+    def _nearest_centroid(self, vectors: np.ndarray, block: int = 8192) -> np.ndarray:
+        labels = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), block):
+            labels[start:start + block] = np.argmax(
+                np.asarray(vectors[start:start + block]) @ self.centroids.T, axis=1
+            )
+        return labels
+
+    def _inverted_lists(self) -> List[np.ndarray]:
+        if self._lists is None:
+            order = np.argsort(self.assignments, kind='stable')
+            bounds = np.searchsorted(self.assignments[order], np.arange(len(self.centroids) + 1))
+            self._lists = [order[bounds[c]:bounds[c + 1]] for c in range(len(self.centroids))]
+        return self._lists
+
+    def _reserve(self, size: int):
+        capacity = self.vectors.shape[0]
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        # Grow the backing file and remap it
+        self.vectors.flush()
+        del self.vectors
+        with open(self.vectors_path, 'r+b') as f:
+            f.truncate(capacity * self.dim * 4)
+        self.vectors = np.memmap(self.vectors_path, dtype=np.float32, mode='r+', shape=(capacity, self.dim))
+        if self.codes is not None:
+            self.codes.flush()
+            self.codes = self._map(self.codes.filename, self.codes.dtype, capacity, self.dim)
+            if self.scales is not None:
+                self.scales.flush()
+                self.scales = self._map(self.scales.filename, np.float32, capacity)
+
+
+class PropertyStore:
+    """Append-only JSON-lines store of per-id properties (last write wins, null = deleted)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.records: Dict[int, Dict] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    record = json.loads(line)
+                    if record['properties'] is None:
+                        self.records.pop(record['id'], None)
+                    else:
+                        self.records[record['id']] = record['properties']
+
+    def put_many(self, ids: List[int], properties: List[Dict]):
+        with open(self.path, 'a') as f:
+            for pid, props in zip(ids, properties):
+                self.records[int(pid)] = props
+                f.write(json.dumps({'id': int(pid), 'properties': props}) + '\n')
+
+    def delete_many(self, ids: List[int]):
+        with open(self.path, 'a') as f:
+            for pid in ids:
+                if self.records.pop(int(pid), None) is not None:
+                    f.write(json.dumps({'id': int(pid), 'properties': None}) + '\n')
+
+    def get(self, pid: int) -> Optional[Dict]:
+        return self.records.get(int(pid))
+
+
+class AttributeIndex:
+    """Per-row year, journal and source columns of an IVFIndex, for filter bitmaps
+
+    Journals and sources are stored as integer codes, so building the bitmap
+    for a filter is a few vectorized comparisons rather than a pass over the
+    properties of every paper.
+    """
+
+    FIELDS = ('journal', 'source')
+
+    def __init__(self):
+        self.years = np.zeros(0, dtype=np.int32)
+        self.columns = {field: np.zeros(0, dtype=np.int32) for field in self.FIELDS}
+        self.codes = {field: {} for field in self.FIELDS}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.years)
+
+    def set(self, rows: List[int], properties: List[Dict]):
+        """Record the attributes of the given rows (as returned by IVFIndex.add)"""
+        if not len(rows):
+            return
+        with self._lock:
+            size = max(rows) + 1
+            if size > len(self.years):
+                self.years = np.concatenate([self.years, np.zeros(size - len(self.years), dtype=np.int32)])
+                for field in self.FIELDS:
+                    column = self.columns[field]
+                    self.columns[field] = np.concatenate([column, np.full(size - len(column), -1, dtype=np.int32)])
+            for row, props in zip(rows, properties):
+                self.years[row] = props.get('year') or 0
+                for field in self.FIELDS:
+                    value = props.get(field)
+                    codes = self.codes[field]
+                    self.columns[field][row] = codes.setdefault(value, len(codes)) if value else -1
+
+    def mask(self, filters, size: int) -> np.ndarray:
+        """Boolean mask of rows passing a search_filters.SearchFilters"""
+        with self._lock:
+            allowed = np.zeros(size, dtype=bool)
+            n = min(size, len(self.years))
+            mask = np.ones(n, dtype=bool)
+            years = self.years[:n]
+            if filters.year_min is not None:
+                mask &= years >= filters.year_min
+            if filters.year_max is not None:
+                mask &= (years <= filters.year_max) & (years > 0)
+            for field, values in (('journal', filters.journals), ('source', filters.sources)):
+                if values:
+                    codes = [self.codes[field][v] for v in values if v in self.codes[field]]
+                    mask &= np.isin(self.columns[field][:n], codes)
+            allowed[:n] = mask
+            return allowed